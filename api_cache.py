@@ -0,0 +1,138 @@
+# On-disk cache for College Football Data API responses
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode
+
+CACHE_PATH = "CFBdata/.cache/api.sqlite"
+
+MINUTE = 60
+DAY = 24 * 60 * MINUTE
+
+# How long a response of each endpoint stays fresh (in seconds); endpoints that are not listed are never cached
+ENDPOINT_TTLS = {
+    "teams/fbs": 3 * DAY,
+    "calendar": 1 * DAY,
+    "lines": 10 * MINUTE,
+    "games": 10 * MINUTE,
+}
+
+
+def get_cache_key(endpoint, params=None):
+    """
+    Build the cache key of a request, so that the same query always gets the same key no matter how it is written.
+
+    :param endpoint: The endpoint (e.g. "games?year=2024&week=1").
+    :param params: Extra query parameters.
+    :return: key (str) - the endpoint path followed by its sorted query
+    """
+    path, _, query = endpoint.partition("?")
+    query = parse_qsl(query)
+    if params:
+        query += [(str(key), str(value)) for key, value in params.items()]
+    return path + "?" + urlencode(sorted(query)) if query else path
+
+
+def get_ttl(endpoint, body):
+    """
+    Decide how long a response stays fresh.
+
+    :param endpoint: The endpoint the response came from.
+    :param body: The decoded JSON response.
+    :return: ttl (float) - the number of seconds the response stays fresh, None if it never expires, 0 if it should not
+    be cached
+    """
+    path = endpoint.partition("?")[0]
+
+    # The results of a week in which every game is completed will never change
+    if path == "games" and body and all(game.get("completed") for game in body):
+        return None
+
+    return ENDPOINT_TTLS.get(path, 0)
+
+
+class ResponseCache:
+    """
+    A SQLite-backed store of API responses, along with the validators (ETag / Last-Modified) needed to revalidate them.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        """
+        :param path: The path of the SQLite database.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # The connection is shared between threads, so every use of it is guarded by a lock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, body TEXT, etag TEXT, last_modified TEXT, stored_at REAL, ttl REAL)"
+            )
+
+    def lookup(self, key):
+        """
+        Look up a cached response.
+
+        :param key: The cache key (see get_cache_key).
+        :return: entry (dict) - body, etag, last_modified and fresh (whether it can be used without asking the API), or
+        None if the response is not cached
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT body, etag, last_modified, stored_at, ttl FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+
+        body, etag, last_modified, stored_at, ttl = row
+        return {
+            "body": json.loads(body),
+            "etag": etag,
+            "last_modified": last_modified,
+            "fresh": ttl is None or time.time() - stored_at < ttl,
+        }
+
+    def store(self, key, body, ttl, etag=None, last_modified=None):
+        """
+        Store a response.
+
+        :param key: The cache key (see get_cache_key).
+        :param body: The decoded JSON response.
+        :param ttl: The number of seconds the response stays fresh (None if it never expires).
+        :param etag: The ETag header of the response.
+        :param last_modified: The Last-Modified header of the response.
+        :return: None
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, json.dumps(body), etag, last_modified, time.time(), ttl),
+            )
+
+    def touch(self, key):
+        """
+        Mark a cached response as fresh again (after the API confirmed it did not change).
+
+        :param key: The cache key (see get_cache_key).
+        :return: None
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE responses SET stored_at = ? WHERE key = ?", (time.time(), key)
+            )
+
+    def clear(self):
+        """
+        Remove every cached response.
+
+        :return: None
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses")
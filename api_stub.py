@@ -0,0 +1,83 @@
+# A local stand-in for the College Football Data API that answers from recorded responses (e.g. for benchmarks)
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from api_cache import get_cache_key
+from cfb_api import CFBClient, get_client
+
+FIXTURES_PATH = "CFBdata/fixtures/api.json"
+
+
+def record_fixtures(endpoints, path=FIXTURES_PATH, client=None):
+    """
+    Record the responses of the real API, adding them to the fixtures file.
+
+    :param endpoints: The endpoints to record.
+    :param path: The fixtures file.
+    :param client: The client to record with (defaults to the shared client).
+    :return: None
+    """
+    if client is None:
+        client = get_client()
+    fixtures = load_fixtures(path) if os.path.exists(path) else {}
+    for endpoint in endpoints:
+        fixtures[get_cache_key(endpoint)] = client.get(endpoint)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w") as file:
+        json.dump(fixtures, file, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def load_fixtures(path=FIXTURES_PATH):
+    """
+    Load recorded responses.
+
+    :param path: The fixtures file.
+    :return: fixtures (dict) - a dictionary that links each cache key (see api_cache.get_cache_key) to its response
+    """
+    with open(path) as file:
+        return json.load(file)
+
+
+def start_stub(fixtures):
+    """
+    Serve recorded responses on a local port, in a background thread. Requests that were not recorded get a 404.
+
+    :param fixtures: The recorded responses (see load_fixtures).
+    :return: server (ThreadingHTTPServer) - call shutdown() to stop it; base_url (str) - the URL to point a client at
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = fixtures.get(get_cache_key(self.path.lstrip("/")))
+            if body is None:
+                self.send_error(404, "Not recorded")
+                return
+            payload = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            # Keep the benchmark output clean
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def stub_client(fixtures):
+    """
+    Start a stub and build an API client that talks to it (without a response cache, so every call reaches the stub).
+
+    :param fixtures: The recorded responses (see load_fixtures).
+    :return: server (ThreadingHTTPServer); client (CFBClient)
+    """
+    server, base_url = start_stub(fixtures)
+    return server, CFBClient(base_url=base_url, api_key="stub", max_retries=0)
@@ -1,13 +1,138 @@
-from flask import Flask, jsonify, render_template
+import json
+import os
+import threading
+import warnings
+
+from flask import (
+    Flask,
+    Response,
+    jsonify,
+    make_response,
+    render_template,
+    request,
+    stream_with_context,
+)
+import metrics
 from main import (
-    predict_this_weeks_games,
-    get_current_SEC_overUnder_lines,
-    predict_anyWeek_SEC_totalScores,
+    SEASON,
+    clean_team_names,
     get_current_week,
+    is_known_team,
 )
+from matchup_matrix import use_matchup_matrix
+from models import DEFAULT_MODELS, MODELS, predict_matchup
+from result_store import ResultStore
+from scheduler import start_scheduler
 
+# The routes are registered on import; nothing is loaded or started until create_app is called, or until the first
+# request if the server imports app directly (e.g. flask --app app run or gunicorn app:app)
 app = Flask(__name__)
 
+# How long (in seconds) browsers may reuse a page without asking again
+MAX_AGE = 60
+
+# How long (in seconds) clients should wait before asking again for a view that is not computed yet
+RETRY_AFTER = 10
+
+# The store the views are served from (set by create_app)
+store = None
+
+# Makes sure that create_app only sets everything up once, even when the first requests arrive together
+_create_lock = threading.Lock()
+
+
+def warm_up():
+    """
+    Load the data, answer predictions from the precomputed matchup matrix (rebuilt if the data changed) and precompute
+    the current week's pages (unless a separate worker does it: python scheduler.py).
+
+    :return: None
+    """
+    use_matchup_matrix()
+    if os.getenv("CFB_SCHEDULER") != "external":
+        start_scheduler(store)
+
+
+def create_app(result_store=None, warm=True):
+    """
+    Get the web app ready to serve: open the result store, treat numerical warnings as errors and warm up in the
+    background, so that it can serve (more slowly) right away. Servers can call this, e.g. gunicorn "app:create_app()";
+    otherwise it is called with the defaults on the first request.
+
+    :param result_store: The ResultStore to serve the views from (defaults to the shared one on disk).
+    :param warm: Whether to load the data and start the scheduler in the background (see warm_up).
+    :return: app (Flask) - the web app
+    """
+    global store
+    with _create_lock:
+        if store is not None:
+            # Already created
+            return app
+
+        # Treat numerical warnings as errors, like main.py does
+        warnings.simplefilter("error", RuntimeWarning)
+
+        store = ResultStore() if result_store is None else result_store
+        if warm:
+            threading.Thread(target=warm_up, daemon=True).start()
+    return app
+
+
+@app.before_request
+def ensure_created():
+    """
+    Set the app up with the defaults if the server imported app without calling create_app.
+
+    :return: None
+    """
+    if store is None:
+        create_app()
+
+
+def get_result(view, week, season=SEASON):
+    """
+    Get the stored result of a view. Nothing is computed here: the scheduler keeps the current week's views up to date,
+    and a view it does not keep (e.g. a past week) is asked for, so that it computes it (see scheduler.compute_requested).
+
+    :param view: The name of the view.
+    :param week: The week to get the view for.
+    :param season: The season to get the view for.
+    :return: entry (dict) - the stored entry (see ResultStore.get), or None if the view is not computed yet
+    """
+    entry = store.get(view, season, week)
+    if entry is None:
+        store.request(view, season, week)
+    return entry
+
+
+def not_ready(response):
+    """
+    Answer that a view is not computed yet and ask the client to come back once it is.
+
+    :param response: The body of the response (text, or a JSON response).
+    :return: The 503 response.
+    """
+    response = make_response(response, 503)
+    response.headers["Retry-After"] = str(RETRY_AFTER)
+    return response
+
+
+def cached_page(entry, render):
+    """
+    Send a cached result, or just "not modified" if the client already has it.
+
+    :param entry: The stored entry (see ResultStore.get).
+    :param render: A function that turns the result into a response.
+    :return: The response.
+    """
+    if request.if_none_match.contains(entry["etag"]):
+        response = make_response("", 304)
+    else:
+        response = make_response(render(entry["result"]))
+    response.set_etag(entry["etag"])
+    response.headers["Cache-Control"] = f"public, max-age={MAX_AGE}"
+    return response
+
 
 # Home page
 @app.route("/")
@@ -18,46 +143,127 @@ def home():
 # Winner Prediction Page
 @app.route("/predict-winners")
 def predict_winners():
-    winners, matchups = predict_this_weeks_games()
+    entry = get_result("predict-winners", get_current_week())
+    if entry is None:
+        return not_ready("The predictions for this week are being computed, please try again in a moment.")
     # Send data to HTML page
-    return render_template("predict-winners.html", matchups=zip(matchups, winners))
+    return cached_page(
+        entry,
+        lambda matchups: render_template("predict-winners.html", matchups=matchups),
+    )
 
 
 # OverUnder Prediction Page
 @app.route("/overunder")
 def over_under():
-    current_week = get_current_week()
-    overunder_lines = get_current_SEC_overUnder_lines()
-    sec_predictions = predict_anyWeek_SEC_totalScores(current_week)
-
-    # predictions = [
-    #     (
-    #         game,
-    #         predicted_score,
-    #         over_under_line,
-    #         "over" if predicted_score > over_under_line else "under",
-    #     )
-    #     for game, predicted_score, over_under_line in zip(
-    #         sec_predictions.keys(), sec_predictions.values(), overunder_lines.values()
-    #     )
-    # ]
-    predictions = []
-    i = 0
-    # Remember sec_predictions is a list of tuples in this format: (home_team, away_team, total_score)
-    for game in sec_predictions:
-        home_team = game[0]
-        away_team = game[1]
-        total_score = game[2]
-        over_under_line = overunder_lines[i][2]
-        over_under = "over" if float(total_score) > float(over_under_line) else "under"
-        predictions.append(
-            (home_team, away_team, total_score, over_under_line, over_under)
+    entry = get_result("overunder", get_current_week())
+    if entry is None:
+        return not_ready("The predictions for this week are being computed, please try again in a moment.")
+    # Send data to HTML page
+    return cached_page(
+        entry,
+        lambda predictions: render_template(
+            "overunder.html", predictions=predictions
+        ),
+    )
+
+
+def stream_json(items):
+    """
+    Stream items as they are produced, either as a JSON array or as NDJSON (one JSON object per line, asked for with
+    ?format=ndjson or an Accept: application/x-ndjson header).
+
+    :param items: A generator of items that can be converted to JSON.
+    :return: The streamed response.
+    """
+    ndjson = request.args.get("format") == "ndjson" or (
+        request.accept_mimetypes.best_match(["application/json", "application/x-ndjson"])
+        == "application/x-ndjson"
+    )
+
+    def generate_ndjson():
+        for item in items:
+            yield json.dumps(item) + "\n"
+
+    def generate_array():
+        # Write the array piece by piece, so that nothing has to wait for the last item
+        yield "["
+        for i, item in enumerate(items):
+            yield ("," if i else "") + json.dumps(item)
+        yield "]"
+
+    if ndjson:
+        return Response(
+            stream_with_context(generate_ndjson()), mimetype="application/x-ndjson"
         )
-        i += 1
+    return Response(stream_with_context(generate_array()), mimetype="application/json")
 
-    # Send data to HTML page
-    return render_template("overunder.html", predictions=predictions)
+
+# Winner, total and spread predictions for every game of a week (precomputed by the scheduler for the current week)
+@app.route("/api/predictions/<int:season>/<int:week>")
+def api_predictions(season, week):
+    entry = get_result("predictions", week, season)
+    if entry is None:
+        return not_ready(jsonify(error="The predictions for this week are being computed"))
+    response = cached_page(entry, stream_json)
+    # The same result is sent as JSON or NDJSON depending on the Accept header
+    response.vary.add("Accept")
+    return response
+
+
+# Over/under predictions for every SEC game of a week (precomputed by the scheduler for the current week)
+@app.route("/api/overunder/<int:season>/<int:week>")
+def api_overunder(season, week):
+    entry = get_result("overunder-predictions", week, season)
+    if entry is None:
+        return not_ready(jsonify(error="The over/under predictions for this week are being computed"))
+    response = cached_page(entry, stream_json)
+    # The same result is sent as JSON or NDJSON depending on the Accept header
+    response.vary.add("Accept")
+    return response
+
+
+# Prediction for a single game
+@app.route("/api/matchup")
+def api_matchup():
+    home_team = request.args.get("home")
+    away_team = request.args.get("away")
+    if not home_team or not away_team:
+        return jsonify(error="Both home and away teams are required"), 400
+
+    # Accept the API's spelling of a team name as well as the dataset's
+    if not (is_known_team(home_team) and is_known_team(away_team)):
+        team_names, team_names_dict = clean_team_names()
+        home_team = team_names_dict.get(home_team, home_team)
+        away_team = team_names_dict.get(away_team, away_team)
+    for team in (home_team, away_team):
+        if not is_known_team(team):
+            return jsonify(error=f"Unknown team: {team}"), 404
+
+    # Any registered model can be asked for, e.g. ?winner_model=top_stats
+    models = {}
+    for kind in DEFAULT_MODELS:
+        name = request.args.get(f"{kind}_model")
+        if name is None:
+            continue
+        if name not in MODELS or MODELS[name].kind != kind:
+            return jsonify(error=f"Unknown {kind} model: {name}"), 400
+        models[kind] = name
+
+    return jsonify(
+        home_team=home_team,
+        away_team=away_team,
+        **predict_matchup(home_team, away_team, home_field=True, models=models),
+    )
+
+
+# Counters and latency histograms of every stage (see metrics.py), for Prometheus to scrape
+@app.route("/metrics")
+def prometheus_metrics():
+    return Response(
+        metrics.render_prometheus(), mimetype="text/plain; version=0.0.4"
+    )
 
 
 if __name__ == "__main__":
-    app.run(debug=False)
+    create_app().run(debug=False)
@@ -0,0 +1,351 @@
+# Walk-forward backtest: replay every season's games, predicting each one only from the seasons before it
+import functools
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from cfb_api import fetch_all
+from config import MAX_CONCURRENT_REQUESTS
+from data import build_summary, get_data, score_games, score_spreads, score_totals
+from main import clean_team_names
+
+# Finished seasons are archived here, so that backtests run without the API (the archive is not part of the repository:
+# the first backtest of a season fetches it once, e.g. python cfb.py backtest --fetch)
+GAMES_DIRECTORY = "CFBdata/games"
+
+GAME_COLUMNS = [
+    "id",
+    "season",
+    "week",
+    "home_team",
+    "away_team",
+    "home_conference",
+    "away_conference",
+    "home_points",
+    "away_points",
+    "spread",
+    "over_under",
+]
+
+
+def get_line(lines):
+    """
+    Pick the first sportsbook that has both a spread and an over/under.
+
+    :param lines: The lines of a game (as returned by the API).
+    :return: spread (float) - the home team's spread (negative if the home team is favored); over_under (float) - the
+    over/under line (both NaN if no sportsbook has them)
+    """
+    for line in lines:
+        try:
+            return float(line["spread"]), float(line["overUnder"])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return np.nan, np.nan
+
+
+def fetch_season_games(seasons):
+    """
+    Fetch the games and lines of several seasons from the API (in parallel) and join them by game id.
+
+    :param seasons: The seasons to fetch.
+    :return: games (dict) - a dictionary that links each season to its list of games (dictionaries with the keys in
+    GAME_COLUMNS, team names already converted to the names used in cfb.csv), and completed (dict) - whether every game
+    of the season is completed
+    """
+    endpoints = {}
+    for season in seasons:
+        endpoints[season] = (
+            f"games?year={season}&division=fbs",
+            f"lines?year={season}",
+        )
+    responses = fetch_all(
+        [endpoint for pair in endpoints.values() for endpoint in pair],
+        MAX_CONCURRENT_REQUESTS,
+    )
+
+    team_names, team_names_dict = clean_team_names()
+
+    games = {}
+    completed = {}
+    for season, (games_endpoint, lines_endpoint) in endpoints.items():
+        lines = {game["id"]: get_line(game["lines"]) for game in responses[lines_endpoint]}
+
+        games[season] = []
+        for game in responses[games_endpoint]:
+            spread, over_under = lines.get(game["id"], (np.nan, np.nan))
+            games[season].append(
+                {
+                    "id": game["id"],
+                    "season": season,
+                    "week": game["week"],
+                    # Teams that are not in the FBS keep their API name (and are skipped by the backtest)
+                    "home_team": team_names_dict.get(game["home_team"], game["home_team"]),
+                    "away_team": team_names_dict.get(game["away_team"], game["away_team"]),
+                    "home_conference": game.get("home_conference"),
+                    "away_conference": game.get("away_conference"),
+                    "home_points": game.get("home_points"),
+                    "away_points": game.get("away_points"),
+                    "spread": None if np.isnan(spread) else spread,
+                    "over_under": None if np.isnan(over_under) else over_under,
+                }
+            )
+        completed[season] = all(
+            game.get("completed") for game in responses[games_endpoint]
+        )
+
+    return games, completed
+
+
+def load_games(seasons):
+    """
+    Load the games of several seasons, from the archive when possible and from the API otherwise.
+    Seasons in which every game is completed are archived after they are fetched.
+
+    :param seasons: The seasons to load.
+    :return: games (pd.DataFrame) - one row per game, with the columns in GAME_COLUMNS
+    """
+    games = []
+    missing = []
+    for season in seasons:
+        path = os.path.join(GAMES_DIRECTORY, f"{season}.json")
+        if os.path.exists(path):
+            with open(path) as file:
+                games.extend(json.load(file))
+        else:
+            missing.append(season)
+
+    if missing:
+        fetched, completed = fetch_season_games(missing)
+        os.makedirs(GAMES_DIRECTORY, exist_ok=True)
+        for season, season_games in fetched.items():
+            games.extend(season_games)
+            if completed[season]:
+                path = os.path.join(GAMES_DIRECTORY, f"{season}.json")
+                with open(path + ".tmp", "w") as file:
+                    json.dump(season_games, file)
+                os.replace(path + ".tmp", path)
+
+    games = pd.DataFrame(games, columns=GAME_COLUMNS)
+    for column in ("home_points", "away_points", "spread", "over_under"):
+        games[column] = pd.to_numeric(games[column])
+    return games
+
+
+@functools.lru_cache(maxsize=None)
+def get_prior_summary(season):
+    """
+    Build the team summary from the seasons before a season, i.e. everything that was known before it started.
+
+    :param season: The season to predict.
+    :return: summary (dict) - see data.build_summary
+    """
+    df = get_data()
+    return build_summary(df[df["season"] < season])
+
+
+def get_seasons():
+    """
+    Get the seasons that can be backtested: every season after the first one in cfb.csv, and the season after the last.
+
+    :return: seasons (list) - the seasons, in order
+    """
+    seasons = get_data()["season"]
+    first = int(seasons.min())
+    last = int(seasons.max())
+    return list(range(first + 1, last + 2))
+
+
+def get_archived_seasons():
+    """
+    Get the seasons that can be backtested without the API (their games are archived, see load_games).
+
+    :return: seasons (list) - the seasons, in order
+    """
+    return [
+        season
+        for season in get_seasons()
+        if os.path.exists(os.path.join(GAMES_DIRECTORY, f"{season}.json"))
+    ]
+
+
+def iter_season_games(seasons=None, games=None):
+    """
+    Go through the completed games of each season, along with the summary of the seasons before it.
+
+    :param seasons: The seasons to go through (defaults to get_seasons).
+    :param games: The games (see load_games; loaded if not given).
+    :return: A generator of (season, season_games, summary, home_ids, away_ids) tuples: the season's completed games
+    between teams that have prior seasons (pd.DataFrame), the summary they are predicted from (see get_prior_summary)
+    and the rows of their home and away teams in that summary
+    """
+    if seasons is None:
+        seasons = get_seasons()
+    if games is None:
+        games = load_games(seasons)
+
+    # Only completed games can be checked
+    games = games[
+        games["season"].isin(seasons)
+        & games["home_points"].notna()
+        & games["away_points"].notna()
+    ]
+
+    for season, season_games in games.groupby("season", sort=True):
+        summary = get_prior_summary(season)
+        ids = summary["team_ids"]
+        home_ids = season_games["home_team"].map(ids)
+        away_ids = season_games["away_team"].map(ids)
+
+        # Skip games with a team that has no prior seasons
+        known = home_ids.notna() & away_ids.notna()
+        yield (
+            season,
+            season_games[known].copy(),
+            summary,
+            home_ids[known].to_numpy(dtype=np.intp),
+            away_ids[known].to_numpy(dtype=np.intp),
+        )
+
+
+def backtest(
+    seasons=None,
+    games=None,
+    conference_multipliers=None,
+    home_field_advantage=None,
+    away_field_disadvantage=None,
+):
+    """
+    Predict every completed game of every season, using only the seasons before it.
+
+    Each season is scored in one vectorized pass, exactly like data.predict_games (winner), data.score_totals (total)
+    and data.score_spreads (spread).
+
+    :param seasons: The seasons to backtest (defaults to get_seasons).
+    :param games: The games to backtest (see load_games; loaded if not given).
+    :param conference_multipliers: The multiplier of each conference (defaults to config.CONFERENCE_MULTIPLIERS).
+    :param home_field_advantage: The home team's multiplier (defaults to config.Home_Field_Advantage).
+    :param away_field_disadvantage: The away team's multiplier (defaults to config.Away_Field_Disadvantage).
+    :return: results (pd.DataFrame) - one row per game, with the columns in GAME_COLUMNS and the prediction of each game:
+    predicted_winner, predicted_total and predicted_spread, along with winner_correct, ats_correct and over_under_correct
+    (NaN if the game had no line or was a push)
+    """
+    results = []
+    for season, season_games, summary, home_ids, away_ids in iter_season_games(
+        seasons, games
+    ):
+        home_points, away_points = score_games(
+            home_ids,
+            away_ids,
+            True,
+            conference_multipliers,
+            home_field_advantage,
+            away_field_disadvantage,
+            summary,
+        )
+        # Ties go to the away team, just like in predict_winner_all_stats
+        season_games["predicted_winner"] = np.where(
+            home_points > away_points,
+            season_games["home_team"],
+            season_games["away_team"],
+        )
+        season_games["predicted_total"] = score_totals(home_ids, away_ids, summary)
+        season_games["predicted_spread"] = score_spreads(home_ids, away_ids, summary)
+        results.append(season_games)
+
+    if not results:
+        return pd.DataFrame(
+            columns=GAME_COLUMNS
+            + [
+                "predicted_winner",
+                "predicted_total",
+                "predicted_spread",
+                "winner_correct",
+                "ats_correct",
+                "over_under_correct",
+            ]
+        )
+    results = pd.concat(results, ignore_index=True)
+
+    margin = results["home_points"] - results["away_points"]
+    total = results["home_points"] + results["away_points"]
+    actual_winner = np.where(margin > 0, results["home_team"], results["away_team"])
+    results["winner_correct"] = (results["predicted_winner"] == actual_winner).astype(
+        np.double
+    )
+
+    # The home team covers if it wins by more than the spread; pushes and games without a line are not counted
+    cover = margin + results["spread"]
+    predicted_cover = results["predicted_spread"] + results["spread"]
+    results["ats_correct"] = np.where(
+        (cover != 0) & cover.notna(),
+        ((cover > 0) == (predicted_cover > 0)).astype(np.double),
+        np.nan,
+    )
+
+    over = total - results["over_under"]
+    predicted_over = results["predicted_total"] - results["over_under"]
+    results["over_under_correct"] = np.where(
+        (over != 0) & over.notna(),
+        ((over > 0) == (predicted_over > 0)).astype(np.double),
+        np.nan,
+    )
+
+    return results
+
+
+def summarize(results, by):
+    """
+    Summarize the accuracy of a backtest.
+
+    :param results: The results of a backtest (see backtest).
+    :param by: What to group the games by: "season", "week" or "conference" (a game counts for the conferences of both
+    of its teams).
+    :return: summary (pd.DataFrame) - for each group: the number of games, the winner hit rate, the number of games with a
+    spread and the rate against the spread, and the number of games with an over/under line and the over/under rate
+    """
+    if by == "conference":
+        # Count every game once for each conference that played in it
+        results = pd.concat(
+            [
+                results.assign(conference=results["home_conference"]),
+                results.assign(conference=results["away_conference"])[
+                    results["away_conference"] != results["home_conference"]
+                ],
+            ]
+        )
+        results["conference"] = results["conference"].fillna("None")
+
+    grouped = results.groupby(by)
+    return pd.DataFrame(
+        {
+            "games": grouped["winner_correct"].count(),
+            "hit_rate": grouped["winner_correct"].mean(),
+            "ats_games": grouped["ats_correct"].count(),
+            "ats_rate": grouped["ats_correct"].mean(),
+            "over_under_games": grouped["over_under_correct"].count(),
+            "over_under_rate": grouped["over_under_correct"].mean(),
+        }
+    )
+
+
+def main():
+    # Only the command line needs tabulate (regression.py imports this module too)
+    from tabulate import tabulate
+
+    results = backtest()
+    for by in ("season", "conference", "week"):
+        print(f"\nAccuracy by {by}:")
+        print(tabulate(summarize(results, by), headers="keys", floatfmt=".3f"))
+
+    print(
+        f"\nOverall: {results['winner_correct'].mean():.3f} hit rate, "
+        f"{results['ats_correct'].mean():.3f} against the spread, "
+        f"{results['over_under_correct'].mean():.3f} over/under ({len(results)} games)"
+    )
+
+
+if __name__ == "__main__":
+    main()
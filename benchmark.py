@@ -0,0 +1,407 @@
+# Benchmarks of the prediction hot paths, run against recorded API responses so that runs are repeatable and offline
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+from api_cache import get_cache_key
+from api_stub import FIXTURES_PATH, load_fixtures, record_fixtures, stub_client
+from cfb_api import set_client
+from team_aliases import refresh_name_table
+import data
+import main
+
+# The week the benchmarks predict (the accuracy backtests replay every week before it)
+BENCHMARK_SEASON = main.SEASON
+BENCHMARK_WEEK = 8
+
+# The games of the benchmarks
+HOME_TEAM = "Alabama"
+AWAY_TEAM = "Georgia"
+
+# The end-to-end benchmarks (they call the API stub) get a tenth of the rounds of the others
+SLOW_BENCHMARKS = ("predict_this_weeks_games", "check_prior_accuracy")
+
+# The benchmark results of every commit are stored here
+RESULTS_DIRECTORY = "CFBdata/benchmarks"
+
+
+def get_fixture_endpoints(season=BENCHMARK_SEASON, week=BENCHMARK_WEEK):
+    """
+    List every API endpoint the benchmarks call.
+
+    :param season: The season of the benchmarks.
+    :param week: The week of the benchmarks.
+    :return: endpoints (list) - the endpoints
+    """
+    endpoints = ["teams/fbs", f"games?year={season}&week={week}&division=fbs"]
+    for prior_week in range(1, week):
+        endpoints.append(f"games?year={season}&week={prior_week}&conference=SEC")
+        endpoints.append(f"lines?year={season}&week={prior_week}&conference=SEC")
+    return endpoints
+
+
+def build_synthetic_fixtures(season=BENCHMARK_SEASON, week=BENCHMARK_WEEK, seed=0):
+    """
+    Make up API responses for every endpoint the benchmarks call (see get_fixture_endpoints), so that the benchmarks run
+    on a clean checkout without recording the real API first. The teams are the teams of cfb.csv and the games, scores
+    and lines are random (but the same for the same seed), so only the timings are meaningful, not the accuracies.
+
+    :param season: The season of the benchmarks.
+    :param week: The week of the benchmarks.
+    :param seed: The seed of the random games.
+    :return: fixtures (dict) - see api_stub.load_fixtures
+    """
+    generator = random.Random(seed)
+    teams = sorted(data.get_team_names())
+    sec_teams = [team for team in teams if data.get_team_conference(team) == "SEC"]
+    fixtures = {
+        "teams/fbs": [
+            {"school": team, "conference": data.get_team_conference(team)}
+            for team in teams
+        ]
+    }
+    game_id = 0
+
+    def make_game(home_team, away_team, week, completed):
+        nonlocal game_id
+        game_id += 1
+        return {
+            "id": game_id,
+            "season": season,
+            "week": week,
+            "completed": completed,
+            "home_team": home_team,
+            "away_team": away_team,
+            "home_conference": data.get_team_conference(home_team),
+            "away_conference": data.get_team_conference(away_team),
+            "home_points": generator.randint(3, 49) if completed else None,
+            "away_points": generator.randint(3, 49) if completed else None,
+        }
+
+    # The week being predicted: every FBS team plays once
+    shuffled = generator.sample(teams, len(teams))
+    fixtures[get_cache_key(f"games?year={season}&week={week}&division=fbs")] = [
+        make_game(home_team, away_team, week, False)
+        for home_team, away_team in zip(shuffled[::2], shuffled[1::2])
+    ]
+
+    # The weeks before it: every SEC team plays once, against another SEC team when one is left, and every game has a line
+    for prior_week in range(1, week):
+        shuffled = generator.sample(sec_teams, len(sec_teams))
+        games = [
+            make_game(home_team, away_team, prior_week, True)
+            for home_team, away_team in zip(shuffled[::2], shuffled[1::2])
+        ]
+        if len(shuffled) % 2:
+            opponent = generator.choice([team for team in teams if team not in sec_teams])
+            games.append(make_game(shuffled[-1], opponent, prior_week, True))
+        fixtures[get_cache_key(f"games?year={season}&week={prior_week}&conference=SEC")] = games
+        fixtures[get_cache_key(f"lines?year={season}&week={prior_week}&conference=SEC")] = [
+            {
+                "id": game["id"],
+                "homeTeam": game["home_team"],
+                "awayTeam": game["away_team"],
+                "lines": [
+                    {
+                        "provider": "synthetic",
+                        "spread": generator.randint(-21, 21) + 0.5,
+                        "overUnder": generator.randint(38, 68) + 0.5,
+                    }
+                ],
+            }
+            for game in games
+        ]
+
+    return fixtures
+
+
+def check_prior_accuracy():
+    """
+    Run both accuracy backtests of main.py over every week before BENCHMARK_WEEK.
+
+    :return: over_under_accuracy (float), winner_accuracy (float)
+    """
+    over_under_lines = [
+        main.get_anyWeek_SEC_overUnder_lines(week)
+        for week in range(1, BENCHMARK_WEEK)
+    ]
+    return (
+        main.check_prior_SEC_overUnder_accuracy(over_under_lines),
+        main.check_prior_SEC_winner_accuracy(),
+    )
+
+
+# The benchmarks: name -> function to time
+BENCHMARKS = {
+    "getAverages": lambda: data.getAverages(HOME_TEAM),
+    "getTopStats": lambda: data.getTopStats(data.getAverages(HOME_TEAM)),
+    "predict_winner_all_stats": lambda: data.predict_winner_all_stats(
+        HOME_TEAM, AWAY_TEAM, HOME_TEAM, AWAY_TEAM
+    ),
+    "predict_points": lambda: data.predict_points(HOME_TEAM, AWAY_TEAM),
+    "spread": lambda: data.spread(HOME_TEAM, AWAY_TEAM),
+    "predict_this_weeks_games": lambda: main.predict_this_weeks_games(BENCHMARK_WEEK),
+    "check_prior_accuracy": check_prior_accuracy,
+}
+
+
+def time_benchmark(function, rounds, warmup=1):
+    """
+    Time a function.
+
+    :param function: The function to time.
+    :param rounds: The number of timed calls.
+    :param warmup: The number of calls before the timed ones (to fill caches).
+    :return: timings (dict) - min, median and mean (in seconds) and the number of rounds
+    """
+    for _ in range(warmup):
+        function()
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.mean(timings),
+        "rounds": rounds,
+    }
+
+
+def measure_allocations(function, rounds, warmup=1):
+    """
+    Measure the memory a function allocates while it runs (the churn the garbage collector has to clean up).
+
+    :param function: The function to measure.
+    :param rounds: The number of measured calls.
+    :param warmup: The number of calls before the measured ones (to fill caches).
+    :return: allocations (dict) - peak_bytes (the median of the most memory each call had allocated at once),
+    retained_bytes (the memory each call left allocated, on average) and the number of rounds
+    """
+    for _ in range(warmup):
+        function()
+    peaks = []
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        for _ in range(rounds):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            function()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+        end, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "peak_bytes": statistics.median(peaks),
+        "retained_bytes": (end - start) / rounds,
+        "rounds": rounds,
+    }
+
+
+def get_resident_memory():
+    """
+    Get the resident memory of this process.
+
+    :return: memory (dict) - current_bytes (None where /proc is not available) and peak_bytes
+    """
+    try:
+        with open("/proc/self/statm") as file:
+            current = int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        current = None
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if platform.system() != "Darwin":
+        peak *= 1024
+    return {"current_bytes": current, "peak_bytes": peak}
+
+
+def get_index_size(summary=None):
+    """
+    Get the size of the arrays of the team summary (see data.build_summary).
+
+    :param summary: The summary (defaults to the summary of all the data).
+    :return: size (dict) - the size in bytes of each array of the summary (and of its features), and their total
+    """
+    if summary is None:
+        summary = data.team_summary
+    arrays = {
+        name: value for name, value in summary.items() if hasattr(value, "nbytes")
+    }
+    arrays.update(
+        {
+            "features." + name: value
+            for name, value in summary["features"].items()
+            if hasattr(value, "nbytes")
+        }
+    )
+    size = {name: array.nbytes for name, array in arrays.items()}
+    size["total"] = sum(size.values())
+    return size
+
+
+def get_commit():
+    """
+    Get the commit the benchmarks run on.
+
+    :return: commit (str) - the commit hash (with "-dirty" if there are uncommitted changes), or "unknown"
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return commit + "-dirty" if dirty else commit
+
+
+def load_previous_results(commit, directory=RESULTS_DIRECTORY):
+    """
+    Load the most recent stored results of another commit.
+
+    :param commit: The current commit (its own results are skipped).
+    :param directory: The directory the results are stored in.
+    :return: results (dict) - see run_benchmarks, or None if there are none
+    """
+    if not os.path.isdir(directory):
+        return None
+    paths = [
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.endswith(".json") and name != f"{commit}.json"
+    ]
+    if not paths:
+        return None
+    with open(max(paths, key=os.path.getmtime)) as file:
+        return json.load(file)
+
+
+def run_benchmarks(names=None, rounds=20, fixtures_path=FIXTURES_PATH):
+    """
+    Run the benchmarks against a local stub of the API.
+
+    :param names: The benchmarks to run (defaults to all of them).
+    :param rounds: The number of timed calls of each benchmark.
+    :param fixtures_path: The recorded API responses (if there are none, made up ones are used, see
+    build_synthetic_fixtures).
+    :return: results (dict) - commit, python, time, fixtures ("recorded" or "synthetic"), the timings and allocations of every benchmark (see time_benchmark
+    and measure_allocations), the size of the team index (see get_index_size) and the resident memory before and after
+    the benchmarks (see get_resident_memory)
+    """
+    if os.path.exists(fixtures_path):
+        fixtures = "recorded"
+        server, client = stub_client(load_fixtures(fixtures_path))
+    else:
+        fixtures = "synthetic"
+        server, client = stub_client(build_synthetic_fixtures())
+    set_client(client)
+    refresh_name_table()
+    # The accuracy backtests read the current week, which is normally set by main.main()
+    main.current_week = BENCHMARK_WEEK
+
+    resident_before = get_resident_memory()
+    try:
+        timings = {}
+        allocations = {}
+        for name in names or BENCHMARKS:
+            benchmark_rounds = max(1, rounds // 10) if name in SLOW_BENCHMARKS else rounds
+            timings[name] = time_benchmark(BENCHMARKS[name], benchmark_rounds)
+            # Tracing slows every allocation down, so the allocations are measured separately from the timings
+            allocations[name] = measure_allocations(BENCHMARKS[name], benchmark_rounds)
+    finally:
+        server.shutdown()
+        client.close()
+
+    return {
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "time": time.time(),
+        "fixtures": fixtures,
+        "timings": timings,
+        "allocations": allocations,
+        "index_bytes": get_index_size(),
+        "resident": {"before": resident_before, "after": get_resident_memory()},
+    }
+
+
+def save_results(results, directory=RESULTS_DIRECTORY):
+    """
+    Store the results of a run under its commit.
+
+    :param results: The results (see run_benchmarks).
+    :param directory: The directory to store them in.
+    :return: None
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{results['commit']}.json")
+    with open(path + ".tmp", "w") as file:
+        json.dump(results, file, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark the prediction hot paths offline.")
+    parser.add_argument("--record", action="store_true", help="record the API responses first (needs the real API)")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("benchmarks", nargs="*", help=f"benchmarks to run (of {', '.join(BENCHMARKS)})")
+    args = parser.parse_args()
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark: {name}")
+
+    if args.record:
+        record_fixtures(get_fixture_endpoints())
+
+    results = run_benchmarks(args.benchmarks or None, args.rounds)
+    previous = load_previous_results(results["commit"])
+    save_results(results)
+
+    print(f"Commit {results['commit']} ({results['fixtures']} API responses)")
+    for name, timing in results["timings"].items():
+        line = f"{name:<28} median {timing['median'] * 1000:10.3f} ms   min {timing['min'] * 1000:10.3f} ms"
+        if previous and name in previous["timings"]:
+            change = timing["median"] / previous["timings"][name]["median"] - 1
+            line += f"   {change:+.1%} vs {previous['commit'][:10]}"
+        print(line)
+
+    print()
+    for name, allocation in results["allocations"].items():
+        line = f"{name:<28} peak {allocation['peak_bytes'] / 1024:10.1f} KiB   retained {allocation['retained_bytes'] / 1024:8.1f} KiB"
+        if previous and name in previous.get("allocations", {}):
+            before = previous["allocations"][name]["peak_bytes"]
+            line += f"   was {before / 1024:.1f} KiB"
+        print(line)
+
+    print()
+    line = f"{'team index':<28} {results['index_bytes']['total'] / 1024:10.1f} KiB"
+    if previous and "index_bytes" in previous:
+        line += f"   was {previous['index_bytes']['total'] / 1024:.1f} KiB"
+    print(line)
+    for moment in ("before", "after"):
+        resident = results["resident"][moment]
+        current = resident["current_bytes"]
+        line = f"{'resident ' + moment:<28} {current / 2**20 if current else float('nan'):10.1f} MiB"
+        line += f"   peak {resident['peak_bytes'] / 2**20:.1f} MiB"
+        if previous and "resident" in previous:
+            line += f"   was {previous['resident'][moment]['peak_bytes'] / 2**20:.1f} MiB"
+        print(line)
+
+
+if __name__ == "__main__":
+    main_cli()
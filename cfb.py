@@ -0,0 +1,274 @@
+# Command line interface for batch work that runs fully offline from CFBdata/cfb.csv (no API calls, no web app):
+#   python cfb.py predict --input matchups.csv --output predictions.parquet
+#   python cfb.py backtest
+#   python cfb.py matrix
+import argparse
+import os
+import sys
+
+import requests
+
+from models import DEFAULT_MODELS, MODELS
+
+# The file formats, by file extension ("-" reads from stdin or writes to stdout, as CSV unless --format says otherwise)
+FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+}
+
+
+def get_format(path, format=None):
+    """
+    Work out the format of a file.
+
+    :param path: The path of the file ("-" for stdin or stdout).
+    :param format: The format asked for, if any ("csv", "parquet" or "jsonl").
+    :return: format (str) - the format of the file
+    """
+    if format is not None:
+        return format
+    if path == "-":
+        return "csv"
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(
+            f"Cannot tell the format of {path} (use one of {', '.join(FORMATS)} or --format)"
+        )
+    return FORMATS[extension]
+
+
+def read_table(path, format=None):
+    """
+    Read a table from a CSV, Parquet or JSONL file.
+
+    :param path: The path of the file ("-" for stdin).
+    :param format: The format of the file (see get_format).
+    :return: df (pd.DataFrame) - the table
+    """
+    import pandas as pd
+
+    format = get_format(path, format)
+    source = sys.stdin if path == "-" else path
+    if format == "csv":
+        return pd.read_csv(source)
+    if format == "jsonl":
+        return pd.read_json(source, lines=True)
+    if path == "-":
+        raise ValueError("Parquet cannot be read from stdin")
+    return pd.read_parquet(source)
+
+
+def write_table(df, path, format=None):
+    """
+    Write a table to a CSV, Parquet or JSONL file.
+
+    :param df: The table.
+    :param path: The path of the file ("-" for stdout).
+    :param format: The format of the file (see get_format).
+    :return: None
+    """
+    format = get_format(path, format)
+    if format == "parquet":
+        if path == "-":
+            raise ValueError("Parquet cannot be written to stdout")
+        df.to_parquet(path, index=False)
+        return
+
+    # Write to a temporary file first so that a cron job never leaves a half written file behind
+    target = sys.stdout if path == "-" else path + ".tmp"
+    if format == "csv":
+        df.to_csv(target, index=False)
+    else:
+        df.to_json(target, orient="records", lines=True)
+    if path != "-":
+        os.replace(target, path)
+
+
+def normalize_team_names(names):
+    """
+    Convert team names to the names used in cfb.csv, with the alias rules alone (see team_aliases.filter_name), so that
+    the API's spelling of a name works as well as the dataset's.
+
+    :param names: The team names.
+    :return: names (list) - the converted names (names that are already in the dataset are kept as they are)
+    """
+    from data import is_known_team
+    from team_aliases import filter_name, load_aliases
+
+    rules = load_aliases()
+    converted = {}
+    for name in set(names):
+        converted[name] = name if is_known_team(name) else filter_name(name, rules)[1]
+    return [converted[name] for name in names]
+
+
+def predict_table(matchups, home_field=True, models=None):
+    """
+    Predict every matchup of a table in one vectorized pass.
+
+    :param matchups: The matchups (pd.DataFrame with home_team and away_team columns; other columns are kept).
+    :param home_field: Whether the home team is playing at home (False for neutral site games).
+    :param models: The model to use for each kind of prediction (see models.predict_matchups).
+    :return: predictions (pd.DataFrame) - the matchups with valid (whether both teams are in the dataset), winner,
+    winner_points, loser_points, total_score and spread columns (empty for matchups that are not valid)
+    """
+    from models import predict_matchups
+
+    missing = [column for column in ("home_team", "away_team") if column not in matchups]
+    if missing:
+        raise ValueError(f"The matchups have no {' or '.join(missing)} column")
+
+    home_teams = normalize_team_names(matchups["home_team"].astype(str).tolist())
+    away_teams = normalize_team_names(matchups["away_team"].astype(str).tolist())
+    predictions = predict_matchups(home_teams, away_teams, home_field, models)
+
+    results = matchups.copy()
+    results["valid"] = predictions["valid"]
+    if "winners" in predictions:
+        results["winner"] = predictions["winners"]
+        results["winner_points"] = predictions["winner_points"]
+        results["loser_points"] = predictions["loser_points"]
+    if "totals" in predictions:
+        results["total_score"] = predictions["totals"]
+    if "spreads" in predictions:
+        results["spread"] = predictions["spreads"]
+    return results
+
+
+def predict_command(args):
+    models = {
+        kind: getattr(args, f"{kind}_model")
+        for kind in DEFAULT_MODELS
+        if getattr(args, f"{kind}_model") is not None
+    }
+    matchups = read_table(args.input, args.input_format)
+    results = predict_table(matchups, not args.neutral, models)
+    write_table(results, args.output, args.format)
+
+    invalid = int((~results["valid"]).sum())
+    print(
+        f"Predicted {len(results) - invalid} of {len(results)} matchups"
+        + (f" ({invalid} with a team that is not in the dataset)" if invalid else ""),
+        file=sys.stderr,
+    )
+
+
+def backtest_command(args):
+    from tabulate import tabulate
+
+    from backtest import backtest, get_archived_seasons, summarize
+
+    # Only the archived seasons can be backtested offline
+    seasons = args.seasons
+    if not args.fetch:
+        archived = get_archived_seasons()
+        if seasons is None:
+            seasons = archived
+        missing = sorted(set(seasons) - set(archived))
+        if missing:
+            raise ValueError(
+                f"No archived games for {', '.join(map(str, missing))} (use --fetch to get them from the API once)"
+            )
+        if not seasons:
+            raise ValueError("No archived games to backtest (use --fetch to get them from the API once)")
+
+    results = backtest(seasons)
+    if args.output:
+        write_table(results, args.output, args.format)
+
+    print(tabulate(summarize(results, args.by), headers="keys", floatfmt=".3f"))
+    print(
+        f"\nOverall: {results['winner_correct'].mean():.3f} hit rate, "
+        f"{results['ats_correct'].mean():.3f} against the spread, "
+        f"{results['over_under_correct'].mean():.3f} over/under ({len(results)} games)"
+    )
+
+
+def matrix_command(args):
+    import numpy as np
+    import pandas as pd
+
+    from matchup_matrix import MATRIX_DIRECTORY, build_matchup_matrix, save_matchup_matrix
+
+    matrix = build_matchup_matrix()
+    save_matchup_matrix(matrix)
+    n = len(matrix["teams"])
+    print(f"Saved {n} x {n} matchups to {MATRIX_DIRECTORY}", file=sys.stderr)
+
+    if args.output:
+        # One row per (home, away) pair
+        teams = np.array(matrix["teams"], dtype=object)
+        write_table(
+            pd.DataFrame(
+                {
+                    "home_team": np.repeat(teams, n),
+                    "away_team": np.tile(teams, n),
+                    "home_points": matrix["home_points"].ravel(),
+                    "away_points": matrix["away_points"].ravel(),
+                    "total_score": matrix["totals"].ravel(),
+                    "spread": matrix["spreads"].ravel(),
+                }
+            ),
+            args.output,
+            args.format,
+        )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="cfb", description="Offline batch predictions from CFBdata/cfb.csv."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    format_choices = sorted(set(FORMATS.values()))
+
+    predict = commands.add_parser("predict", help="predict every matchup of a file")
+    predict.add_argument("--input", required=True, help="CSV, Parquet or JSONL file with home_team and away_team columns")
+    predict.add_argument("--input-format", choices=format_choices, default=None)
+    predict.add_argument("--output", default="-", help="CSV, Parquet or JSONL file to write (default: stdout)")
+    predict.add_argument("--format", choices=format_choices, default=None, help="format of the output")
+    predict.add_argument("--neutral", action="store_true", help="play every game at a neutral site")
+    for kind, default in DEFAULT_MODELS.items():
+        predict.add_argument(
+            f"--{kind}-model",
+            # Only the models that can be fitted without the API (the regression models cannot, see models.py)
+            choices=sorted(
+                name for name, model in MODELS.items() if model.kind == kind and model.offline
+            ),
+            default=None,
+            help=f"default: {default}",
+        )
+    predict.set_defaults(run=predict_command)
+
+    backtest = commands.add_parser("backtest", help="replay the archived seasons (see backtest.py)")
+    backtest.add_argument("--seasons", type=int, nargs="*", default=None)
+    backtest.add_argument("--by", choices=("season", "conference", "week"), default="season")
+    backtest.add_argument("--fetch", action="store_true", help="get the seasons that are not archived from the API")
+    backtest.add_argument("--output", default=None, help="also write the prediction of every game to this file")
+    backtest.add_argument("--format", choices=format_choices, default=None)
+    backtest.set_defaults(run=backtest_command)
+
+    matrix = commands.add_parser("matrix", help="rebuild the matchup matrix (see matchup_matrix.py)")
+    matrix.add_argument("--output", default=None, help="also write every matchup to this file")
+    matrix.add_argument("--format", choices=format_choices, default=None)
+    matrix.set_defaults(run=matrix_command)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        args.run(args)
+    except (ValueError, ImportError) as error:
+        # e.g. an unknown file format, a missing column or no Parquet engine installed
+        parser.exit(1, f"cfb: error: {error}\n")
+    except requests.RequestException as error:
+        # Only backtest --fetch talks to the API
+        parser.exit(1, f"cfb: error: could not get the games from the API ({error})\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+# Client for the College Football Data API
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from api_cache import ResponseCache, get_cache_key, get_ttl
+
+# Base URL for the API (can be pointed at a local stand-in server, e.g. for testing)
+DEFAULT_BASE_URL = "https://api.collegefootballdata.com/"
+
+# Responses with these status codes are worth trying again
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+@functools.lru_cache(maxsize=None)
+def load_environment():
+    """
+    Load the environment variables from the .env file (only once, the first time a client needs them).
+
+    :return: None
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+class CFBClient:
+    """
+    A client for the College Football Data API that reuses its connections, times out stuck requests and retries
+    requests that fail because of rate limiting or server errors.
+    """
+
+    def __init__(
+        self,
+        base_url=None,
+        api_key=None,
+        timeout=10,
+        max_retries=3,
+        backoff=0.5,
+        max_backoff=30,
+        pool_size=10,
+        cache=None,
+    ):
+        """
+        :param base_url: The base URL of the API (defaults to the CFB_API_BASE_URL environment variable, then the real API).
+        :param api_key: The API key (defaults to the API_KEY environment variable).
+        :param timeout: The number of seconds to wait for a response before giving up on an attempt.
+        :param max_retries: The number of times to try a request again after the first attempt fails.
+        :param backoff: The number of seconds to wait before the first retry (doubled for every retry after that).
+        :param max_backoff: The most seconds to wait before a retry, even if the API asks for longer (Retry-After).
+        :param pool_size: The number of connections to keep open.
+        :param cache: The ResponseCache to answer repeated requests from (None to always ask the API).
+        """
+        if base_url is None or api_key is None:
+            load_environment()
+        if base_url is None:
+            base_url = os.getenv("CFB_API_BASE_URL", DEFAULT_BASE_URL)
+        if api_key is None:
+            api_key = os.getenv("API_KEY", "")
+        self.base_url = base_url if base_url.endswith("/") else base_url + "/"
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.cache = cache
+
+        # A single session keeps the connections to the API alive between requests
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # Please note that API keys should be supplied with "Bearer " prepended (e.g. "Bearer your_key")
+        self.session.headers["Authorization"] = "Bearer " + api_key
+
+        # Counters (guarded by a lock, since the client can be shared between threads)
+        self._lock = threading.Lock()
+        self.request_count = 0
+        self.retry_count = 0
+        self.error_count = 0
+        self.total_latency = 0.0
+        self.cache_hits = 0
+        self.revalidations = 0
+
+    def get(self, endpoint, params=None):
+        """
+        Get an endpoint of the API.
+
+        :param endpoint: The endpoint, relative to the base URL (e.g. "teams/fbs" or "calendar?year=2024").
+        :param params: Extra query parameters.
+        :return: The decoded JSON response.
+        """
+        with metrics.timed("fetch"):
+            return self._get(endpoint, params)
+
+    def _get(self, endpoint, params=None):
+        """
+        Get an endpoint of the API, from the cache when possible (see get).
+        """
+        if self.cache is None:
+            return self._request(endpoint, params).json()
+
+        # Answer from the cache while the response is fresh
+        key = get_cache_key(endpoint, params)
+        entry = self.cache.lookup(key)
+        if entry is not None and entry["fresh"]:
+            with self._lock:
+                self.cache_hits += 1
+            metrics.increment("cfb_api_cache_hits_total")
+            return entry["body"]
+
+        # Otherwise ask the API, but let it answer "not modified" if our copy is still good
+        headers = {}
+        if entry is not None and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry is not None and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        response = self._request(endpoint, params, headers)
+        if response.status_code == 304 and entry is not None:
+            self.cache.touch(key)
+            with self._lock:
+                self.revalidations += 1
+            metrics.increment("cfb_api_revalidations_total")
+            return entry["body"]
+
+        body = response.json()
+        ttl = get_ttl(endpoint, body)
+        if ttl != 0:
+            self.cache.store(
+                key,
+                body,
+                ttl,
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+            )
+        return body
+
+    def _request(self, endpoint, params=None, headers=None):
+        """
+        Send a request to the API, trying again if it fails because of rate limiting, server errors or network errors.
+
+        :param endpoint: The endpoint, relative to the base URL.
+        :param params: Extra query parameters.
+        :param headers: Extra headers.
+        :return: response (requests.Response) - the successful (or not modified) response
+        """
+        url = self.base_url + endpoint
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = self.session.get(
+                    url, params=params, headers=headers, timeout=self.timeout
+                )
+                error = None
+            except (requests.ConnectionError, requests.Timeout) as exception:
+                response = None
+                error = exception
+            self._count(time.perf_counter() - start)
+
+            retry = error is not None or response.status_code in RETRY_STATUSES
+            if not retry or attempt >= self.max_retries:
+                break
+
+            # Wait before trying again (the API tells us how long when it is rate limiting, but a request never waits
+            # longer than max_backoff, so that a long Retry-After cannot hold up a page or the scheduler)
+            delay = self.backoff * 2**attempt
+            if response is not None and response.headers.get("Retry-After", "").isdigit():
+                delay = int(response.headers["Retry-After"])
+            delay = min(delay, self.max_backoff)
+            with self._lock:
+                self.retry_count += 1
+            metrics.increment("cfb_api_retries_total")
+            time.sleep(delay)
+            attempt += 1
+
+        if error is not None or not response.ok:
+            with self._lock:
+                self.error_count += 1
+            metrics.increment("cfb_api_errors_total")
+            if error is not None:
+                raise error
+            response.raise_for_status()
+
+        return response
+
+    def _count(self, latency):
+        """
+        Record one request.
+
+        :param latency: The number of seconds the request took.
+        :return: None
+        """
+        with self._lock:
+            self.request_count += 1
+            self.total_latency += latency
+        metrics.observe("cfb_api_request_seconds", latency)
+
+    def stats(self):
+        """
+        Get the request counters of the client.
+
+        :return: A dictionary with the number of requests (including retries), retries, failed calls, calls answered
+        from the cache, calls answered after the API confirmed the cached copy, and the total and average latency in
+        seconds.
+        """
+        with self._lock:
+            return {
+                "requests": self.request_count,
+                "retries": self.retry_count,
+                "errors": self.error_count,
+                "cache_hits": self.cache_hits,
+                "revalidations": self.revalidations,
+                "total_latency": self.total_latency,
+                "average_latency": self.total_latency / self.request_count
+                if self.request_count
+                else 0.0,
+            }
+
+    def close(self):
+        """
+        Close the connections of the client.
+
+        :return: None
+        """
+        self.session.close()
+
+
+# The client shared by every API function (created on first use, after the environment variables are loaded)
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Get the shared API client.
+
+    :return: client (CFBClient) - the shared client
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = CFBClient(cache=ResponseCache())
+        return _client
+
+
+def set_client(client):
+    """
+    Replace the shared API client (e.g. with one that points at a local stand-in server).
+
+    :param client: The new client.
+    :return: None
+    """
+    global _client
+    with _client_lock:
+        _client = client
+
+
+def fetch_all(endpoints, max_workers=8, client=None):
+    """
+    Get several endpoints of the API at the same time. Each distinct endpoint is only requested once.
+
+    :param endpoints: The endpoints to get.
+    :param max_workers: The maximum number of requests that run at the same time.
+    :param client: The client to use (defaults to the shared client).
+    :return: responses (dict) - a dictionary that links each endpoint to its decoded JSON response
+    """
+    if client is None:
+        client = get_client()
+    unique_endpoints = list(dict.fromkeys(endpoints))
+    if not unique_endpoints:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(unique_endpoints))) as executor:
+        responses = executor.map(client.get, unique_endpoints)
+        return dict(zip(unique_endpoints, responses))
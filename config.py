@@ -0,0 +1,63 @@
+# Settings of the predictions, kept apart from the code that uses them so that importing them is cheap
+
+# The season that is being predicted
+SEASON = 2024
+
+# The number of API requests that are allowed to run at the same time
+MAX_CONCURRENT_REQUESTS = 8
+
+Home_Field_Advantage = 1.05
+Away_Field_Disadvantage = 0.95
+
+CONFERENCE_MULTIPLIERS = {
+    "SEC": 1.0,
+    "Big Ten": 0.95,
+    "Big 12": 0.9,
+    "ACC": 0.85,
+    "Pac-12": 0.8,
+    "American Athletic": 0.75,
+    "Mountain West": 0.7,
+    "Sun Belt": 0.65,
+    "Mid-American": 0.6,
+    "Conference USA": 0.55,
+    "FBS Independents": 0.8,
+}
+# CONFERENCE_MULTIPLIERS = {
+#     "SEC": 1.05,  # Slightly increase SEC multiplier due to historical dominance
+#     "Big Ten": 0.98,  # Adjust Big Ten multiplier based on recent performance
+#     "Big 12": 0.88,  # Decrease Big 12 multiplier slightly to account for potential parity
+#     "ACC": 0.83,  # Maintain ACC multiplier
+#     "Pac-12": 0.78,  # Decrease Pac-12 multiplier due to recent challenges
+#     "American Athletic": 0.73,  # Maintain American Athletic multiplier
+#     "Mountain West": 0.68,  # Decrease Mountain West multiplier slightly
+#     "Sun Belt": 0.63,  # Maintain Sun Belt multiplier
+#     "Mid-American": 0.58,  # Maintain Mid-American multiplier
+#     "Conference USA": 0.53,  # Maintain Conference USA multiplier
+#     "FBS Independents": 0.82,  # Adjust FBS Independents multiplier slightly
+# }
+# CONFERENCE_MULTIPLIERS = {
+#     "SEC": 1.1,  # Increase SEC multiplier further
+#     "Big Ten": 0.97,  # Slight adjustment to Big Ten
+#     "Big 12": 0.85,  # Decrease Big 12 further
+#     "ACC": 0.8,  # Decrease ACC slightly
+#     "Pac-12": 0.75,  # Decrease Pac-12 further
+#     "American Athletic": 0.72,  # Slight decrease to American Athletic
+#     "Mountain West": 0.67,  # Decrease Mountain West further
+#     "Sun Belt": 0.6,  # Decrease Sun Belt slightly
+#     "Mid-American": 0.55,  # Decrease Mid-American slightly
+#     "Conference USA": 0.5,  # Decrease Conference USA further
+#     "FBS Independents": 0.85,  # Increase FBS Independents slightly
+# }
+# CONFERENCE_MULTIPLIERS = {
+#     "SEC": 1.15,  # Further increase SEC multiplier
+#     "Big Ten": 0.95,  # Increase Big Ten slightly
+#     "Big 12": 0.82,  # Decrease Big 12 further
+#     "ACC": 0.78,  # Decrease ACC further
+#     "Pac-12": 0.72,  # Decrease Pac-12 further
+#     "American Athletic": 0.7,  # Maintain American Athletic
+#     "Mountain West": 0.65,  # Decrease Mountain West further
+#     "Sun Belt": 0.58,  # Decrease Sun Belt further
+#     "Mid-American": 0.53,  # Decrease Mid-American further
+#     "Conference USA": 0.48,  # Decrease Conference USA further
+#     "FBS Independents": 0.88,  # Increase FBS Independents slightly
+# }
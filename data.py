@@ -1,17 +1,534 @@
 # Begin by importing the necessary libraries and modules.
-import traceback
+# pandas and tabulate are only imported where they are needed, and the data is only loaded on first use (see
+# ensure_loaded), so that importing this module is cheap
+import sys
+import threading
 
-import pandas as pd
 import numpy as np
-from tabulate import tabulate
-import main
-
-# Load the main data (Stored in the CFBdata folder)
-data = pd.read_csv("CFBdata/cfb.csv")
+import config
+import data_cache
+import features as feature_store
 
 # Keep in mind that all column names are lowercase and snakecase
 
-years = ["2017", "2018", "2019", "2020", "2021", "2022", "2023"]
+# The precomputed matchup matrix (see matchup_matrix.py), only set while it matches the data
+matchup_matrix = None
+
+# The names that only exist once the data is loaded (the main data, stored in the CFBdata folder, and everything that
+# is derived from it, see index_data)
+LAZY_NAMES = frozenset(
+    {
+        "data",
+        "years",
+        "team_summary",
+        "team_stat_matrix",
+        "team_slices",
+        "team_ids",
+        "team_means",
+        "team_win_correlations",
+        "team_loss_correlations",
+        "team_conferences",
+        "team_season_conferences",
+    }
+)
+
+_loaded = False
+_load_lock = threading.Lock()
+
+
+# The statistics used by getAverages, mapped from their key in the returned dictionary to their column in cfb.csv
+AVERAGE_STATS = {
+    "win": "win",
+    "loss": "loss",
+    "off_yards_per_game": "off_yards_per_game",
+    "yards_per_game_allowed": "yards_per_game_allowed",
+    "rushing_yards_per_game": "rushing_yards_per_game",
+    "rush_yards_per_game_allowed": "rush_yards_per_game_allowed",
+    "pass_yards_per_game": "pass_yards_per_game",
+    "pass_yards_per_game_allowed": "pass_yards_per_game_allowed",
+    "avg_points_per_game_allowed": "avg_points_per_game_allowed",
+    "points_per_game": "points_per_game",
+    "fourth_percent": "4th_percent",
+    "opponent_fourth_percent": "opponent_4th_percent",
+    "third_percent": "3rd_percent",
+    "opponent_third_percent": "opponent_3rd_percent",
+    "avg_turnover_margin_per_game": "avg_turnover_margin_per_game",
+}
+
+# The row of each statistic in the team index
+STAT_ROWS = {key: i for i, key in enumerate(AVERAGE_STATS)}
+
+# Averages that are equal in the CSV can come out a few ulps apart depending on how they were summed (ndarray.mean in
+# the scalar predictions, the team summary in the vectorized ones), so averages this close (relative to their size) are
+# tied in every prediction
+TIE_TOLERANCE = 1e-9
+
+
+def is_greater(values1, values2):
+    """
+    Compare averages of a statistic, counting averages within TIE_TOLERANCE of each other as tied.
+
+    :param values1: The averages of the first teams (a number or an array).
+    :param values2: The averages of the second teams.
+    :return: greater (bool or np.ndarray) - whether each average of the first teams is greater than the one of the second
+    teams (False for ties and missing averages)
+    """
+    return values1 - values2 > TIE_TOLERANCE * np.maximum(np.abs(values1), np.abs(values2))
+
+
+def build_team_index(df):
+    """
+    Build an index of every team's season rows for the statistics used by getAverages.
+
+    The rows of each team are gathered into one contiguous block (in the same season order as the CSV), so a team's
+    statistics can be handed out as views of a single matrix instead of being copied out of the table row by row.
+
+    The statistics are stored as doubles, exactly as they are read from the CSV: values that are tied in the CSV must stay
+    tied, or the winner of a statistic (and so of a game) would depend on rounding.
+
+    :param df: The dataframe to index (as loaded by data_cache.load_data).
+    :return: stat_matrix (np.ndarray) - a read-only (statistic x season row) matrix of doubles, ordered like AVERAGE_STATS;
+    team_slices (dict) - a dictionary that links each team name to the slice of its columns in stat_matrix;
+    seasons (np.ndarray) - the season of each column of stat_matrix
+    """
+    team_names = df["team_name"].to_numpy()
+
+    # A stable sort keeps each team's seasons in the order they appear in the CSV
+    order = np.argsort(team_names, kind="stable")
+    team_names = team_names[order]
+
+    stat_matrix = np.empty((len(AVERAGE_STATS), len(order)), dtype=np.double)
+    for i, column in enumerate(AVERAGE_STATS.values()):
+        stat_matrix[i] = df[column].to_numpy(dtype=np.double)[order]
+    # Lookups hand out views of this matrix, so make sure nobody can modify it through them
+    stat_matrix.flags.writeable = False
+    seasons = df["season"].to_numpy(dtype=np.int16)[order]
+    seasons.flags.writeable = False
+
+    # Find where each team's block starts and how many seasons it covers
+    unique_names, starts, counts = np.unique(
+        team_names, return_index=True, return_counts=True
+    )
+    # Every lookup hashes the team name, so keep a single (interned) copy of each one
+    team_slices = {
+        sys.intern(name): slice(start, start + count)
+        for name, start, count in zip(unique_names, starts, counts)
+    }
+
+    return stat_matrix, team_slices, seasons
+
+
+def build_team_summary(stat_matrix, team_slices):
+    """
+    Summarize the team index into one row per team so that games can be scored in a vectorized pass.
+
+    :param stat_matrix: The (statistic x season row) matrix built by build_team_index.
+    :param team_slices: The dictionary that links each team name to its block of columns in stat_matrix.
+    :return: team_ids (dict) - a dictionary that links each team name to its row in the summary matrices;
+    team_means (np.ndarray) - a (team x statistic) matrix of the average of each statistic;
+    win_correlations (np.ndarray) - a (team x statistic) matrix of the correlation between wins and each statistic;
+    loss_correlations (np.ndarray) - a (team x statistic) matrix of the correlation between losses and each statistic
+    """
+    team_ids = {team: i for i, team in enumerate(team_slices)}
+    starts = np.array([rows.start for rows in team_slices.values()], dtype=np.intp)
+    counts = np.array([rows.stop - rows.start for rows in team_slices.values()])
+
+    # Missing values (e.g. the statistics of a season that is still being played) are left out of the averages
+    present = ~np.isnan(stat_matrix)
+    values = stat_matrix.astype(np.double)
+    values[~present] = 0.0
+
+    # The team blocks are contiguous and in order, so every team can be summed at once
+    with np.errstate(divide="ignore", invalid="ignore"):
+        team_means = np.add.reduceat(values, starts, axis=1) / np.add.reduceat(
+            present, starts, axis=1, dtype=np.double
+        )
+
+    # Correlate wins and losses with every statistic for every team at once (Pearson correlation, like np.corrcoef)
+    # Each pair of series only counts the seasons where both values are present, so that a season with a missing
+    # statistic does not add to the variance of wins alone
+    # A team with a single season (or a statistic that never changes) has no correlation and gets NaN
+    correlations = []
+    for key in ("win", "loss"):
+        row = STAT_ROWS[key]
+        both = present & present[row]
+        pairs = np.add.reduceat(both, starts, axis=1, dtype=np.double)
+        outcomes = np.where(both, values[row], 0.0)
+        stats = np.where(both, values, 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            outcome_means = np.add.reduceat(outcomes, starts, axis=1) / pairs
+            stat_means = np.add.reduceat(stats, starts, axis=1) / pairs
+        outcome_deviations = np.where(both, outcomes - np.repeat(outcome_means, counts, axis=1), 0.0)
+        stat_deviations = np.where(both, stats - np.repeat(stat_means, counts, axis=1), 0.0)
+        cross_products = np.add.reduceat(stat_deviations * outcome_deviations, starts, axis=1)
+        squares = np.add.reduceat(stat_deviations**2, starts, axis=1)
+        outcome_squares = np.add.reduceat(outcome_deviations**2, starts, axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            correlations.append(cross_products / np.sqrt(squares * outcome_squares))
+
+    return team_ids, team_means.T, correlations[0].T, correlations[1].T
+
+
+def build_summary(df):
+    """
+    Build everything the vectorized scoring functions need from a dataframe (e.g. from only the seasons before a season).
+
+    :param df: The dataframe (as loaded by data_cache.load_data, or some of its rows).
+    :return: summary (dict) - stat_matrix, team_slices and seasons (see build_team_index); team_names (list) - the name
+    of each team, by row of the summary matrices; team_rows (np.ndarray) - the summary row of each column of stat_matrix;
+    team_ids, team_means, win_correlations
+    and loss_correlations (see build_team_summary); conferences (dict) - a dictionary that links each team to its
+    conference (from the first season that has one); features (dict) - every numeric column, summarized per team in the
+    same row order (see features.build_feature_summary); correlation_cache and stats_cache (dict) - the lookups of
+    get_team_correlations and get_team_stats, which belong to this summary
+    """
+    stat_matrix, slices, seasons = build_team_index(df)
+    ids, means, win_correlations, loss_correlations = build_team_summary(
+        stat_matrix, slices
+    )
+    team_rows = np.repeat(
+        np.arange(len(slices), dtype=np.int32),
+        [rows.stop - rows.start for rows in slices.values()],
+    )
+    conferences = df.groupby("team_name", sort=False)["conference"].first().to_dict()
+
+    return {
+        "stat_matrix": stat_matrix,
+        "team_slices": slices,
+        "seasons": seasons,
+        "team_names": list(slices),
+        "team_rows": team_rows,
+        "team_ids": ids,
+        "team_means": means,
+        "win_correlations": win_correlations,
+        "loss_correlations": loss_correlations,
+        "conferences": conferences,
+        "features": feature_store.build_feature_summary(df),
+        "correlation_cache": {},
+        "stats_cache": {},
+    }
+
+
+def update_summary(summary, df, teams):
+    """
+    Build the summary of a dataframe in which only the seasons of some teams changed, reusing everything of the other
+    teams (their rows of the summary matrices and their cached lookups). No team may be added.
+
+    :param summary: The summary of the dataframe before the change (see build_summary).
+    :param df: The changed dataframe.
+    :param teams: The teams whose seasons changed.
+    :return: summary (dict) - the summary of the changed dataframe (see build_summary)
+    """
+    stat_matrix, slices, seasons = build_team_index(df)
+    if list(slices) != summary["team_names"]:
+        raise ValueError("The teams changed, so the whole summary has to be built again")
+
+    # Summarize only the changed teams, from their own block of the index
+    teams = sorted(set(teams))
+    columns = np.concatenate([np.arange(slices[team].start, slices[team].stop) for team in teams])
+    counts = [slices[team].stop - slices[team].start for team in teams]
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    _, means, win_correlations, loss_correlations = build_team_summary(
+        stat_matrix[:, columns],
+        {team: slice(offsets[i], offsets[i + 1]) for i, team in enumerate(teams)},
+    )
+
+    rows = [summary["team_ids"][team] for team in teams]
+    team_means = summary["team_means"].copy()
+    team_win_correlations = summary["win_correlations"].copy()
+    team_loss_correlations = summary["loss_correlations"].copy()
+    team_means[rows] = means
+    team_win_correlations[rows] = win_correlations
+    team_loss_correlations[rows] = loss_correlations
+
+    conferences = dict(summary["conferences"])
+    changed = df[df["team_name"].isin(teams)]
+    conferences.update(changed.groupby("team_name", sort=False)["conference"].first().to_dict())
+
+    # The cached lookups of the other teams are still right
+    def keep(cache):
+        return {team: value for team, value in cache.items() if team not in teams}
+
+    return {
+        "stat_matrix": stat_matrix,
+        "team_slices": slices,
+        "seasons": seasons,
+        "team_names": summary["team_names"],
+        "team_rows": np.repeat(
+            np.arange(len(slices), dtype=np.int32),
+            [rows.stop - rows.start for rows in slices.values()],
+        ),
+        "team_ids": summary["team_ids"],
+        "team_means": team_means,
+        "win_correlations": team_win_correlations,
+        "loss_correlations": team_loss_correlations,
+        "conferences": conferences,
+        # Every feature is averaged over all the teams where a team has none, so these are built again
+        "features": feature_store.build_feature_summary(df),
+        "correlation_cache": keep(summary["correlation_cache"]),
+        "stats_cache": keep(summary["stats_cache"]),
+    }
+
+
+def build_conference_index(df):
+    """
+    Build the exact conference index of every team and season.
+
+    :param df: The dataframe (as loaded by data_cache.load_data, or some of its rows).
+    :return: conferences (dict) - a dictionary that links each (team, season) to the team's conference in that season
+    """
+    return dict(
+        zip(zip(df["team_name"].tolist(), df["season"].tolist()), df["conference"])
+    )
+
+
+def index_data():
+    """
+    Build the team index, the team summary and the team conferences from the loaded data.
+    This has to be called again whenever the data changes (see reload_data and update_teams).
+
+    :return: None
+    """
+    global team_season_conferences, matchup_matrix, _loaded
+
+    # Build the team index once so that looking up a team does not require scanning the whole table
+    use_summary(build_summary(data))
+    team_season_conferences = build_conference_index(data)
+
+    # The matchup matrix belongs to the old data (the cached lookups belong to the old summary)
+    matchup_matrix = None
+    _loaded = True
+
+
+def use_summary(summary):
+    """
+    Make a summary of the loaded data the one every lookup and prediction uses.
+
+    :param summary: The summary (see build_summary).
+    :return: None
+    """
+    global team_summary, team_stat_matrix, team_slices, years
+    global team_ids, team_means, team_win_correlations, team_loss_correlations
+    global team_conferences
+
+    team_summary = summary
+    team_stat_matrix = team_summary["stat_matrix"]
+    team_slices = team_summary["team_slices"]
+    team_ids = team_summary["team_ids"]
+    team_means = team_summary["team_means"]
+    team_win_correlations = team_summary["win_correlations"]
+    team_loss_correlations = team_summary["loss_correlations"]
+    team_conferences = team_summary["conferences"]
+    # The seasons in the data (as strings)
+    years = [str(season) for season in np.unique(team_summary["seasons"])]
+
+
+def update_teams(rows):
+    """
+    Add season rows to the loaded data (a row for a team and season that is already in it replaces that row), and
+    rebuild only what belongs to the teams of the rows: their rows of the team summary, their cached lookups and their
+    conferences. If one of the teams is new, everything is built again (see index_data).
+
+    :param rows: The rows, typed like data_cache.load_data.
+    :return: teams (list) - the teams that were updated, or None if everything was built again
+    """
+    global data, team_season_conferences, matchup_matrix
+
+    import pandas as pd
+
+    ensure_loaded()
+    with _load_lock:
+        rows = rows.reindex(columns=data.columns).drop_duplicates("team", keep="last")
+        data = pd.concat([data[~data["team"].isin(rows["team"])], rows], ignore_index=True)
+
+        teams = sorted(set(rows["team_name"]))
+        if not all(team in team_ids for team in teams):
+            index_data()
+            return None
+
+        summary = update_summary(team_summary, data, teams)
+        conferences = dict(team_season_conferences)
+        conferences.update(build_conference_index(rows))
+
+        use_summary(summary)
+        team_season_conferences = conferences
+        # The games of these teams in the matchup matrix are out of date (see matchup_matrix.update_matchup_matrix)
+        matchup_matrix = None
+        return teams
+
+
+def reload_data():
+    """
+    Read cfb.csv again and rebuild everything that is derived from it.
+
+    :return: None
+    """
+    global data
+    # Read through the binary cache of cfb.csv (see data_cache.py)
+    data = data_cache.load_data()
+    index_data()
+
+
+def ensure_loaded():
+    """
+    Load the data and build everything that is derived from it, unless that was already done.
+
+    :return: None
+    """
+    if not _loaded:
+        with _load_lock:
+            if not _loaded:
+                reload_data()
+
+
+def __getattr__(name):
+    # Looking up data, team_summary, ... from another module loads the data the first time
+    if name in LAZY_NAMES:
+        ensure_loaded()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_data():
+    """
+    Get the main data (loaded on first use).
+
+    :return: df (pd.DataFrame) - the typed data (see data_cache.load_data)
+    """
+    ensure_loaded()
+    return data
+
+
+def get_team_summary(summary=None):
+    """
+    Get the summary to score games with.
+
+    :param summary: A summary (see build_summary), which is returned as it is.
+    :return: summary (dict) - the given summary, or the summary of all the data (loaded on first use)
+    """
+    if summary is None:
+        ensure_loaded()
+        summary = team_summary
+    return summary
+
+
+def get_team_correlations(team):
+    """
+    Get the correlation between wins and losses and each of the other statistics for a team.
+
+    :param team: The name of the team.
+    :return: win_correlations (dict) - a dictionary that links each statistic (except win and loss) to its correlation
+    with wins; loss_correlations (dict) - the same for losses. Both are NaN for a team that is not in the dataset.
+    """
+    # The correlations of every team were computed with the team summary, so this is just a lookup
+    summary = get_team_summary()
+    cached = summary["correlation_cache"].get(team)
+    if cached is not None:
+        return cached
+
+    i = summary["team_ids"].get(team)
+    win_correlations = {}
+    loss_correlations = {}
+    for j, key in enumerate(AVERAGE_STATS):
+        if key not in ("win", "loss"):
+            win_correlations[key] = (
+                summary["win_correlations"][i, j] if i is not None else np.nan
+            )
+            loss_correlations[key] = (
+                summary["loss_correlations"][i, j] if i is not None else np.nan
+            )
+
+    # Only teams in the dataset are cached (so that unknown names cannot grow the cache)
+    if i is not None:
+        summary["correlation_cache"][team] = win_correlations, loss_correlations
+    return win_correlations, loss_correlations
+
+
+def get_team_stats(team):
+    """
+    Get the season values of every statistic of getAverages for a team, as read-only views of the team index.
+
+    The views are made once per team, so repeated lookups (e.g. every request of the web app) allocate nothing new.
+
+    :param team: The name of the team.
+    :return: stats (tuple) - the season values of each statistic, ordered like AVERAGE_STATS (empty for a team that is
+    not in the dataset)
+    """
+    summary = get_team_summary()
+    cached = summary["stats_cache"].get(team)
+    if cached is not None:
+        return cached
+
+    rows = summary["team_slices"].get(team, slice(0, 0))
+    stats = tuple(summary["stat_matrix"][i, rows] for i in range(len(AVERAGE_STATS)))
+    if team in summary["team_slices"]:
+        summary["stats_cache"][team] = stats
+    return stats
+
+
+class TeamSeason:
+    """
+    A read-only view of one season of a team in the team index. Nothing is copied: each statistic is read from the
+    index when it is accessed (e.g. season.points_per_game).
+    """
+
+    __slots__ = ("_summary", "_column")
+
+    def __init__(self, summary, column):
+        """
+        :param summary: The summary of the team index (see build_summary).
+        :param column: The column of the season in the stat_matrix of the summary.
+        """
+        self._summary = summary
+        self._column = column
+
+    @property
+    def team(self):
+        return self._summary["team_names"][self._summary["team_rows"][self._column]]
+
+    @property
+    def season(self):
+        return int(self._summary["seasons"][self._column])
+
+    def __getattr__(self, key):
+        try:
+            row = STAT_ROWS[key]
+        except KeyError:
+            raise AttributeError(key) from None
+        return float(self._summary["stat_matrix"][row, self._column])
+
+    def __repr__(self):
+        return f"TeamSeason({self.team!r}, {self.season})"
+
+
+def get_team_seasons(team, summary=None):
+    """
+    Get every season of a team in the team index.
+
+    :param team: The name of the team.
+    :param summary: The summary to look the team up in (see build_summary; defaults to the summary of all the data).
+    :return: seasons (list) - a TeamSeason view of each season of the team, in the order of the CSV (empty for a team
+    that is not in the dataset)
+    """
+    summary = get_team_summary(summary)
+    rows = summary["team_slices"].get(team, slice(0, 0))
+    return [TeamSeason(summary, column) for column in range(rows.start, rows.stop)]
+
+
+def get_team_conference(team, season=None):
+    """
+    Get the conference of a team.
+
+    :param team: The exact name of the team (as in the team_name column).
+    :param season: The season (if not given or not in the dataset, the conference of the team's first season with one).
+    :return: The conference of the team, or None if the team is not in the dataset or has no conference.
+    """
+    ensure_loaded()
+    if season is not None:
+        conference = team_season_conferences.get((team, season))
+        if conference is not None:
+            return conference
+    return team_conferences.get(team)
 
 
 def get_team_names():
@@ -20,16 +537,20 @@ def get_team_names():
 
     :return: A list containing the names of all the teams in the dataset.
     """
-    # Get each team name from the cfb.csv file, ignoring the team years (remove last 5 characters)
-    # Do not include duplicates
-    # Store them in a list
-    cfb_team_names = []
-    for index, row in data.iterrows():
-        cfb_team_names.append(row["team"][:-5])
-    # Remove duplicates
-    cfb_team_names = list(set(cfb_team_names))
+    # Every team in the dataset has exactly one entry in the team index
+    ensure_loaded()
+    return list(team_slices)
+
+
+def is_known_team(team):
+    """
+    Check whether a team is in the dataset.
 
-    return cfb_team_names
+    :param team: The name of the team.
+    :return: True if the team is in the dataset.
+    """
+    ensure_loaded()
+    return team in team_slices
 
 
 def getAverages(team):
@@ -39,89 +560,10 @@ def getAverages(team):
     :param team: The name of the team to get the averages for.
     :return: A dictionary containing the averages of several categorical statistics for the team.
     """
-    instances = []
-    for index, row in data.iterrows():
-        # Check if the team name is the same as the team we are looking for
-        # To do so, ignore the last 4 characters of the team name (the year)
-        if row["team"][:-5] == team:
-            instances.append(row)
-
-    # Now that we have all instances of the team, we can calculate the averages of the statistics
-    # We will store the averages in a dictionary
-    averageStats = {}
-
-    # Get the averages for win, loss, off_yards_per_game, yards_per_game_allowed, rush_yards_per_game, pass_yards_per_game,
-    # avg_points_per_game_allowed, points_per_game, 4th_percent, opponent_4th_percent, 3rd_percent,
-    # opponent_3rd_percent, avg_turnover_margin_per_game
-    wins = []
-    losses = []
-    off_yards_per_game = []
-    yards_per_game_allowed = []
-    rushing_yards_per_game = []
-    rush_yards_per_game_allowed = []
-    pass_yards_per_game = []
-    pass_yards_per_game_allowed = []
-    avg_points_per_game_allowed = []
-    points_per_game = []
-    fourth_percent = []
-    opponent_fourth_percent = []
-    third_percent = []
-    opponent_third_percent = []
-    avg_turnover_margin_per_game = []
-    for instance in instances:
-        wins.append(instance["win"])
-        losses.append(instance["loss"])
-        off_yards_per_game.append(instance["off_yards_per_game"])
-        yards_per_game_allowed.append(instance["yards_per_game_allowed"])
-        rushing_yards_per_game.append(instance["rushing_yards_per_game"])
-        rush_yards_per_game_allowed.append(instance["rush_yards_per_game_allowed"])
-        pass_yards_per_game.append(instance["pass_yards_per_game"])
-        pass_yards_per_game_allowed.append(instance["pass_yards_per_game_allowed"])
-        avg_points_per_game_allowed.append(instance["avg_points_per_game_allowed"])
-        points_per_game.append(instance["points_per_game"])
-        fourth_percent.append(instance["4th_percent"])
-        opponent_fourth_percent.append(instance["opponent_4th_percent"])
-        third_percent.append(instance["3rd_percent"])
-        opponent_third_percent.append(instance["opponent_3rd_percent"])
-        avg_turnover_margin_per_game.append(instance["avg_turnover_margin_per_game"])
-
-    # Convert all the lists to numpy arrays with doubles
-    wins = np.array(wins, dtype=np.double)
-    losses = np.array(losses, dtype=np.double)
-    off_yards_per_game = np.array(off_yards_per_game, dtype=np.double)
-    yards_per_game_allowed = np.array(yards_per_game_allowed, dtype=np.double)
-    rushing_yards_per_game = np.array(rushing_yards_per_game, dtype=np.double)
-    rush_yards_per_game_allowed = np.array(rush_yards_per_game_allowed, dtype=np.double)
-    pass_yards_per_game = np.array(pass_yards_per_game, dtype=np.double)
-    pass_yards_per_game_allowed = np.array(pass_yards_per_game_allowed, dtype=np.double)
-    avg_points_per_game_allowed = np.array(avg_points_per_game_allowed, dtype=np.double)
-    points_per_game = np.array(points_per_game, dtype=np.double)
-    fourth_percent = np.array(fourth_percent, dtype=np.double)
-    opponent_fourth_percent = np.array(opponent_fourth_percent, dtype=np.double)
-    third_percent = np.array(third_percent, dtype=np.double)
-    opponent_third_percent = np.array(opponent_third_percent, dtype=np.double)
-    avg_turnover_margin_per_game = np.array(
-        avg_turnover_margin_per_game, dtype=np.double
-    )
-
-    averageStats["team"] = team
-    # Instead of calculating the averages, simply store the lists of each statistic in the dictionary as the value for the key
-    # But first, convert all the values in all the lists to valid doubles
-    averageStats["win"] = wins
-    averageStats["loss"] = losses
-    averageStats["off_yards_per_game"] = off_yards_per_game
-    averageStats["yards_per_game_allowed"] = yards_per_game_allowed
-    averageStats["rushing_yards_per_game"] = rushing_yards_per_game
-    averageStats["rush_yards_per_game_allowed"] = rush_yards_per_game_allowed
-    averageStats["pass_yards_per_game"] = pass_yards_per_game
-    averageStats["pass_yards_per_game_allowed"] = pass_yards_per_game_allowed
-    averageStats["avg_points_per_game_allowed"] = avg_points_per_game_allowed
-    averageStats["points_per_game"] = points_per_game
-    averageStats["fourth_percent"] = fourth_percent
-    averageStats["opponent_fourth_percent"] = opponent_fourth_percent
-    averageStats["third_percent"] = third_percent
-    averageStats["opponent_third_percent"] = opponent_third_percent
-    averageStats["avg_turnover_margin_per_game"] = avg_turnover_margin_per_game
+    # Instead of calculating the averages, simply store the season values of each statistic in the dictionary
+    # These are read-only views of the team index (an unknown team gets empty arrays), so no data is copied
+    averageStats = {"team": team}
+    averageStats.update(zip(AVERAGE_STATS, get_team_stats(team)))
 
     return averageStats
 
@@ -135,11 +577,9 @@ def getTopStats(averages):
     :return: A table containing the top 3 statistics that are positively correlated with wins, the top 3 statistics
     that are negatively correlated with wins,
     """
-    # Get the correlation between wins and all the other statistics
-    correlations = {}
-    for key in averages:
-        if key not in ("team", "win", "loss"):
-            correlations[key] = np.corrcoef(averages["win"], averages[key])[0][1]
+    # Get the correlation between wins (and losses) and all the other statistics
+    win_correlations, loss_correlations = get_team_correlations(averages["team"])
+    correlations = win_correlations
 
     # Sort the correlations
     sorted_correlations = sorted(correlations.items(), key=lambda x: x[1], reverse=True)
@@ -159,10 +599,7 @@ def getTopStats(averages):
         )
 
     # Also find the top 3 statistics that are positively correlated with losses and the top 3 statistics that are negatively correlated with losses
-    correlations = {}
-    for key in averages:
-        if key not in ("team", "win", "loss"):
-            correlations[key] = np.corrcoef(averages["loss"], averages[key])[0][1]
+    correlations = loss_correlations
 
     # Sort the correlations
     sorted_correlations = sorted(correlations.items(), key=lambda x: x[1], reverse=True)
@@ -184,6 +621,8 @@ def getTopStats(averages):
         )
 
     # Store our results in a table
+    import pandas as pd
+
     results = pd.DataFrame(
         columns=["Statistic", "Correlation with Wins", "Correlation with Losses"]
     )
@@ -213,6 +652,8 @@ def print_table(df):
     :param df: The dataframe to print.
     :return: None
     """
+    from tabulate import tabulate
+
     print(tabulate(df, headers="keys", tablefmt="pretty"))
 
 
@@ -245,7 +686,7 @@ def predict_winner(team1, team2):
 
     # Add a point to the team that does better in the stats that are positively correlated with wins
     for stat in statsTeam1PositivelyCorrelatedWins:
-        if averagesTeam1[stat].mean() > averagesTeam2[stat].mean():
+        if is_greater(averagesTeam1[stat].mean(), averagesTeam2[stat].mean()):
             team1Points += 1
         else:
             team2Points += 1
@@ -257,7 +698,7 @@ def predict_winner(team1, team2):
 
     # Add a point to the other team if they do better in a stat that is negatively correlated with wins
     for stat in statsTeam1NegativelyCorrelatedWins:
-        if averagesTeam1[stat].mean() > averagesTeam2[stat].mean():
+        if is_greater(averagesTeam1[stat].mean(), averagesTeam2[stat].mean()):
             team2Points += 1
         else:
             team1Points += 1
@@ -269,87 +710,94 @@ def predict_winner(team1, team2):
         return team2, team2Points, team1Points
 
 
-def predict_winner_all_stats(team1, team2, homeTeam=None, awayTeam=None):
+def predict_winner_all_stats(team1, team2, homeTeam=None, awayTeam=None, features=None):
     """
     Predict the winner of a game between two teams based on all the statistics of the two teams.
 
     :param team1: The first team.
     :param team2: The second team.
+    :param homeTeam: The home team (to apply the home field advantage).
+    :param awayTeam: The away team.
+    :param features: The names of the features to compare (any numeric column of cfb.csv, see features.py) instead of
+    the statistics of getAverages.
     :return: The predicted winner of the game, the number of points the predicted winner is expected to score, and the number of points the predicted loser is expected to score.
     """
-    # Get all the statistics for both teams. If the statistic is a good thing, add a point to the team with the higher value
-    # If the statistic is a bad thing, add a point to the team with the lower value
-    averagesTeam1 = getAverages(team1)
-    averagesTeam2 = getAverages(team2)
-
-    # Identify the statistics that are positively correlated with wins to determine which are good and which are bad
-    goodStats = []
-    badStats = []
-
-    # Identify the correlation between wins and all the other statistics (except for the team name and the win and loss columns)
-    correlations = {}
-    for key in averagesTeam1:
-        if key not in ("team", "win", "loss"):
-            correlations[key] = np.corrcoef(averagesTeam1["win"], averagesTeam1[key])[
-                0
-            ][1]
-
-    # Sort the correlations
-    sorted_correlations = sorted(correlations.items(), key=lambda x: x[1], reverse=True)
-
-    # If a correlation is positive, add it to the good stats list. If it is negative, add it to the bad stats list
-    for stat in sorted_correlations:
-        if stat[1] > 0:
-            goodStats.append(stat[0])
-        else:
-            badStats.append(stat[0])
-
-    # Now that we have the good and bad stats, we can predict the winner of the game
-    team1Points = 0
-    team2Points = 0
-
-    # Add a point to the team that has a higher value in a good stat
-    for stat in goodStats:
-        if averagesTeam1[stat].mean() > averagesTeam2[stat].mean():
-            team1Points += 1
-        else:
-            team2Points += 1
-
-    # Add a point to the team that has a lower value in a bad stat
-    for stat in badStats:
-        if averagesTeam1[stat].mean() < averagesTeam2[stat].mean():
-            team1Points += 1
-        else:
-            team2Points += 1
-
-    # Get the conference multipliers
-    try:
-        conference_multipliers = main.CONFERENCE_MULTIPLIERS
-
-        # Adjust the points based on the conference multipliers
-        # Get the conference of each team from the conference column in the data
-        team1conference = data.loc[data["team"].str.contains(team1)].iloc[0][
-            "conference"
-        ]
-        team2conference = data.loc[data["team"].str.contains(team2)].iloc[0][
-            "conference"
-        ]
-        team1Points *= conference_multipliers[team1conference]
-        team2Points *= conference_multipliers[team2conference]
-
-        # If homeTeam and awayTeam are provided, adjust the points based on the home field advantage
-        if homeTeam and awayTeam:
-            home_field_advantage = main.Home_Field_Advantage
-            away_field_disadvantage = main.Away_Field_Disadvantage
-            if team1 == homeTeam:
-                team1Points *= home_field_advantage
-                team2Points *= away_field_disadvantage
-            elif team2 == homeTeam:
-                team2Points *= home_field_advantage
-                team1Points *= away_field_disadvantage
-
-    except:
-        traceback.print_exc()
+    # Home games between two known teams are already in the matchup matrix
+    if features is None and homeTeam == team1 and awayTeam == team2:
+        matchup = lookup_matchup(team1, team2)
+        if matchup is not None:
+            team1Points = float(matchup_matrix["home_points"][matchup])
+            team2Points = float(matchup_matrix["away_points"][matchup])
+            if team1Points > team2Points:
+                return team1, team1Points, team2Points
+            else:
+                return team2, team2Points, team1Points
+
+    if features is not None:
+        # Compare the teams on the chosen columns of the feature summary (one vectorized pass, however many there are)
+        ensure_loaded()
+        team1_id = team_ids.get(team1, -1)
+        team2_id = team_ids.get(team2, -1)
+        if team1_id < 0 or team2_id < 0:
+            raise KeyError(team1 if team1_id < 0 else team2)
+        team1Points, team2Points = count_stat_points([team1_id], [team2_id], team_summary, features)
+        team1Points, team2Points = float(team1Points[0]), float(team2Points[0])
+    else:
+        # Get all the statistics for both teams. If the statistic is a good thing, add a point to the team with the higher value
+        # If the statistic is a bad thing, add a point to the team with the lower value
+        averagesTeam1 = getAverages(team1)
+        averagesTeam2 = getAverages(team2)
+
+        # Identify the statistics that are positively correlated with wins to determine which are good and which are bad
+        goodStats = []
+        badStats = []
+
+        # Identify the correlation between wins and all the other statistics (except for the team name and the win and loss columns)
+        correlations, _ = get_team_correlations(team1)
+
+        # Sort the correlations
+        sorted_correlations = sorted(correlations.items(), key=lambda x: x[1], reverse=True)
+
+        # If a correlation is positive, add it to the good stats list. If it is negative, add it to the bad stats list
+        for stat in sorted_correlations:
+            if stat[1] > 0:
+                goodStats.append(stat[0])
+            else:
+                badStats.append(stat[0])
+
+        # Now that we have the good and bad stats, we can predict the winner of the game
+        team1Points = 0
+        team2Points = 0
+
+        # Add a point to the team that has a higher value in a good stat
+        for stat in goodStats:
+            if is_greater(averagesTeam1[stat].mean(), averagesTeam2[stat].mean()):
+                team1Points += 1
+            else:
+                team2Points += 1
+
+        # Add a point to the team that has a lower value in a bad stat
+        for stat in badStats:
+            if is_greater(averagesTeam2[stat].mean(), averagesTeam1[stat].mean()):
+                team1Points += 1
+            else:
+                team2Points += 1
+
+    # Adjust the points based on the conference multipliers (teams in a conference without one keep their points)
+    conference_multipliers = config.CONFERENCE_MULTIPLIERS
+    team1Points *= conference_multipliers.get(get_team_conference(team1), 1.0)
+    team2Points *= conference_multipliers.get(get_team_conference(team2), 1.0)
+
+    # If homeTeam and awayTeam are provided, adjust the points based on the home field advantage
+    if homeTeam and awayTeam:
+        home_field_advantage = config.Home_Field_Advantage
+        away_field_disadvantage = config.Away_Field_Disadvantage
+        if team1 == homeTeam:
+            team1Points *= home_field_advantage
+            team2Points *= away_field_disadvantage
+        elif team2 == homeTeam:
+            team2Points *= home_field_advantage
+            team1Points *= away_field_disadvantage
 
     # Now that we have the number of points for each team, we can predict the winner
     if team1Points > team2Points:
@@ -366,17 +814,22 @@ def predict_points(team1, team2):
     :param team2: The second team.
     :return: The total number of points in a game between two teams.
     """
+    # Use the matchup matrix if it has this game
+    matchup = lookup_matchup(team1, team2)
+    if matchup is not None:
+        return float(matchup_matrix["totals"][matchup])
+
     # Get the averages for both teams
     averagesTeam1 = getAverages(team1)
     averagesTeam2 = getAverages(team2)
 
     # Get the points per game for both teams
-    pointsPerGameTeam1 = averagesTeam1["points_per_game"].mean()
-    pointsPerGameTeam2 = averagesTeam2["points_per_game"].mean()
+    pointsPerGameTeam1 = averagesTeam1["points_per_game"].mean(dtype=np.double)
+    pointsPerGameTeam2 = averagesTeam2["points_per_game"].mean(dtype=np.double)
 
     # Get the points per game allowed for both teams
-    pointsPerGameAllowedTeam1 = averagesTeam1["avg_points_per_game_allowed"].mean()
-    pointsPerGameAllowedTeam2 = averagesTeam2["avg_points_per_game_allowed"].mean()
+    pointsPerGameAllowedTeam1 = averagesTeam1["avg_points_per_game_allowed"].mean(dtype=np.double)
+    pointsPerGameAllowedTeam2 = averagesTeam2["avg_points_per_game_allowed"].mean(dtype=np.double)
 
     # Get the expected points for both teams
     expectedPointsTeam1 = (pointsPerGameTeam1 + pointsPerGameAllowedTeam2) / 2
@@ -393,17 +846,22 @@ def spread(team1, team2):
     :param team2: The second team.
     :return: The predicted point spread in a game between two teams.
     """
+    # Use the matchup matrix if it has this game
+    matchup = lookup_matchup(team1, team2)
+    if matchup is not None:
+        return float(matchup_matrix["spreads"][matchup])
+
     # Get the averages for both teams
     averagesTeam1 = getAverages(team1)
     averagesTeam2 = getAverages(team2)
 
     # Calculate the predicted point differential (spread)
     # We will use points_per_game (offense) and avg_points_per_game_allowed (defense) as primary factors
-    team1_offense = averagesTeam1["points_per_game"].mean()
-    team1_defense = averagesTeam1["avg_points_per_game_allowed"].mean()
+    team1_offense = averagesTeam1["points_per_game"].mean(dtype=np.double)
+    team1_defense = averagesTeam1["avg_points_per_game_allowed"].mean(dtype=np.double)
 
-    team2_offense = averagesTeam2["points_per_game"].mean()
-    team2_defense = averagesTeam2["avg_points_per_game_allowed"].mean()
+    team2_offense = averagesTeam2["points_per_game"].mean(dtype=np.double)
+    team2_defense = averagesTeam2["avg_points_per_game_allowed"].mean(dtype=np.double)
 
     # Calculate the offensive and defensive matchup: (offensive strength - opposing defensive strength)
     team1_predicted_points = team1_offense - team2_defense
@@ -413,3 +871,246 @@ def spread(team1, team2):
     point_spread = team1_predicted_points - team2_predicted_points
 
     return round(point_spread, 2)
+
+
+def score_games(
+    home_ids,
+    away_ids,
+    home_field=True,
+    conference_multipliers=None,
+    home_field_advantage=None,
+    away_field_disadvantage=None,
+    summary=None,
+    features=None,
+):
+    """
+    Score games between teams given by their rows in the team summary (see predict_games).
+
+    :param home_ids: The row of the home team of each game.
+    :param away_ids: The row of the away team of each game.
+    :param home_field: Whether to apply the home field advantage.
+    :param conference_multipliers: The multiplier of each conference (defaults to config.CONFERENCE_MULTIPLIERS).
+    :param home_field_advantage: The home team's multiplier (defaults to config.Home_Field_Advantage).
+    :param away_field_disadvantage: The away team's multiplier (defaults to config.Away_Field_Disadvantage).
+    :param summary: The summary the rows belong to (see build_summary; defaults to the summary of all the data).
+    :param features: The names of the features to score with, or "all" (see features.select_features; defaults to the
+    statistics of getAverages).
+    :return: home_points (np.ndarray) - the points of the home team in each game; away_points (np.ndarray) - the points
+    of the away team in each game
+    """
+    summary = get_team_summary(summary)
+    if conference_multipliers is None:
+        conference_multipliers = config.CONFERENCE_MULTIPLIERS
+    if home_field_advantage is None:
+        home_field_advantage = config.Home_Field_Advantage
+    if away_field_disadvantage is None:
+        away_field_disadvantage = config.Away_Field_Disadvantage
+
+    home_points, away_points = count_stat_points(home_ids, away_ids, summary, features)
+
+    # Adjust the points based on the conference multipliers
+    multipliers = np.array(
+        [
+            conference_multipliers.get(summary["conferences"].get(team), 1.0)
+            for team in summary["team_ids"]
+        ]
+    )
+    home_points *= multipliers[home_ids]
+    away_points *= multipliers[away_ids]
+
+    # Adjust the points based on the home field advantage
+    if home_field:
+        home_points *= home_field_advantage
+        away_points *= away_field_disadvantage
+
+    return home_points, away_points
+
+
+def count_stat_points(team1_ids, team2_ids, summary, features=None):
+    """
+    Give each team a point for every statistic it is better in. A statistic is good if it is positively correlated with
+    the first team's wins (the higher team wins the point) and bad otherwise (the lower team wins the point).
+
+    :param team1_ids: The row of the first team of each game.
+    :param team2_ids: The row of the second team of each game.
+    :param summary: The summary the rows belong to (see build_summary).
+    :param features: The names of the features to compare, or "all" (see features.select_features; defaults to every
+    statistic of getAverages except wins and losses).
+    :return: team1_points (np.ndarray), team2_points (np.ndarray) - the points of both teams in each game
+    """
+    if features is None:
+        means = summary["team_means"]
+        correlations = summary["win_correlations"]
+        columns = [i for i, key in enumerate(AVERAGE_STATS) if key not in ("win", "loss")]
+    else:
+        means = summary["features"]["team_means"]
+        correlations = summary["features"]["win_correlations"]
+        columns = feature_store.select_features(summary["features"], features)
+
+    means1 = means[team1_ids][:, columns]
+    means2 = means[team2_ids][:, columns]
+    good_stats = correlations[team1_ids][:, columns] > 0
+    team1_better = np.where(good_stats, is_greater(means1, means2), is_greater(means2, means1))
+    team1_points = team1_better.sum(axis=1).astype(np.double)
+    return team1_points, len(columns) - team1_points
+
+
+def score_top_stats(team1_ids, team2_ids, summary=None):
+    """
+    Score games between teams given by their rows in the team summary with the three statistics most positively and
+    the three most negatively correlated with the first team's wins (vectorized predict_winner).
+
+    :param team1_ids: The row of the first team of each game.
+    :param team2_ids: The row of the second team of each game.
+    :param summary: The summary the rows belong to (see build_summary; defaults to the summary of all the data).
+    :return: team1_points (np.ndarray) - the points of the first team in each game; team2_points (np.ndarray) - the
+    points of the second team in each game
+    """
+    summary = get_team_summary(summary)
+
+    stat_columns = np.array(
+        [i for i, key in enumerate(AVERAGE_STATS) if key not in ("win", "loss")]
+    )
+    # Sort the statistics of each first team from the most to the least correlated with wins (like getTopStats)
+    order = np.argsort(
+        -summary["win_correlations"][team1_ids][:, stat_columns], axis=1, kind="stable"
+    )
+    top_stats = stat_columns[order[:, :3]]
+    bottom_stats = stat_columns[order[:, :-4:-1]]
+
+    means1 = summary["team_means"][team1_ids]
+    means2 = summary["team_means"][team2_ids]
+    rows = np.arange(len(means1))[:, None]
+
+    # A point for the better team in a positively correlated stat, and for the other team in a negatively correlated one
+    team1_points = is_greater(means1[rows, top_stats], means2[rows, top_stats]).sum(axis=1)
+    team1_points += (~is_greater(means1[rows, bottom_stats], means2[rows, bottom_stats])).sum(axis=1)
+
+    return team1_points.astype(np.double), 6 - team1_points.astype(np.double)
+
+
+def score_totals(team1_ids, team2_ids, summary=None):
+    """
+    Predict the total number of points in games between teams given by their rows in the team summary (vectorized
+    predict_points).
+
+    :param team1_ids: The row of the first team of each game.
+    :param team2_ids: The row of the second team of each game.
+    :param summary: The summary the rows belong to (see build_summary; defaults to the summary of all the data).
+    :return: The total number of points in each game.
+    """
+    summary = get_team_summary(summary)
+    means = summary["team_means"]
+    points_per_game = means[:, list(AVERAGE_STATS).index("points_per_game")]
+    points_allowed = means[:, list(AVERAGE_STATS).index("avg_points_per_game_allowed")]
+
+    # Each team is expected to score halfway between its offense and the other team's defense
+    expectedPointsTeam1 = (points_per_game[team1_ids] + points_allowed[team2_ids]) / 2
+    expectedPointsTeam2 = (points_per_game[team2_ids] + points_allowed[team1_ids]) / 2
+
+    return np.round(expectedPointsTeam1 + expectedPointsTeam2, 3)
+
+
+def score_spreads(team1_ids, team2_ids, summary=None):
+    """
+    Predict the point spread in games between teams given by their rows in the team summary (vectorized spread).
+
+    :param team1_ids: The row of the first team of each game.
+    :param team2_ids: The row of the second team of each game.
+    :param summary: The summary the rows belong to (see build_summary; defaults to the summary of all the data).
+    :return: The predicted point spread of each game.
+    """
+    summary = get_team_summary(summary)
+    offense = summary["team_means"][:, list(AVERAGE_STATS).index("points_per_game")]
+    defense = summary["team_means"][
+        :, list(AVERAGE_STATS).index("avg_points_per_game_allowed")
+    ]
+
+    # (offensive strength - opposing defensive strength) for both teams
+    team1_predicted_points = offense[team1_ids] - defense[team2_ids]
+    team2_predicted_points = offense[team2_ids] - defense[team1_ids]
+
+    return np.round(team1_predicted_points - team2_predicted_points, 2)
+
+
+def predict_games(
+    home_teams,
+    away_teams,
+    home_field=True,
+    conference_multipliers=None,
+    home_field_advantage=None,
+    away_field_disadvantage=None,
+    summary=None,
+):
+    """
+    Predict the winners of a whole slate of games in one vectorized pass.
+
+    Each game is scored exactly like predict_winner_all_stats(home_team, away_team, home_team, away_team): the home team
+    decides which statistics are good and which are bad, each statistic is worth one point, and the points are then
+    adjusted by the conference multipliers and (if home_field is set) the home field advantage.
+    Teams in a conference without a multiplier keep their points unchanged.
+
+    :param home_teams: The home team of each game.
+    :param away_teams: The away team of each game.
+    :param home_field: Whether to apply the home field advantage.
+    :param conference_multipliers: The multiplier of each conference (defaults to config.CONFERENCE_MULTIPLIERS).
+    :param home_field_advantage: The home team's multiplier (defaults to config.Home_Field_Advantage).
+    :param away_field_disadvantage: The away team's multiplier (defaults to config.Away_Field_Disadvantage).
+    :param summary: The summary to score the teams with (see build_summary; defaults to the summary of all the data).
+    :return: A dictionary of arrays with one entry per game: valid (whether both teams are in the dataset), winners,
+    winner_points, loser_points and margins (winner_points - loser_points). Invalid games have no winner and NaN points.
+    """
+    summary = get_team_summary(summary)
+    home_teams = np.asarray(home_teams, dtype=object).reshape(-1)
+    away_teams = np.asarray(away_teams, dtype=object).reshape(-1)
+
+    # Convert the team names to rows of the team summary (-1 if the team is not in the dataset)
+    ids = summary["team_ids"]
+    home_ids = np.array([ids.get(team, -1) for team in home_teams], dtype=np.intp)
+    away_ids = np.array([ids.get(team, -1) for team in away_teams], dtype=np.intp)
+    valid = (home_ids >= 0) & (away_ids >= 0)
+
+    home_points, away_points = score_games(
+        home_ids[valid],
+        away_ids[valid],
+        home_field,
+        conference_multipliers,
+        home_field_advantage,
+        away_field_disadvantage,
+        summary,
+    )
+
+    # Ties go to the away team, just like in predict_winner_all_stats
+    home_wins = home_points > away_points
+    winner_points = np.full(len(valid), np.nan)
+    loser_points = np.full(len(valid), np.nan)
+    winner_points[valid] = np.where(home_wins, home_points, away_points)
+    loser_points[valid] = np.where(home_wins, away_points, home_points)
+    winners = np.full(len(valid), None, dtype=object)
+    winners[valid] = np.where(home_wins, home_teams[valid], away_teams[valid])
+
+    return {
+        "valid": valid,
+        "winners": winners,
+        "winner_points": winner_points,
+        "loser_points": loser_points,
+        "margins": winner_points - loser_points,
+    }
+
+
+def lookup_matchup(team1, team2):
+    """
+    Find a game between two teams in the precomputed matchup matrix (see matchup_matrix.py).
+
+    :param team1: The first (home) team.
+    :param team2: The second (away) team.
+    :return: The row and column of the game in the matchup matrix, or None if no up to date matrix is loaded or one of
+    the teams is not in it.
+    """
+    if matchup_matrix is None:
+        return None
+    i = matchup_matrix["team_ids"].get(team1)
+    j = matchup_matrix["team_ids"].get(team2)
+    if i is None or j is None:
+        return None
+    return i, j
@@ -0,0 +1,236 @@
+# Keep a typed, binary copy of cfb.csv so that the data can be loaded without parsing the CSV text
+import csv
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+
+CSV_PATH = "CFBdata/cfb.csv"
+CACHE_DIRECTORY = "CFBdata/.cache"
+
+# Bump this whenever the layout of the cache changes so that old caches are rebuilt
+CACHE_VERSION = 2
+
+# Columns that hold text instead of numbers
+TEXT_COLUMNS = ("team", "team_name", "conference")
+
+# Columns stored as "minutes:seconds" (with some leading non-breaking spaces) that are converted to seconds
+TIME_COLUMNS = ("time_of_possession", "average_time_of_possession_per_game")
+
+
+def parse_time(value):
+    """
+    Convert a "minutes:seconds" time to seconds.
+
+    :param value: The time, e.g. "   401:31".
+    :return: seconds (float) - the time in seconds, or NaN if the value is not a time
+    """
+    try:
+        minutes, seconds = str(value).strip().split(":")
+        return int(minutes) * 60 + int(seconds)
+    except ValueError:
+        return np.nan
+
+
+def format_time(seconds):
+    """
+    Convert seconds back to a "minutes:seconds" time (see parse_time).
+
+    :param seconds: The time in seconds.
+    :return: time (str) - the time, e.g. "401:31", or "" if the time is missing
+    """
+    if np.isnan(seconds):
+        return ""
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    return f"{minutes}:{seconds:02d}"
+
+
+def hash_file(path):
+    """
+    Hash the contents of a file.
+
+    :param path: The path of the file.
+    :return: sha256 (str) - the hex digest of the file
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_csv(csv_path=CSV_PATH):
+    """
+    Read cfb.csv and convert every column to its proper type.
+
+    The team column (e.g. "Alabama 2017") is split into team_name ("Alabama") and season (2017), every statistic becomes
+    a double (thousands separators are removed, blank cells and placeholders such as "Reclassifying" become NaN) and the
+    time of possession columns are converted to seconds. Rows are only ever appended to the file (see append_rows), so
+    when a team column appears more than once, its last row wins.
+
+    :param csv_path: The path of the CSV file.
+    :return: df (pd.DataFrame) - the typed data
+    """
+    # pandas is only imported once the data is actually loaded
+    import pandas as pd
+
+    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    df = df.drop_duplicates("team", keep="last").reset_index(drop=True)
+
+    typed = {"team": df["team"]}
+    typed["team_name"] = df["team"].str[:-5]
+    typed["season"] = (
+        pd.to_numeric(df["team"].str[-4:], errors="coerce")
+        .fillna(0)
+        .astype(np.int16)
+    )
+    for column in df.columns:
+        if column == "team":
+            continue
+        if column == "conference":
+            typed[column] = [value if value else None for value in df[column]]
+        elif column in TIME_COLUMNS:
+            typed[column] = df[column].map(parse_time).astype(np.double)
+        else:
+            # Large totals are written with thousands separators (e.g. "5,018")
+            typed[column] = pd.to_numeric(
+                df[column].str.replace(",", "", regex=False), errors="coerce"
+            ).astype(np.double)
+
+    return pd.DataFrame(typed)
+
+
+def write_cache(df, csv_path=CSV_PATH, directory=CACHE_DIRECTORY):
+    """
+    Save typed data to the cache.
+
+    :param df: The typed data (see parse_csv).
+    :param csv_path: The path of the CSV file the data came from.
+    :param directory: The directory of the cache.
+    :return: None
+    """
+    import pandas as pd
+
+    os.makedirs(directory, exist_ok=True)
+
+    text_columns = [column for column in df.columns if column in TEXT_COLUMNS]
+    number_columns = [
+        column for column in df.columns if column not in TEXT_COLUMNS + ("season",)
+    ]
+
+    # All the statistics are stored in a single column-major matrix, so every column is contiguous on disk
+    arrays = {
+        "numbers": np.asfortranarray(df[number_columns].to_numpy(dtype=np.double)),
+        "season": df["season"].to_numpy(dtype=np.int16),
+    }
+    for name, array in arrays.items():
+        path = os.path.join(directory, name + ".npy")
+        with open(path + ".tmp", "wb") as file:
+            np.save(file, array)
+        os.replace(path + ".tmp", path)
+
+    # The text columns and the schema are small enough to be stored as JSON
+    stat = os.stat(csv_path)
+    schema = {
+        "version": CACHE_VERSION,
+        "csv": {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": hash_file(csv_path),
+        },
+        "columns": list(df.columns),
+        "number_columns": number_columns,
+        "text": {
+            column: [None if pd.isna(value) else value for value in df[column]]
+            for column in text_columns
+        },
+    }
+    path = os.path.join(directory, "schema.json")
+    with open(path + ".tmp", "w") as file:
+        json.dump(schema, file)
+    os.replace(path + ".tmp", path)
+
+
+def read_cache(schema, directory=CACHE_DIRECTORY):
+    """
+    Load typed data from the cache.
+
+    :param schema: The schema of the cache (from schema.json).
+    :param directory: The directory of the cache.
+    :return: df (pd.DataFrame) - the typed data
+    """
+    import pandas as pd
+
+    numbers = np.load(os.path.join(directory, "numbers.npy"))
+    season = np.load(os.path.join(directory, "season.npy"))
+
+    columns = dict(zip(schema["number_columns"], numbers.T))
+    columns["season"] = season
+    # Every row of a team repeats its name and conference, so keep a single (interned) copy of each
+    for column, values in schema["text"].items():
+        columns[column] = [None if value is None else sys.intern(value) for value in values]
+
+    return pd.DataFrame({column: columns[column] for column in schema["columns"]})
+
+
+def load_data(csv_path=CSV_PATH, directory=CACHE_DIRECTORY):
+    """
+    Load cfb.csv from the cache, rebuilding the cache first if the CSV file changed.
+
+    :param csv_path: The path of the CSV file.
+    :param directory: The directory of the cache.
+    :return: df (pd.DataFrame) - the typed data (see parse_csv)
+    """
+    try:
+        with open(os.path.join(directory, "schema.json")) as file:
+            schema = json.load(file)
+    except (FileNotFoundError, ValueError):
+        schema = None
+
+    if schema is not None and schema["version"] == CACHE_VERSION:
+        stat = os.stat(csv_path)
+        key = schema["csv"]
+        if key["size"] == stat.st_size and key["mtime_ns"] == stat.st_mtime_ns:
+            return read_cache(schema, directory)
+
+        # The file was touched, but if its contents are the same the cache is still good
+        if key["sha256"] == hash_file(csv_path):
+            df = read_cache(schema, directory)
+            write_cache(df, csv_path, directory)
+            return df
+
+    df = parse_csv(csv_path)
+    write_cache(df, csv_path, directory)
+    return df
+
+
+def append_rows(rows, df, csv_path=CSV_PATH, directory=CACHE_DIRECTORY):
+    """
+    Append rows to cfb.csv without rewriting the rest of the file, and update the cache.
+
+    A row for a team and season that is already in the file replaces it (see parse_csv).
+
+    :param rows: The rows to append, typed like parse_csv.
+    :param df: All the typed data once the rows are added (written to the cache, so the CSV is not parsed again).
+    :param csv_path: The path of the CSV file.
+    :param directory: The directory of the cache.
+    :return: None
+    """
+    import pandas as pd
+
+    with open(csv_path, newline="") as file:
+        columns = next(csv.reader(file))
+
+    # Convert the rows back to the text of the CSV file
+    text = pd.DataFrame(
+        {
+            column: rows[column].map(format_time) if column in TIME_COLUMNS else rows[column]
+            for column in columns
+        }
+    )
+    with open(csv_path, "a", newline="") as file:
+        text.to_csv(file, header=False, index=False, lineterminator="\n")
+
+    write_cache(df, csv_path, directory)
@@ -0,0 +1,307 @@
+# Schema-driven team features: every numeric column of cfb.csv in one float matrix, selectable by name
+import warnings
+
+import numpy as np
+
+from data_cache import TEXT_COLUMNS
+
+# Every numeric column of cfb.csv is either a rate or a season total. Season totals are divided by the number of games,
+# so that seasons of different lengths can be compared. A column that is in neither list is left out with a
+# warning (see build_feature_matrix), so that a new column is never silently treated as a total
+
+# Columns that are already rates, ranks or per-game values
+RATE_COLUMNS = frozenset(
+    {
+        "off_rank",
+        "off_yards_play",
+        "off_yards_per_game",
+        "def_rank",
+        "yards_play_allowed",
+        "yards_per_game_allowed",
+        "first_down_rank",
+        "first_down_def_rank",
+        "4th_down_rank",
+        "4th_percent",
+        "4rd_down_def_rank",
+        "opponent_4th_percent",
+        "kickoff_return_rank",
+        "avg_yard_per_kickoff_return",
+        "kickoff_return_def_rank",
+        "avg_yards_per_kickoff_return_allowed",
+        "passing_off_rank",
+        "pass_yards_attempt",
+        "yards_completion",
+        "pass_yards_per_game",
+        "pass_def_rank",
+        "yards_attempt_allowed",
+        "yards_completion_allowed",
+        "pass_yards_per_game_allowed",
+        "penalty_rank",
+        "penalty_yards_per_game",
+        "punt_return_rank",
+        "avg_yards_per_punt_return",
+        "punt_return_def_rank",
+        "avg_yards_allowed_per_punt_return",
+        "redzone_off_rank",
+        "redzone_points",
+        "redzone_def_rank",
+        "redzone_points_allowed",
+        "rushing_off_rank",
+        "yards_rush",
+        "rushing_yards_per_game",
+        "rushing_def_rank",
+        "yds_rush_allowed",
+        "rush_yards_per_game_allowed",
+        "sack_rank",
+        "average_sacks_per_game",
+        "scoring_def_rank",
+        "avg_points_per_game_allowed",
+        "scoring_off_rank",
+        "points_per_game",
+        "tackle_for_loss_rank",
+        "tackle_for_loss_per_game",
+        "3rd_down_rank",
+        "3rd_percent",
+        "3rd_down_def_rank",
+        "opponent_3rd_percent",
+        "time_of_possession_rank",
+        "average_time_of_possession_per_game",
+        "turnover_rank",
+        "avg_turnover_margin_per_game",
+        # Unlabeled in cfb.csv, but its values are averages (fractional, around 20), not counts
+        "na",
+    }
+)
+
+# Columns that are season totals, which are divided by the number of games
+TOTAL_COLUMNS = frozenset(
+    {
+        "win",
+        "loss",
+        "off_plays",
+        "off_yards",
+        "off_tds",
+        "def_plays",
+        "yards_allowed",
+        "off_tds_allowed",
+        "total_tds_allowed",
+        "first_down_runs",
+        "first_down_passes",
+        "first_down_penalties",
+        "first_downs",
+        "opp_first_down_runs",
+        "opp_first_down_passes",
+        "opp_first_down_penalties",
+        "opp_first_downs",
+        "4th_attempts",
+        "4th_conversions",
+        "opp_4th_conversion",
+        "opp_4th_attempt",
+        "kickoffs_returned",
+        "kickoff_return_yards",
+        "kickoff_return_touchdowns",
+        "opp_kickoff_returns",
+        "opponent_kickoff_return_yards",
+        "opp_kickoff_return_touchdowns_allowed",
+        "pass_attempts",
+        "pass_completions",
+        "interceptions_thrown_x",
+        "pass_yards",
+        "pass_touchdowns",
+        "opp_completions_allowed",
+        "opp_pass_attempts",
+        "opp_pass_yds_allowed",
+        "opp_pass_tds_allowed",
+        "penalties",
+        "penalty_yards",
+        "punt_returns",
+        "net_punt_return_yards",
+        "punt_return_touchdowns",
+        "opp_punt_returns",
+        "opp_net_punt_return_yards",
+        "opp_punt_return_touchdowns_allowed",
+        "redzone_attempts",
+        "redzone_rush_td",
+        "redzone_pass_td",
+        "redzone_field_goals_made",
+        "redzone_scores",
+        "opp_redzone_attempts",
+        "opp_redzone_rush_td_allowed",
+        "opp_redzone_pass_touchdowns_allowed",
+        "opp_redzone_field_goals_made",
+        "opp_redzone_scores",
+        "rush_attempts",
+        "rush_yds",
+        "rushing_td",
+        "opp_rush_attempts",
+        "opp_rush_yards_alloweed",
+        "opp_rush_touchdowns_allowed",
+        "sacks",
+        "sack_yards",
+        "touchdowns_allowed",
+        "opponent_extra_points",
+        "2_point_conversions_allowed",
+        "opp_deflected_extra_points",
+        "opp_safety",
+        "points_allowed",
+        "touchdowns",
+        "pat",
+        "2_point_conversions",
+        "defensive_points",
+        "safety",
+        "total_points",
+        "solo_tackle_for_loss",
+        "assist_tackle_for_loss",
+        "tackle_for_loss_yards",
+        "total_tackle_for_loss",
+        "3rd_attempts",
+        "3rd_conversions",
+        "opp_3rd_conversion",
+        "opp_3rd_attempt",
+        "time_of_possession",
+        "fumbles_recovered",
+        "opponents_intercepted",
+        "turnovers_gain",
+        "fumbles_lost",
+        "interceptions_thrown_y",
+        "turnovers_lost",
+        "turnover_margin",
+        "opp_feild_goals_made",
+        "feild_goals",
+        "kickoff_touchbacks",
+    }
+)
+
+# Columns that are not features (games is what the season totals are divided by)
+NON_FEATURE_COLUMNS = TEXT_COLUMNS + ("season", "games")
+
+# Features that are the outcome being predicted, so they never score a game
+OUTCOME_COLUMNS = ("win", "loss")
+
+
+def get_feature_columns(df):
+    """
+    Find the feature columns of a dataframe: every numeric column that has at least one value.
+
+    :param df: The dataframe (as loaded by data_cache.load_data).
+    :return: columns (list) - the names of the feature columns, in the order of the dataframe
+    """
+    return [
+        column
+        for column in df.columns
+        if column not in NON_FEATURE_COLUMNS and df[column].notna().any()
+    ]
+
+
+def build_feature_matrix(df):
+    """
+    Load every feature column into one matrix, with the season totals converted to per-game values. Columns that are
+    neither rates nor totals (e.g. new columns in the CSV) are left out with a warning, until they are added to
+    RATE_COLUMNS or TOTAL_COLUMNS.
+
+    :param df: The dataframe (as loaded by data_cache.load_data).
+    :return: names (list) - the name of each feature (its column); features (np.ndarray) - a (season row x feature)
+    matrix of doubles, NaN where a value is missing
+    """
+    names = get_feature_columns(df)
+    unknown = [name for name in names if name not in RATE_COLUMNS and name not in TOTAL_COLUMNS]
+    if unknown:
+        warnings.warn(
+            f"Leaving out unknown columns in the data: {', '.join(unknown)} (add them to RATE_COLUMNS or TOTAL_COLUMNS "
+            "in features.py to use them as features)",
+            stacklevel=2,
+        )
+        names = [name for name in names if name not in unknown]
+    features = df[names].to_numpy(dtype=np.double, copy=True)
+
+    totals = np.array([name in TOTAL_COLUMNS for name in names], dtype=bool)
+    games = df["games"].to_numpy(dtype=np.double)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        features[:, totals] /= games[:, None]
+
+    # A season without a game count has no per-game values
+    features[~np.isfinite(features)] = np.nan
+    return names, features
+
+
+def build_feature_summary(df):
+    """
+    Summarize the features into one row per team, in the same team order as data.build_team_index.
+
+    Missing values are left out of a team's average; a team that never has a value for a feature gets the average of
+    all the teams, so that it neither wins nor loses that feature.
+
+    :param df: The dataframe (as loaded by data_cache.load_data).
+    :return: features (dict) - names (list) and index (dict, feature name -> column) of the features; team_means
+    (np.ndarray) - a (team x feature) matrix of averages; win_correlations (np.ndarray) - a (team x feature) matrix of
+    the correlation between each feature and wins per game (NaN when it cannot be computed)
+    """
+    names, features = build_feature_matrix(df)
+
+    # Gather each team's seasons into one contiguous block, exactly like build_team_index
+    team_names = df["team_name"].to_numpy()
+    order = np.argsort(team_names, kind="stable")
+    features = features[order]
+    _, starts, counts = np.unique(
+        team_names[order], return_index=True, return_counts=True
+    )
+
+    present = ~np.isnan(features)
+    values = np.where(present, features, 0.0)
+    seasons = np.add.reduceat(present.astype(np.double), starts, axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        team_means = np.add.reduceat(values, starts, axis=0) / seasons
+
+    # Correlate wins with every feature of every team at once, each pair over the seasons where both are present (like
+    # data.build_team_summary)
+    win = names.index("win")
+    both = present & present[:, [win]]
+    pairs = np.add.reduceat(both.astype(np.double), starts, axis=0)
+    wins = np.where(both, features[:, [win]], 0.0)
+    values = np.where(both, features, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        win_means = np.add.reduceat(wins, starts, axis=0) / pairs
+        value_means = np.add.reduceat(values, starts, axis=0) / pairs
+    win_deviations = np.where(both, wins - np.repeat(win_means, counts, axis=0), 0.0)
+    deviations = np.where(both, values - np.repeat(value_means, counts, axis=0), 0.0)
+    cross_products = np.add.reduceat(deviations * win_deviations, starts, axis=0)
+    squares = np.add.reduceat(deviations**2, starts, axis=0)
+    win_squares = np.add.reduceat(win_deviations**2, starts, axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        win_correlations = cross_products / np.sqrt(squares * win_squares)
+
+    missing = np.isnan(team_means)
+    if missing.any():
+        with np.errstate(divide="ignore", invalid="ignore"):
+            overall = np.where(missing, 0.0, team_means).sum(axis=0) / (~missing).sum(axis=0)
+        team_means[missing] = overall[np.nonzero(missing)[1]]
+
+    return {
+        "names": names,
+        "index": {name: i for i, name in enumerate(names)},
+        "team_means": team_means,
+        "win_correlations": win_correlations,
+    }
+
+
+def select_features(feature_summary, features="all"):
+    """
+    Find the columns of the feature summary to score games with.
+
+    :param feature_summary: The feature summary (see build_feature_summary).
+    :param features: The names of the features (or the name of a single feature), or "all" for every feature except
+    the outcomes (wins and losses).
+    :return: columns (list) - the column of each feature in the feature summary
+    """
+    if features == "all":
+        return [
+            i
+            for i, name in enumerate(feature_summary["names"])
+            if name not in OUTCOME_COLUMNS
+        ]
+    if isinstance(features, str):
+        features = [features]
+    unknown = [name for name in features if name not in feature_summary["index"]]
+    if unknown:
+        raise ValueError(f"Unknown features: {', '.join(unknown)}")
+    return [feature_summary["index"][name] for name in features]
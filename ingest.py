@@ -0,0 +1,173 @@
+# Add new seasons and weekly results to the data without a full reload: the new rows are appended to cfb.csv, and only
+# the teams they belong to are rebuilt in the running process (their summary rows, cached lookups and matchup matrix games)
+import argparse
+import sys
+
+import numpy as np
+
+import data
+import data_cache
+
+
+def rows_from_games(games, season, week=None, teams=None):
+    """
+    Build the season rows of every team from the results of its completed games (wins, losses and points). The other
+    statistics of the rows are missing, so they are kept from the row that is already in the data (see merge_rows).
+
+    :param games: The games (see backtest.load_games).
+    :param season: The season of the rows.
+    :param week: The last week to count (defaults to every completed game).
+    :param teams: The teams to build rows for (defaults to every team that has a conference, i.e. the FBS teams).
+    :return: rows (pd.DataFrame) - one row per team, typed like data_cache.load_data
+    """
+    import pandas as pd
+
+    games = games[
+        (games["season"] == season)
+        & games["home_points"].notna()
+        & games["away_points"].notna()
+    ]
+    if week is not None:
+        games = games[games["week"] <= week]
+
+    # One row per team and game, from both sides of every game
+    sides = pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    "team_name": games[f"{side}_team"],
+                    "conference": games[f"{side}_conference"],
+                    "points": games[f"{side}_points"],
+                    "points_allowed": games[f"{other}_points"],
+                }
+            )
+            for side, other in (("home", "away"), ("away", "home"))
+        ],
+        ignore_index=True,
+    )
+    if teams is None:
+        sides = sides[sides["conference"].notna()]
+    else:
+        sides = sides[sides["team_name"].isin(teams)]
+    sides["win"] = sides["points"] > sides["points_allowed"]
+
+    grouped = sides.groupby("team_name", sort=True)
+    rows = pd.DataFrame(
+        {
+            "games": grouped.size().astype(np.double),
+            "win": grouped["win"].sum().astype(np.double),
+            "total_points": grouped["points"].sum().astype(np.double),
+            "points_allowed": grouped["points_allowed"].sum().astype(np.double),
+            "conference": grouped["conference"].last(),
+        }
+    ).reset_index()
+    rows["loss"] = rows["games"] - rows["win"]
+    rows["points_per_game"] = rows["total_points"] / rows["games"]
+    rows["avg_points_per_game_allowed"] = rows["points_allowed"] / rows["games"]
+    rows["season"] = np.int16(season)
+    rows["team"] = rows["team_name"] + f" {season}"
+    return rows
+
+
+def fetch_rows(season, week=None):
+    """
+    Build the season rows of every FBS team from the API's results of a season (see rows_from_games).
+
+    :param season: The season.
+    :param week: The last week to count (defaults to every completed game).
+    :return: rows (pd.DataFrame) - one row per team, typed like data_cache.load_data
+    """
+    import pandas as pd
+
+    from backtest import GAME_COLUMNS, fetch_season_games
+    from main import clean_team_names
+
+    fetched, _ = fetch_season_games([season])
+    games = pd.DataFrame(fetched[season], columns=GAME_COLUMNS)
+    for column in ("home_points", "away_points"):
+        games[column] = pd.to_numeric(games[column])
+
+    team_names, _ = clean_team_names()
+    return rows_from_games(games, season, week, sorted(team_names))
+
+
+def load_dump(path):
+    """
+    Load season rows from a local dump in the layout of cfb.csv.
+
+    :param path: The path of the dump.
+    :return: rows (pd.DataFrame) - the rows, typed like data_cache.load_data
+    """
+    return data_cache.parse_csv(path)
+
+
+def merge_rows(rows, df):
+    """
+    Fill in what new rows are missing from the rows they replace (same team and season).
+
+    :param rows: The new rows.
+    :param df: The data (see data.get_data).
+    :return: rows (pd.DataFrame) - the new rows, with every column of the data
+    """
+    rows = rows.drop_duplicates("team", keep="last").set_index("team")
+    old = df.drop_duplicates("team", keep="last").set_index("team").reindex(rows.index)
+    merged = rows.combine_first(old).reset_index().reindex(columns=df.columns)
+    merged["season"] = merged["season"].astype(np.int16)
+    return merged
+
+
+def ingest_rows(rows):
+    """
+    Add season rows to the data and to cfb.csv, and update the running process incrementally: only the teams of the
+    rows get new summary rows, cached lookups and matchup matrix games. A team that is not in the data yet makes the
+    process build everything again.
+
+    :param rows: The rows, typed like data_cache.load_data (a row for a team and season that is already in the data
+    replaces it; the columns it is missing are kept).
+    :return: teams (list) - the teams that were updated, or None if everything was built again
+    """
+    import matchup_matrix
+    from backtest import get_prior_summary
+
+    matrix = data.matchup_matrix
+    rows = merge_rows(rows, data.get_data())
+    teams = data.update_teams(rows)
+    data_cache.append_rows(rows, data.get_data())
+
+    # The summaries of the seasons after these rows (see backtest.py) are out of date too
+    get_prior_summary.cache_clear()
+
+    if matrix is not None:
+        if teams is not None and matrix["teams"] == list(data.team_ids):
+            matrix = matchup_matrix.update_matchup_matrix(matrix, teams)
+        else:
+            matrix = matchup_matrix.build_matchup_matrix()
+        matchup_matrix.save_matchup_matrix(matrix)
+        data.matchup_matrix = matrix
+
+    return teams
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Add a season's results (from the API) or the rows of a local dump to cfb.csv."
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--season", type=int, help="build the season's rows from its results on the API")
+    source.add_argument("--dump", help="CSV file in the layout of cfb.csv")
+    parser.add_argument("--week", type=int, default=None, help="last week to count (with --season)")
+    args = parser.parse_args()
+
+    rows = load_dump(args.dump) if args.dump else fetch_rows(args.season, args.week)
+    if rows.empty:
+        sys.exit("Nothing to ingest")
+
+    teams = ingest_rows(rows)
+    if teams is None:
+        print(f"Ingested {len(rows)} rows (new teams, so everything was rebuilt)")
+    else:
+        print(f"Ingested {len(rows)} rows for {len(teams)} teams")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,26 @@
-import traceback
-
-from data import *
-from dotenv import load_dotenv
-import os
-import requests
+from cfb_api import fetch_all, get_client
+from config import CONFERENCE_MULTIPLIERS, MAX_CONCURRENT_REQUESTS, SEASON
+from data import (
+    get_data,
+    is_known_team,
+    predict_games,
+    predict_points,
+    predict_winner_all_stats,
+    reload_data,
+)
+from metrics import drop_game, timed
+from models import predict_matchup
+from team_aliases import get_name_table
 from datetime import datetime
 from itertools import chain
-import time
-
-# Load environment variables
-load_dotenv()
-
-# Handle warnings
 import warnings
 
-warnings.simplefilter("error", RuntimeWarning)
-
 
 def access_cfb_api():
-    api_key = os.getenv("API_KEY")
-
-    # Please note that API keys should be supplied with "Bearer " prepended (e.g. "Bearer your_key")
-    headers = {"Authorization": "Bearer " + api_key}
-
-    # Base URL for the API
-    base_url = "https://api.collegefootballdata.com/"
+    # Every request goes through the shared API client (see cfb_api.py), which owns the headers and base URL
+    client = get_client()
+    headers = dict(client.session.headers)
+    base_url = client.base_url
 
     # Return access to the API
     return headers, base_url
@@ -33,122 +29,11 @@ def access_cfb_api():
 def clean_team_names():
     """
     This function cleans the team names from the College Football Data API.
+    The names are only cleaned once and then memoized (see team_aliases.py), so calling this function again is cheap.
 
-    :return: team_names (list) - a list of all the team names in the FBS; team_names_dict (dict) - a dictionary that links all of the team names to their filtered names
+    :return: team_names (frozenset) - the names of all the teams in the FBS; team_names_dict (mappingproxy) - a read-only dictionary that links all of the team names to their filtered names
     """
-    headers, base_url = access_cfb_api()
-
-    # Get the list of teams (in the FBS)
-    endpoint = "teams/fbs"
-    url = base_url + endpoint
-    response = requests.get(url, headers=headers)
-    data = response.json()
-
-    # Store the team names in a list
-    team_names = []
-    for team in data:
-        team_names.append(team["school"])
-
-    # If a team name contains "State", convert "State" to "St."
-    for i in range(len(team_names)):
-        if "State" in team_names[i]:
-            team_names[i] = team_names[i].replace("State", "St.")
-
-    # Make the following changes to the teams in the team_names list:
-    # "App St." -> "Appalachian St."
-    # "Army" -> "Army West Point"
-    # "Central Michigan" -> "Central Mich."
-    # "Eastern Michigan" -> "Eastern Mich.
-    # Remove Florida Atlantic
-    # Remove Florida International
-    # Remove Georgia Southern
-    # "Hawai'i" -> "Hawaii"
-    # Remove Kennesaw St.
-    # "Middle Tennessee" -> "Middle Tenn."
-    # "Northern Illinois" -> "Northern Ill."
-    # "San José St." -> "San Jose St."
-    # "Southern Miss" -> "Southern Miss."
-    # "South Florida" -> "South Fla."
-    # "UL Monroe" -> "La.-Monroe"
-    # "USC" -> "Southern California"
-    # "Western Kentucky" -> "Western Ky."
-    # "Western Michigan" -> "Western Mich."
-
-    i = 0
-    while i < len(team_names):
-        if team_names[i] == "App St.":
-            team_names[i] = "Appalachian St."
-        elif team_names[i] == "Army":
-            team_names[i] = "Army West Point"
-        elif team_names[i] == "Central Michigan":
-            team_names[i] = "Central Mich."
-        elif team_names[i] == "Eastern Michigan":
-            team_names[i] = "Eastern Mich."
-        elif team_names[i] == "Florida Atlantic":
-            team_names[i] = "Fla. Atlantic"
-        elif team_names[i] == "Florida International":
-            team_names[i] = "FIU"
-        elif team_names[i] == "Georgia Southern":
-            team_names[i] = "Ga. Southern"
-        elif team_names[i] == "Hawai'i":
-            team_names[i] = "Hawaii"
-        elif team_names[i] == "Kennesaw St.":
-            team_names.pop(i)
-            i -= 1
-        elif team_names[i] == "Middle Tennessee":
-            team_names[i] = "Middle Tenn."
-        elif team_names[i] == "Northern Illinois":
-            team_names[i] = "Northern Ill."
-        elif team_names[i] == "San José St.":
-            team_names[i] = "San Jose St."
-        elif team_names[i] == "Southern Miss":
-            team_names[i] = "Southern Miss."
-        elif team_names[i] == "South Florida":
-            team_names[i] = "South Fla."
-        elif team_names[i] == "UL Monroe":
-            team_names[i] = "La.-Monroe"
-        elif team_names[i] == "USC":
-            team_names[i] = "Southern California"
-        elif team_names[i] == "Western Kentucky":
-            team_names[i] = "Western Ky."
-        elif team_names[i] == "Western Michigan":
-            team_names[i] = "Western Mich."
-        elif team_names[i] == "Miami (OH)":
-            team_names[i] = "Miami OH"
-
-        i += 1
-
-    # Create a dictionary that links all the team names to their filtered names
-    team_names_dict = {}
-    for team in data:
-        team_names_dict[team["school"]] = team["school"]
-    team_names_dict["App St."] = "Appalachian St."
-    team_names_dict["Army"] = "Army West Point"
-    team_names_dict["Central Michigan"] = "Central Mich."
-    team_names_dict["Eastern Michigan"] = "Eastern Mich."
-    team_names_dict["Florida Atlantic"] = "Fla. Atlantic"
-    team_names_dict["Florida International"] = "FIU"
-    team_names_dict["Georgia Southern"] = "Ga. Southern"
-    team_names_dict["Hawai'i"] = "Hawaii"
-    team_names_dict.pop("Kennesaw State")
-    team_names_dict["Middle Tennessee"] = "Middle Tenn."
-    team_names_dict["Northern Illinois"] = "Northern Ill."
-    team_names_dict["San José St."] = "San Jose St."
-    team_names_dict["Southern Miss"] = "Southern Miss."
-    team_names_dict["South Florida"] = "South Fla."
-    team_names_dict["UL Monroe"] = "La.-Monroe"
-    team_names_dict["USC"] = "Southern California"
-    team_names_dict["Western Kentucky"] = "Western Ky."
-    team_names_dict["Western Michigan"] = "Western Mich."
-    team_names_dict["Miami (OH)"] = "Miami OH"
-
-    # Go through the dictionary and for any value (not key) that contains "State", convert "State" to "St."
-    for key, value in team_names_dict.items():
-        if "State" in value:
-            team_names_dict[key] = value.replace("State", "St.")
-
-    # Return the list of team names
-    return team_names, team_names_dict
+    return get_name_table()
 
 
 def get_current_week_games():
@@ -157,47 +42,35 @@ def get_current_week_games():
 
     :return: games (list) - a list of all the games for the current week
     """
-    headers, base_url = access_cfb_api()
+    return get_anyWeek_games(get_current_week())
 
-    # Get the games for the current week in the FBS only
-    endpoint = f"games?year=2024&week={get_current_week()}&division=fbs"
-    url = base_url + endpoint
-    response = requests.get(url, headers=headers)
-    data = response.json()
 
-    team_names, team_names_dict = clean_team_names()
+def get_anyWeek_games(week, season=SEASON):
+    """
+    This function gets the games for any week.
 
-    # Convert the team names to the filtered names
-    for i in range(len(data)):
-        try:
-            home_team = data[i]["home_team"]
-            away_team = data[i]["away_team"]
-            data[i]["home_team"] = team_names_dict[home_team]
-            data[i]["away_team"] = team_names_dict[away_team]
-        except:
-            pass
-
-    # If a team is playing a team that is not in the FBS, remove that game
-    i = 0
-    while i < len(data):
-        if (
-            data[i]["home_team"] not in team_names
-            or data[i]["away_team"] not in team_names
-        ):
-            data.pop(i)
-            i -= 1
-        i += 1
+    :param week: the week to get the games for
+    :param season: the season to get the games for
+    :return: games (list) - a list of all the games for the week, in this format: (home_team, away_team)
+    """
+    # Get the games for the week in the FBS only
+    endpoint = f"games?year={season}&week={week}&division=fbs"
+    data = get_client().get(endpoint)
+
+    team_names, team_names_dict = clean_team_names()
 
-    # Store the games in a list
+    # Convert the team names to the filtered names and format the games in this format: (home_team, away_team)
     games = []
-    for game in data:
-        games.append(game)
+    with timed("normalize"):
+        for game in data:
+            home_team = team_names_dict.get(game["home_team"], game["home_team"])
+            away_team = team_names_dict.get(game["away_team"], game["away_team"])
 
-    # Format the games in this format: (home_team, away_team)
-    for i in range(len(games)):
-        home_team = games[i]["home_team"]
-        away_team = games[i]["away_team"]
-        games[i] = (home_team, away_team)
+            # If a team is playing a team that is not in the FBS, remove that game
+            if home_team not in team_names or away_team not in team_names:
+                drop_game("normalize", "not_fbs")
+                continue
+            games.append((home_team, away_team))
 
     # Return the list of games
     return games
@@ -212,11 +85,8 @@ def get_current_week():
     current_week = 1
     date = datetime.now()
     # Get the current week of the college football season
-    endpoint = "calendar?year=2024"
-    headers, base_url = access_cfb_api()
-    url = base_url + endpoint
-    response = requests.get(url, headers=headers)
-    data = response.json()
+    endpoint = f"calendar?year={SEASON}"
+    data = get_client().get(endpoint)
     for week in data:
         first_game_start = week["firstGameStart"]
         last_game_start = week["lastGameStart"]
@@ -231,13 +101,18 @@ def get_current_week():
     return current_week
 
 
-def predict_this_weeks_games():
+def predict_this_weeks_games(week=None, season=SEASON):
     """
     This function predicts the games for the current week.
 
+    :param week: the week to predict instead of the current week
+    :param season: the season of the week (only used with week)
     :return: winners (list) - a list of the predicted winners for the current week
     """
-    current_week_games = get_current_week_games()
+    if week is None:
+        current_week_games = get_current_week_games()
+    else:
+        current_week_games = get_anyWeek_games(week, season)
 
     matchups = []
     for game in current_week_games:
@@ -246,18 +121,37 @@ def predict_this_weeks_games():
 
     winners = []
     error_games = []
+    scored_games = []
     team_names, team_names_dict = clean_team_names()
     for game in current_week_games:
-        # If there is an error, remove the game
-        try:
-            home_team = game[0]
-            away_team = game[1]
-            home_team = team_names_dict[home_team]
-            away_team = team_names_dict[away_team]
-            winner = predict_winner_all_stats(home_team, away_team)
-            winners.append(winner)
-        except:
+        # If a team name cannot be filtered, remove the game
+        home_team = team_names_dict.get(game[0])
+        away_team = team_names_dict.get(game[1])
+        if home_team is None or away_team is None:
+            drop_game("normalize", "unknown_team_name")
+            error_games.append(game)
+            continue
+        scored_games.append((game, home_team, away_team))
+
+    # Score the whole slate in one pass (without the home field advantage, like before)
+    predictions = predict_games(
+        [game[1] for game in scored_games],
+        [game[2] for game in scored_games],
+        home_field=False,
+    )
+    for i, (game, home_team, away_team) in enumerate(scored_games):
+        # If a team is not in the dataset, remove the game
+        if not predictions["valid"][i]:
+            drop_game("features", "not_in_dataset")
             error_games.append(game)
+            continue
+        winners.append(
+            (
+                predictions["winners"][i],
+                predictions["winner_points"][i],
+                predictions["loser_points"][i],
+            )
+        )
 
     # If there are error games, remove them from the matchups
     for game in error_games:
@@ -306,29 +200,29 @@ def predict_this_weeks_SEC_games():
     error_games = []
     team_names, team_names_dict = clean_team_names()
     for game in current_week_games:
-        # If there is an error, remove the game
-        try:
-            home_team = game[0]
-            away_team = game[1]
-            if home_team in SEC_TEAMS or away_team in SEC_TEAMS:
-                winner = predict_winner_all_stats(
-                    home_team, away_team, home_team, away_team
-                )
-                winners.append(winner)
-                total_score = predict_points(home_team, away_team)
-                total_scores.append(total_score)
-            else:
-                matchups.remove(f"{away_team} at {home_team}")
-        except:
+        home_team = game[0]
+        away_team = game[1]
+        if home_team not in SEC_TEAMS and away_team not in SEC_TEAMS:
+            matchups.remove(f"{away_team} at {home_team}")
+            continue
+
+        # If a team is not in the dataset, remove the game
+        if not (is_known_team(home_team) and is_known_team(away_team)):
+            drop_game("features", "not_in_dataset")
             error_games.append(game)
+            continue
+
+        with timed("score"):
+            winner = predict_winner_all_stats(home_team, away_team, home_team, away_team)
+            total_score = predict_points(home_team, away_team)
+        winners.append(winner)
+        total_scores.append(total_score)
 
     # If there are error games, remove them from the matchups
     for game in error_games:
-        try:
-            matchup = f"{game[1]} at {game[0]}"
+        matchup = f"{game[1]} at {game[0]}"
+        if matchup in matchups:
             matchups.remove(matchup)
-        except:
-            pass
 
     return winners, matchups, total_scores
 
@@ -397,15 +291,24 @@ def get_current_SEC_overUnder_lines():
 
     :return: home_team (str) - the home team in the game; away_team (str) - the away team in the game; over_under (float) - the over/under line for the game
     """
-    headers, base_url = access_cfb_api()
-    endpoint = f"lines?year=2024&week={get_current_week()}&conference=SEC"
-    url = base_url + endpoint
-    response = requests.get(url, headers=headers)
-    data = response.json()
+    return get_anyWeek_SEC_overUnder_lines(get_current_week())
+
+
+def get_anyWeek_SEC_overUnder_lines(week, season=SEASON):
+    """
+    This function gets the over/under lines for any week in the SEC
+
+    :return: home_team (str) - the home team in the game; away_team (str) - the away team in the game; over_under (float) - the over/under line for the game
+    """
+    endpoint = f"lines?year={season}&week={week}&conference=SEC"
+    data = get_client().get(endpoint)
 
     overUnderLines = []
 
     for game in data:
+        # Skip games that have no line yet
+        if not game["lines"]:
+            continue
         home_team = game["homeTeam"]
         away_team = game["awayTeam"]
         over_under = game["lines"][0]["overUnder"]
@@ -414,89 +317,171 @@ def get_current_SEC_overUnder_lines():
     return overUnderLines
 
 
-def get_anyWeek_SEC_overUnder_lines(week):
+def predict_anyWeek_SEC_overUnder(week, season=SEASON):
     """
-    This function gets the over/under lines for any week in the SEC
+    This function predicts whether the SEC games in a given week go over or under their over/under lines
 
-    :return: home_team (str) - the home team in the game; away_team (str) - the away team in the game; over_under (float) - the over/under line for the game
+    :param week: the week to predict
+    :param season: the season to predict
+    :return: predictions (list) - a list of tuples in this format: (home_team, away_team, total_score, over_under_line, "over" or "under")
     """
-    headers, base_url = access_cfb_api()
-    endpoint = f"lines?year=2024&week={week}&conference=SEC"
-    url = base_url + endpoint
-    response = requests.get(url, headers=headers)
-    data = response.json()
+    predictions = []
+    for prediction in iter_anyWeek_SEC_overUnder(week, season):
+        predictions.append(tuple(prediction.values()))
 
-    overUnderLines = []
+    return predictions
 
-    for game in data:
-        home_team = game["homeTeam"]
-        away_team = game["awayTeam"]
-        over_under = game["lines"][0]["overUnder"]
-        overUnderLines.append((home_team, away_team, over_under))
 
-    return overUnderLines
+def iter_anyWeek_predictions(week, season=SEASON):
+    """
+    This function predicts the games for any week one game at a time, so every prediction can be used as soon as its game is scored
 
+    :param week: the week to predict
+    :param season: the season to predict
+    :return: a generator of predictions (dict) - home_team, away_team, winner, winner_points, loser_points, total_score and spread of a game
+    """
+    for home_team, away_team in get_anyWeek_games(week, season):
+        # If a team is not in the dataset, skip the game
+        if not (is_known_team(home_team) and is_known_team(away_team)):
+            drop_game("features", "not_in_dataset")
+            continue
 
-def get_actual_SEC_totalScores(week):
+        # Look the teams up once for the winner, total and spread models
+        yield {
+            "home_team": home_team,
+            "away_team": away_team,
+            **predict_matchup(home_team, away_team, home_field=True),
+        }
+
+
+def iter_anyWeek_SEC_overUnder(week, season=SEASON):
+    """
+    This function predicts whether the SEC games in a given week go over or under their over/under lines, one game at a time
+
+    :param week: the week to predict
+    :param season: the season to predict
+    :return: a generator of predictions (dict) - home_team, away_team, total_score, over_under_line and over_under ("over" or "under") of a game
+    """
+    team_names, team_names_dict = clean_team_names()
+
+    # Link each game to its over/under line (by its teams, since the games and the lines are not in the same order)
+    overUnderLines = {}
+    for home_team, away_team, over_under_line in get_anyWeek_SEC_overUnder_lines(
+        week, season
+    ):
+        home_team = team_names_dict.get(home_team, home_team)
+        away_team = team_names_dict.get(away_team, away_team)
+        overUnderLines[(home_team, away_team)] = over_under_line
+
+    for game in get_anyWeek_SEC_games([week], season)[week]:
+        home_team = team_names_dict.get(game["home_team"])
+        away_team = team_names_dict.get(game["away_team"])
+        over_under_line = overUnderLines.get((home_team, away_team))
+
+        # Skip games without a line and games with a team that is not in the dataset
+        if over_under_line is None:
+            drop_game("fetch", "no_line")
+            continue
+        if not (is_known_team(home_team) and is_known_team(away_team)):
+            drop_game("features", "not_in_dataset")
+            continue
+
+        total_score = predict_points(home_team, away_team)
+        yield {
+            "home_team": home_team,
+            "away_team": away_team,
+            "total_score": total_score,
+            "over_under_line": over_under_line,
+            "over_under": "over"
+            if float(total_score) > float(over_under_line)
+            else "under",
+        }
+
+
+def get_anyWeek_SEC_games(weeks, season=SEASON):
+    """
+    This function gets the SEC games for several weeks at once (in parallel, requesting each week only once)
+
+    :param weeks: the weeks to get the games for
+    :param season: the season to get the games for
+    :return: games (dict) - a dictionary that links each week to the list of SEC games in that week
+    """
+    endpoints = {
+        week: f"games?year={season}&week={week}&conference=SEC" for week in weeks
+    }
+    responses = fetch_all(endpoints.values(), MAX_CONCURRENT_REQUESTS)
+    return {week: responses[endpoint] for week, endpoint in endpoints.items()}
+
+
+def get_actual_SEC_totalScores(week, games=None):
     """
     This function gets the actual total scores for the SEC games in a given week
 
+    :param week: the week to get the games for
+    :param games: the SEC games of that week, if they were already fetched (see get_anyWeek_SEC_games)
     :return: home_team (str) - the home team in the game; away_team (str) - the away team in the game; total_score (int) - the total score for the game
     """
-    headers, base_url = access_cfb_api()
-    endpoint = f"games?year=2024&week={week}&conference=SEC"
-    url = base_url + endpoint
-    response = requests.get(url, headers=headers)
-    data = response.json()
+    if games is None:
+        games = get_anyWeek_SEC_games([week])[week]
 
     actualTotalScores = []
 
     team_names, team_names_dict = clean_team_names()
 
-    for game in data:
+    for game in games:
         home_team = game["home_team"]
         away_team = game["away_team"]
 
-        # Try to clean the team names (if it fails, remove the game)
-        try:
-            home_team = team_names_dict[home_team]
-            away_team = team_names_dict[away_team]
-            total_score = game["home_points"] + game["away_points"]
-        except:
+        # Clean the team names (if a name is unknown, remove the game)
+        home_team = team_names_dict.get(home_team)
+        away_team = team_names_dict.get(away_team)
+        if home_team is None or away_team is None:
+            drop_game("normalize", "unknown_team_name")
             continue
 
+        # Remove games that have not been played yet
+        if game["home_points"] is None or game["away_points"] is None:
+            drop_game("fetch", "not_played")
+            continue
+        total_score = game["home_points"] + game["away_points"]
+
         actualTotalScores.append((home_team, away_team, total_score))
 
     return actualTotalScores
 
 
-def predict_anyWeek_SEC_totalScores(week):
+def predict_anyWeek_SEC_totalScores(week, games=None):
     """
     This function predicts the total scores for the SEC games in a given week
 
+    :param week: the week to get the games for
+    :param games: the SEC games of that week, if they were already fetched (see get_anyWeek_SEC_games)
     :return: home_team (str) - the home team in the game; away_team (str) - the away team in the game; total_score (int) - the total score for the game
     """
-    headers, base_url = access_cfb_api()
-    endpoint = f"games?year=2024&week={week}&conference=SEC"
-    url = base_url + endpoint
-    response = requests.get(url, headers=headers)
-    data = response.json()
+    if games is None:
+        games = get_anyWeek_SEC_games([week])[week]
 
     predictedTotalScores = []
 
     team_names, team_names_dict = clean_team_names()
 
-    for game in data:
+    for game in games:
         home_team = game["home_team"]
         away_team = game["away_team"]
 
-        # Try to clean the team names (if it fails, remove the game)
-        try:
-            home_team = team_names_dict[home_team]
-            away_team = team_names_dict[away_team]
-            total_score = predict_points(home_team, away_team)
-        except:
+        # Clean the team names (if a name is unknown, remove the game)
+        home_team = team_names_dict.get(home_team)
+        away_team = team_names_dict.get(away_team)
+        if home_team is None or away_team is None:
+            drop_game("normalize", "unknown_team_name")
+            continue
+
+        # If a team is not in the dataset, remove the game
+        if not (is_known_team(home_team) and is_known_team(away_team)):
+            drop_game("features", "not_in_dataset")
             continue
+        with timed("score"):
+            total_score = predict_points(home_team, away_team)
 
         predictedTotalScores.append((home_team, away_team, total_score))
 
@@ -510,15 +495,20 @@ def check_prior_SEC_overUnder_accuracy(overUnderLines):
     :param overUnderLines: the over/under lines for the SEC games in prior weeks
     :return: accuracy (float) - the accuracy of the over/under lines for the SEC games in prior weeks
     """
+    # Get the SEC games of every week prior to the current week (all at once)
+    weekly_games = get_anyWeek_SEC_games(range(1, current_week))
+
     # Get the actual total scores for each SEC game in every week prior to the current week
     actualTotalScores = []
     for week in range(1, current_week):
-        actualTotalScores.append(get_actual_SEC_totalScores(week))
+        actualTotalScores.append(get_actual_SEC_totalScores(week, weekly_games[week]))
 
     # Get the predicted total scores for each SEC game in every week prior to the current week
     predictedTotalScores = []
     for week in range(1, current_week):
-        predictedTotalScores.append(predict_anyWeek_SEC_totalScores(week))
+        predictedTotalScores.append(
+            predict_anyWeek_SEC_totalScores(week, weekly_games[week])
+        )
 
     correct = 0
     wrong = 0
@@ -534,16 +524,13 @@ def check_prior_SEC_overUnder_accuracy(overUnderLines):
     # Filter the team names in overUnderLines to their filtered names
     team_names, team_names_dict = clean_team_names()
     for i in range(len(overUnderLines)):
-        try:
-            home_team = overUnderLines[i][0]
-            away_team = overUnderLines[i][1]
-            overUnderLines[i] = (
-                team_names_dict[home_team],
-                team_names_dict[away_team],
-                overUnderLines[i][2],
-            )
-        except:
-            continue
+        home_team = overUnderLines[i][0]
+        away_team = overUnderLines[i][1]
+        overUnderLines[i] = (
+            team_names_dict.get(home_team, home_team),
+            team_names_dict.get(away_team, away_team),
+            overUnderLines[i][2],
+        )
 
     # Remove any games with teams in overUnderLines that are not in actualTotalScores or predictedTotalScores
     i = 0
@@ -581,71 +568,72 @@ def check_prior_SEC_overUnder_accuracy(overUnderLines):
     return accuracy
 
 
-def get_anyWeek_SEC_winners(week):
+def get_anyWeek_SEC_winners(week, games=None):
     """
     This function gets the winners for the SEC games in a given week
 
+    :param week: the week to get the games for
+    :param games: the SEC games of that week, if they were already fetched (see get_anyWeek_SEC_games)
     :return: winners (list) - a list of the predicted winners for the SEC games in a given week
     """
-    headers, base_url = access_cfb_api()
-    endpoint = f"games?year=2024&week={week}&conference=SEC"
-    url = base_url + endpoint
-    response = requests.get(url, headers=headers)
-    data = response.json()
+    if games is None:
+        games = get_anyWeek_SEC_games([week])[week]
 
     winners = []
-    error_games = []
     team_names, team_names_dict = clean_team_names()
-    for game in data:
-        # If there is an error, remove the game
-        try:
-            home_team = game["home_team"]
-            away_team = game["away_team"]
-            # convert team names to filtered names
-            home_team = team_names_dict[home_team]
-            away_team = team_names_dict[away_team]
-            # Figure out which team had the higher score
-            if game["home_points"] > game["away_points"]:
-                winner = home_team
-            else:
-                winner = away_team
-            winners.append(winner)
-        except:
-            error_games.append(game)
+    for game in games:
+        # convert team names to filtered names (if a name is unknown, remove the game)
+        home_team = team_names_dict.get(game["home_team"])
+        away_team = team_names_dict.get(game["away_team"])
+        if home_team is None or away_team is None:
+            drop_game("normalize", "unknown_team_name")
+            continue
+
+        # Remove games that have not been played yet
+        if game["home_points"] is None or game["away_points"] is None:
+            drop_game("fetch", "not_played")
+            continue
+
+        # Figure out which team had the higher score
+        if game["home_points"] > game["away_points"]:
+            winner = home_team
+        else:
+            winner = away_team
+        winners.append(winner)
 
     return winners
 
 
-def predict_anyWeek_SEC_winners(week):
+def predict_anyWeek_SEC_winners(week, games=None):
     """
     This function predicts the winners for the SEC games in a given week
 
+    :param week: the week to get the games for
+    :param games: the SEC games of that week, if they were already fetched (see get_anyWeek_SEC_games)
     :return: winners (list) - a list of the predicted winners for the SEC games in a given week
     """
-    headers, base_url = access_cfb_api()
-    endpoint = f"games?year=2024&week={week}&conference=SEC"
-    url = base_url + endpoint
-    response = requests.get(url, headers=headers)
-    data = response.json()
+    if games is None:
+        games = get_anyWeek_SEC_games([week])[week]
 
     winners = []
-    error_games = []
     team_names, team_names_dict = clean_team_names()
-    for game in data:
-        # If there is an error, remove the game
-        try:
-            home_team = game["home_team"]
-            away_team = game["away_team"]
-            # convert team names to filtered names
-            home_team = team_names_dict[home_team]
-            away_team = team_names_dict[away_team]
-            # Predict the winner
-            winner = predict_winner_all_stats(
-                home_team, away_team, home_team, away_team
-            )
-            winners.append(winner)
-        except:
-            error_games.append(game)
+    for game in games:
+        # convert team names to filtered names (if a name is unknown, remove the game)
+        home_team = team_names_dict.get(game["home_team"])
+        away_team = team_names_dict.get(game["away_team"])
+        if home_team is None or away_team is None:
+            drop_game("normalize", "unknown_team_name")
+            continue
+
+        # If a team is not in the dataset, remove the game
+        if not (is_known_team(home_team) and is_known_team(away_team)):
+            drop_game("features", "not_in_dataset")
+            continue
+
+        # Predict the winner
+        with timed("score"):
+            winner = predict_winner_all_stats(home_team, away_team, home_team, away_team)
+        winners.append(winner)
 
     return winners
 
@@ -656,15 +644,20 @@ def check_prior_SEC_winner_accuracy():
 
     :return: accuracy (float) - the accuracy of the predicted winners for the SEC games in prior weeks
     """
+    # Get the SEC games of every week prior to the current week (all at once)
+    weekly_games = get_anyWeek_SEC_games(range(1, current_week))
+
     # Get the actual winners for each SEC game in every week prior to the current week
     actualWinners = []
     for week in range(1, current_week):
-        actualWinners.append(get_anyWeek_SEC_winners(week))
+        actualWinners.append(get_anyWeek_SEC_winners(week, weekly_games[week]))
 
     # Get the predicted winners for each SEC game in every week prior to the current week
     predictedWinnersTuples = []
     for week in range(1, current_week):
-        predictedWinnersTuples.append(predict_anyWeek_SEC_winners(week))
+        predictedWinnersTuples.append(
+            predict_anyWeek_SEC_winners(week, weekly_games[week])
+        )
 
     # Seperate the winners from the tuples
     predictedWinners = []
@@ -700,27 +693,20 @@ def create_teamConference_dict():
 
     :return: teamConference_dict (dict) - a dictionary that links each team to their conference
     """
-    headers, base_url = access_cfb_api()
-
     # Get the teams and their conferences
     endpoint = "teams/fbs"
-    url = base_url + endpoint
-    response = requests.get(url, headers=headers)
-    data = response.json()
+    data = get_client().get(endpoint)
 
     # Get the filtered team names
     team_names, team_names_dict = clean_team_names()
 
     teamConference_dict = {}
     for team in data:
-        # Convert the team names to the filtered names and link them to their conferences
-        try:
-            team_name = team["school"]
-            team_name = team_names_dict[team_name]
-            conference = team["conference"]
-            teamConference_dict[team_name] = conference
-        except:
+        # Convert the team names to the filtered names and link them to their conferences (skip excluded teams)
+        team_name = team_names_dict.get(team["school"])
+        if team_name is None:
             continue
+        teamConference_dict[team_name] = team.get("conference")
 
     return teamConference_dict
 
@@ -733,26 +719,16 @@ def add_team_conference_to_cfbCSV():
     """
     teamConference_dict = create_teamConference_dict()
 
-    # Read the CollegeFootballData CSV file
-    cfb_data = pd.read_csv("CFBdata/cfb.csv")
+    # Only the rows whose conference changes are appended to the CollegeFootballData CSV file (see ingest.py), and
+    # only their teams are rebuilt
+    from ingest import ingest_rows
 
-    # Add the conference of each team to the CollegeFootballData CSV file
-    conferences = []
-    for index, row in cfb_data.iterrows():
-        try:
-            team = row["team"]
-            # Remove the year from the team name (The last 5 characters)
-            team = team[:-5]
-            conference = teamConference_dict[team]
-            conferences.append(conference)
-        except:
-            conferences.append("")
-            continue
-
-    cfb_data["conference"] = conferences
-
-    # Save the CollegeFootballData CSV file
-    cfb_data.to_csv("CFBdata/cfb.csv", index=False)
+    cfb_data = get_data()
+    conferences = cfb_data["team_name"].map(teamConference_dict)
+    # (teams that are no longer in the FBS keep the conference they had)
+    changed = cfb_data[conferences.notna() & (conferences != cfb_data["conference"])]
+    if not changed.empty:
+        ingest_rows(changed.assign(conference=conferences[changed.index]))
 
 
 def manually_update_team_conference_to_cfbCSV(team, conference):
@@ -763,16 +739,13 @@ def manually_update_team_conference_to_cfbCSV(team, conference):
     :param conference: the conference of the team
     :return: None
     """
-    # Read the CollegeFootballData CSV file
-    cfb_data = pd.read_csv("CFBdata/cfb.csv")
+    # Only the team's rows are appended to the CollegeFootballData CSV file (see ingest.py), and only the team is rebuilt
+    from ingest import ingest_rows
 
-    # Update the conference of the team in the CollegeFootballData CSV file
-    for index, row in cfb_data.iterrows():
-        if row["team"][:-5] == team:
-            cfb_data.at[index, "conference"] = conference
-
-    # Save the CollegeFootballData CSV file
-    cfb_data.to_csv("CFBdata/cfb.csv", index=False)
+    cfb_data = get_data()
+    rows = cfb_data[cfb_data["team_name"] == team]
+    if not rows.empty:
+        ingest_rows(rows.assign(conference=conference))
 
 
 def remove_columns_from_cfbCSV(column):
@@ -782,15 +755,22 @@ def remove_columns_from_cfbCSV(column):
     :param column: the column to be removed
     :return: None
     """
-    # Read the CollegeFootballData CSV file
+    # Read the CollegeFootballData CSV file (pandas is only needed here, so it is not imported with the module)
+    import pandas as pd
+
     cfb_data = pd.read_csv("CFBdata/cfb.csv")
 
-    # Remove the column from the CollegeFootballData CSV file
+    # Remove the column from the CollegeFootballData CSV file (and the rows that were replaced by later ones, since the
+    # whole file is written again anyway)
     cfb_data.drop(column, axis=1, inplace=True)
+    cfb_data.drop_duplicates("team", keep="last", inplace=True)
 
     # Save the CollegeFootballData CSV file
     cfb_data.to_csv("CFBdata/cfb.csv", index=False)
 
+    # Rebuild the team index and cached correlations from the updated file
+    reload_data()
+
 
 def get_conference_multipliers():
     """
@@ -802,6 +782,14 @@ def get_conference_multipliers():
 
 
 def main():
+    # Treat numerical warnings (e.g. the mean of no seasons) as errors
+    warnings.simplefilter("error", RuntimeWarning)
+
+    # Answer predictions from the precomputed matchup matrix (rebuilt if the data changed)
+    from matchup_matrix import use_matchup_matrix
+
+    use_matchup_matrix()
+
     global current_week
     current_week = get_current_week()
 
@@ -853,61 +841,5 @@ def main():
     # manually_update_team_conference_to_cfbCSV("ULM", "Sun Belt")
 
 
-Home_Field_Advantage = 1.05
-Away_Field_Disadvantage = 0.95
-
-CONFERENCE_MULTIPLIERS = {
-    "SEC": 1.0,
-    "Big Ten": 0.95,
-    "Big 12": 0.9,
-    "ACC": 0.85,
-    "Pac-12": 0.8,
-    "American Athletic": 0.75,
-    "Mountain West": 0.7,
-    "Sun Belt": 0.65,
-    "Mid-American": 0.6,
-    "Conference USA": 0.55,
-    "FBS Independents": 0.8,
-}
-# CONFERENCE_MULTIPLIERS = {
-#     "SEC": 1.05,  # Slightly increase SEC multiplier due to historical dominance
-#     "Big Ten": 0.98,  # Adjust Big Ten multiplier based on recent performance
-#     "Big 12": 0.88,  # Decrease Big 12 multiplier slightly to account for potential parity
-#     "ACC": 0.83,  # Maintain ACC multiplier
-#     "Pac-12": 0.78,  # Decrease Pac-12 multiplier due to recent challenges
-#     "American Athletic": 0.73,  # Maintain American Athletic multiplier
-#     "Mountain West": 0.68,  # Decrease Mountain West multiplier slightly
-#     "Sun Belt": 0.63,  # Maintain Sun Belt multiplier
-#     "Mid-American": 0.58,  # Maintain Mid-American multiplier
-#     "Conference USA": 0.53,  # Maintain Conference USA multiplier
-#     "FBS Independents": 0.82,  # Adjust FBS Independents multiplier slightly
-# }
-# CONFERENCE_MULTIPLIERS = {
-#     "SEC": 1.1,  # Increase SEC multiplier further
-#     "Big Ten": 0.97,  # Slight adjustment to Big Ten
-#     "Big 12": 0.85,  # Decrease Big 12 further
-#     "ACC": 0.8,  # Decrease ACC slightly
-#     "Pac-12": 0.75,  # Decrease Pac-12 further
-#     "American Athletic": 0.72,  # Slight decrease to American Athletic
-#     "Mountain West": 0.67,  # Decrease Mountain West further
-#     "Sun Belt": 0.6,  # Decrease Sun Belt slightly
-#     "Mid-American": 0.55,  # Decrease Mid-American slightly
-#     "Conference USA": 0.5,  # Decrease Conference USA further
-#     "FBS Independents": 0.85,  # Increase FBS Independents slightly
-# }
-# CONFERENCE_MULTIPLIERS = {
-#     "SEC": 1.15,  # Further increase SEC multiplier
-#     "Big Ten": 0.95,  # Increase Big Ten slightly
-#     "Big 12": 0.82,  # Decrease Big 12 further
-#     "ACC": 0.78,  # Decrease ACC further
-#     "Pac-12": 0.72,  # Decrease Pac-12 further
-#     "American Athletic": 0.7,  # Maintain American Athletic
-#     "Mountain West": 0.65,  # Decrease Mountain West further
-#     "Sun Belt": 0.58,  # Decrease Sun Belt further
-#     "Mid-American": 0.53,  # Decrease Mid-American further
-#     "Conference USA": 0.48,  # Decrease Conference USA further
-#     "FBS Independents": 0.88,  # Increase FBS Independents slightly
-# }
-
 if __name__ == "__main__":
     main()
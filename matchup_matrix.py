@@ -0,0 +1,179 @@
+# Precompute the predictions for every possible matchup between the teams in the dataset
+import hashlib
+import json
+import os
+
+import numpy as np
+
+import config
+import data
+
+# The matchup matrix is stored as one .npy file per matrix plus a JSON file with the team order
+MATRIX_DIRECTORY = "CFBdata/matchups"
+MATRICES = ("home_points", "away_points", "totals", "spreads")
+
+
+def get_fingerprint():
+    """
+    Fingerprint everything the matchup matrix depends on (the team data and the model settings).
+
+    :return: fingerprint (str) - a hash that changes whenever the matchup matrix would change
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(list(data.team_ids)).encode())
+    digest.update(np.ascontiguousarray(data.team_means).tobytes())
+    digest.update(np.ascontiguousarray(data.team_win_correlations).tobytes())
+    digest.update(json.dumps(data.team_conferences, sort_keys=True).encode())
+    digest.update(json.dumps(config.CONFERENCE_MULTIPLIERS, sort_keys=True).encode())
+    digest.update(
+        json.dumps(
+            [config.Home_Field_Advantage, config.Away_Field_Disadvantage, data.TIE_TOLERANCE]
+        ).encode()
+    )
+    return digest.hexdigest()
+
+
+def build_matchup_matrix():
+    """
+    Predict every possible game between the teams in the dataset in one vectorized pass.
+
+    Row i and column j of each matrix is the game with team i at home against team j.
+
+    :return: matrix (dict) - teams (list) and team_ids (dict) give the order of the rows and columns;
+    home_points and away_points (np.ndarray) - the points of each team as in predict_winner_all_stats(home, away, home, away);
+    totals (np.ndarray) - the predicted total of each game (predict_points); spreads (np.ndarray) - the predicted spread
+    of each game (spread); fingerprint (str) - the fingerprint of the data the matrix was built from
+    """
+    teams = list(data.team_ids)
+    n = len(teams)
+
+    # Every (home, away) pair, flattened so that the scoring functions can handle them all at once
+    home_ids = np.repeat(np.arange(n), n)
+    away_ids = np.tile(np.arange(n), n)
+
+    home_points, away_points = data.score_games(home_ids, away_ids)
+
+    return {
+        "teams": teams,
+        "team_ids": {team: i for i, team in enumerate(teams)},
+        "home_points": home_points.reshape(n, n),
+        "away_points": away_points.reshape(n, n),
+        "totals": data.score_totals(home_ids, away_ids).reshape(n, n),
+        "spreads": data.score_spreads(home_ids, away_ids).reshape(n, n),
+        "fingerprint": get_fingerprint(),
+    }
+
+
+def update_matchup_matrix(matrix, teams):
+    """
+    Predict the games of some teams again (e.g. after data.update_teams), keeping every other game of a matchup matrix.
+
+    Only the rows and columns of these teams change: a game between two other teams only depends on those two teams.
+
+    :param matrix: The matchup matrix (see build_matchup_matrix), in the same team order as the data.
+    :param teams: The teams whose games are predicted again.
+    :return: matrix (dict) - the updated matchup matrix
+    """
+    if matrix["teams"] != list(data.team_ids):
+        raise ValueError("The matchup matrix does not have the same teams as the data")
+
+    n = len(matrix["teams"])
+    ids = np.array([matrix["team_ids"][team] for team in teams], dtype=np.intp)
+    others = np.arange(n)
+
+    # Every game with one of the teams at home, then every game with one of them away
+    home_ids = np.concatenate([np.repeat(ids, n), np.tile(others, len(ids))])
+    away_ids = np.concatenate([np.tile(others, len(ids)), np.repeat(ids, n)])
+
+    home_points, away_points = data.score_games(home_ids, away_ids)
+    predictions = {
+        "home_points": home_points,
+        "away_points": away_points,
+        "totals": data.score_totals(home_ids, away_ids),
+        "spreads": data.score_spreads(home_ids, away_ids),
+    }
+
+    updated = dict(matrix)
+    for name in MATRICES:
+        # Loaded matrices are read-only memory maps, so update a copy
+        updated[name] = np.array(matrix[name])
+        updated[name][home_ids, away_ids] = predictions[name]
+    updated["fingerprint"] = get_fingerprint()
+    return updated
+
+
+def save_matchup_matrix(matrix, directory=MATRIX_DIRECTORY):
+    """
+    Save a matchup matrix to disk.
+
+    :param matrix: The matchup matrix (see build_matchup_matrix).
+    :param directory: The directory to save the matrix in.
+    :return: None
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    # Write to temporary files first so that a reader never sees a half written matrix
+    for name in MATRICES:
+        path = os.path.join(directory, name + ".npy")
+        with open(path + ".tmp", "wb") as file:
+            np.save(file, matrix[name])
+        os.replace(path + ".tmp", path)
+
+    # The team order and fingerprint are written last, so they always describe complete matrices
+    path = os.path.join(directory, "teams.json")
+    with open(path + ".tmp", "w") as file:
+        json.dump(
+            {"teams": matrix["teams"], "fingerprint": matrix["fingerprint"]}, file
+        )
+    os.replace(path + ".tmp", path)
+
+
+def load_matchup_matrix(directory=MATRIX_DIRECTORY):
+    """
+    Load a matchup matrix from disk (memory-mapped, so only the games that are looked up are read).
+
+    :param directory: The directory the matrix was saved in.
+    :return: matrix (dict) - the matchup matrix, or None if there is no matrix or it is out of date
+    """
+    try:
+        with open(os.path.join(directory, "teams.json")) as file:
+            header = json.load(file)
+    except FileNotFoundError:
+        return None
+
+    # A matrix built from other data or other settings would give wrong predictions
+    if header["fingerprint"] != get_fingerprint():
+        return None
+
+    matrix = {
+        "teams": header["teams"],
+        "team_ids": {team: i for i, team in enumerate(header["teams"])},
+        "fingerprint": header["fingerprint"],
+    }
+    for name in MATRICES:
+        matrix[name] = np.load(os.path.join(directory, name + ".npy"), mmap_mode="r")
+
+    return matrix
+
+
+def use_matchup_matrix(directory=MATRIX_DIRECTORY):
+    """
+    Make the prediction functions answer from the matchup matrix, rebuilding it first if it is missing or out of date.
+
+    :param directory: The directory the matrix is saved in.
+    :return: matrix (dict) - the matchup matrix in use
+    """
+    matrix = load_matchup_matrix(directory)
+    if matrix is None:
+        matrix = build_matchup_matrix()
+        save_matchup_matrix(matrix, directory)
+
+    data.matchup_matrix = matrix
+    return matrix
+
+
+if __name__ == "__main__":
+    matrix = build_matchup_matrix()
+    save_matchup_matrix(matrix)
+    n = len(matrix["teams"])
+    print(f"Saved {n} x {n} matchups to {MATRIX_DIRECTORY}")
@@ -0,0 +1,191 @@
+# Counters and latency histograms of every stage of a prediction (fetch, normalize, features, score), exported in the
+# Prometheus text format (see the /metrics route in app.py)
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Upper bounds (in seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# The number of recent observations of each histogram the percentiles are computed from
+PERCENTILE_WINDOW = 1000
+PERCENTILES = (50, 90, 99)
+
+# Descriptions of the metrics (shown as HELP lines)
+DESCRIPTIONS = {
+    "cfb_stage_seconds": "Time spent in each stage of a prediction",
+    "cfb_stage_errors_total": "Errors raised in each stage of a prediction",
+    "cfb_dropped_games_total": "Games that could not be predicted, by stage and reason",
+    "cfb_api_request_seconds": "Latency of every HTTP request to the College Football Data API",
+    "cfb_api_retries_total": "Requests to the API that were tried again",
+    "cfb_api_errors_total": "Requests to the API that failed for good",
+    "cfb_api_cache_hits_total": "API calls answered from the response cache",
+    "cfb_api_revalidations_total": "API calls answered from the cache after the API confirmed it",
+}
+
+_lock = threading.Lock()
+# (name, labels) -> value
+_counters = {}
+# (name, labels) -> {"buckets": [count per bucket], "count": int, "sum": float, "recent": deque}
+_histograms = {}
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def increment(name, amount=1, **labels):
+    """
+    Add to a counter.
+
+    :param name: The name of the counter.
+    :param amount: How much to add.
+    :param labels: The labels of the counter (e.g. stage="fetch").
+    :return: None
+    """
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, value, **labels):
+    """
+    Record an observation (e.g. a latency in seconds) in a histogram.
+
+    :param name: The name of the histogram.
+    :param value: The observed value.
+    :param labels: The labels of the histogram.
+    :return: None
+    """
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {
+                "buckets": [0] * len(LATENCY_BUCKETS),
+                "count": 0,
+                "sum": 0.0,
+                "recent": deque(maxlen=PERCENTILE_WINDOW),
+            }
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                histogram["buckets"][i] += 1
+        histogram["count"] += 1
+        histogram["sum"] += value
+        histogram["recent"].append(value)
+
+
+@contextmanager
+def timed(stage):
+    """
+    Time a stage of a prediction, and count the errors raised in it (they are raised again).
+
+    :param stage: The name of the stage ("fetch", "normalize", "features" or "score").
+    :return: A context manager.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as exception:
+        increment("cfb_stage_errors_total", stage=stage, error=type(exception).__name__)
+        raise
+    finally:
+        observe("cfb_stage_seconds", time.perf_counter() - start, stage=stage)
+
+
+def drop_game(stage, reason, count=1):
+    """
+    Count games that could not be predicted.
+
+    :param stage: The stage the games were dropped in.
+    :param reason: Why they were dropped (e.g. "not_fbs" or "not_in_dataset").
+    :param count: The number of games.
+    :return: None
+    """
+    if count:
+        increment("cfb_dropped_games_total", count, stage=stage, reason=reason)
+
+
+def get_percentiles(name, **labels):
+    """
+    Get the percentiles of the recent observations of a histogram.
+
+    :param name: The name of the histogram.
+    :param labels: The labels of the histogram.
+    :return: percentiles (dict) - a dictionary that links each percentile in PERCENTILES to its value (empty if nothing
+    was observed)
+    """
+    with _lock:
+        histogram = _histograms.get(_key(name, labels))
+        recent = sorted(histogram["recent"]) if histogram else []
+    if not recent:
+        return {}
+    return {
+        percentile: recent[min(len(recent) - 1, len(recent) * percentile // 100)]
+        for percentile in PERCENTILES
+    }
+
+
+def _format_labels(labels, **extra):
+    labels = list(labels) + list(extra.items())
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+def render_prometheus():
+    """
+    Export every metric in the Prometheus text format.
+
+    :return: The metrics, as text.
+    """
+    with _lock:
+        counters = dict(_counters)
+        histograms = {
+            key: {**histogram, "buckets": list(histogram["buckets"])}
+            for key, histogram in _histograms.items()
+        }
+
+    lines = []
+    described = set()
+
+    def describe(name, kind):
+        if name not in described:
+            described.add(name)
+            if name in DESCRIPTIONS:
+                lines.append(f"# HELP {name} {DESCRIPTIONS[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in sorted(counters.items()):
+        describe(name, "counter")
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    for (name, labels), histogram in sorted(histograms.items()):
+        describe(name, "histogram")
+        for bound, count in zip(LATENCY_BUCKETS, histogram["buckets"]):
+            lines.append(f"{name}_bucket{_format_labels(labels, le=bound)} {count}")
+        lines.append(f'{name}_bucket{_format_labels(labels, le="+Inf")} {histogram["count"]}')
+        lines.append(f"{name}_sum{_format_labels(labels)} {histogram['sum']}")
+        lines.append(f"{name}_count{_format_labels(labels)} {histogram['count']}")
+
+    # The percentiles of the recent observations, as a separate summary
+    for (name, labels), histogram in sorted(histograms.items()):
+        describe(name + "_recent", "summary")
+        for percentile, value in get_percentiles(name, **dict(labels)).items():
+            lines.append(
+                f"{name}_recent{_format_labels(labels, quantile=percentile / 100)} {value}"
+            )
+
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """
+    Forget every metric.
+
+    :return: None
+    """
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
@@ -0,0 +1,291 @@
+# Registry of prediction models that all score games from the shared team summary (see data.build_summary)
+import numpy as np
+
+import data
+import metrics
+
+# Model name -> model class
+MODELS = {}
+
+# The model used for each kind of prediction when the caller does not ask for one
+DEFAULT_MODELS = {
+    "winner": "all_stats",
+    "total": "points",
+    "spread": "spread",
+}
+
+
+def register_model(model_class):
+    """
+    Register a model class under its name (use it as a class decorator).
+
+    :param model_class: A subclass of Model.
+    :return: The model class, unchanged.
+    """
+    MODELS[model_class.name] = model_class
+    return model_class
+
+
+class Model:
+    """
+    A prediction model. Models are fitted on a team summary (the team feature matrix) and then predict whole slates of
+    games given by the rows of their teams in that summary.
+
+    Subclasses set name (the name they are registered under) and kind ("winner", "total" or "spread"), and implement
+    predict. A winner model returns team1_points and team2_points, a total model returns totals and a spread model
+    returns spreads (all arrays with one entry per game). Models that need the API to be fitted set offline to False.
+    """
+
+    name = None
+    kind = None
+    offline = True
+
+    def __init__(self, **params):
+        """
+        :param params: The parameters of the model (e.g. conference_multipliers).
+        """
+        self.params = params
+        self.summary = None
+
+    def fit(self, summary):
+        """
+        Fit the model on a team summary.
+
+        :param summary: The team summary (see data.build_summary).
+        :return: The fitted model.
+        """
+        self.summary = summary
+        return self
+
+    def predict(self, team1_ids, team2_ids, home_field=False):
+        """
+        Predict games between teams given by their rows in the summary the model was fitted on.
+
+        :param team1_ids: The row of the first team of each game (the home team if home_field is set).
+        :param team2_ids: The row of the second team of each game.
+        :param home_field: Whether the first team is playing at home.
+        :return: predictions (dict) - arrays with one entry per game (see the class docstring)
+        """
+        raise NotImplementedError
+
+
+@register_model
+class TopStatsModel(Model):
+    """The three statistics most positively and negatively correlated with wins (predict_winner)."""
+
+    name = "top_stats"
+    kind = "winner"
+
+    def predict(self, team1_ids, team2_ids, home_field=False):
+        team1_points, team2_points = data.score_top_stats(
+            team1_ids, team2_ids, self.summary
+        )
+        return {"team1_points": team1_points, "team2_points": team2_points}
+
+
+@register_model
+class AllStatsModel(Model):
+    """Every statistic, adjusted by the conference multipliers and home field advantage (predict_winner_all_stats)."""
+
+    name = "all_stats"
+    kind = "winner"
+
+    def predict(self, team1_ids, team2_ids, home_field=False):
+        team1_points, team2_points = data.score_games(
+            team1_ids,
+            team2_ids,
+            home_field,
+            self.params.get("conference_multipliers"),
+            self.params.get("home_field_advantage"),
+            self.params.get("away_field_disadvantage"),
+            self.summary,
+            self.params.get("features"),
+        )
+        return {"team1_points": team1_points, "team2_points": team2_points}
+
+
+@register_model
+class AllFeaturesModel(AllStatsModel):
+    """Like all_stats, but with every numeric column of the dataset (or the ones named in the features param)."""
+
+    name = "all_features"
+
+    def __init__(self, **params):
+        super().__init__(**{"features": "all", **params})
+
+
+@register_model
+class PointsModel(Model):
+    """Each team scores halfway between its offense and the other team's defense (predict_points)."""
+
+    name = "points"
+    kind = "total"
+
+    def predict(self, team1_ids, team2_ids, home_field=False):
+        return {"totals": data.score_totals(team1_ids, team2_ids, self.summary)}
+
+
+@register_model
+class SpreadModel(Model):
+    """The difference between each team's offense and the other team's defense (spread)."""
+
+    name = "spread"
+    kind = "spread"
+
+    def predict(self, team1_ids, team2_ids, home_field=False):
+        return {"spreads": data.score_spreads(team1_ids, team2_ids, self.summary)}
+
+
+class RegressionModel(Model):
+    """
+    Base class of the models fitted on historical games (see regression.py). The regression is fitted once and shared
+    by all of them; refitting on a new summary only changes the statistics the games are predicted from.
+    """
+
+    # Fitting needs the games of every season, and the current season is never archived (see backtest.load_games)
+    offline = False
+
+    def fit(self, summary):
+        # Imported here because fitting needs the game archive (see backtest.py), which the other models do not
+        from regression import get_regression
+
+        self.regression = get_regression()
+        return super().fit(summary)
+
+    def predict_regression(self, team1_ids, team2_ids, home_field):
+        from regression import predict_regression
+
+        return predict_regression(
+            self.regression, self.summary["team_means"], team1_ids, team2_ids, home_field
+        )
+
+
+@register_model
+class LogisticModel(RegressionModel):
+    """Logistic regression on the differences between the teams' statistics (the points are win probabilities)."""
+
+    name = "logistic"
+    kind = "winner"
+
+    def predict(self, team1_ids, team2_ids, home_field=False):
+        probabilities, _, _ = self.predict_regression(team1_ids, team2_ids, home_field)
+        return {"team1_points": probabilities, "team2_points": 1 - probabilities}
+
+
+@register_model
+class RidgeTotalModel(RegressionModel):
+    """Ridge regression of the total on the sums of the teams' statistics."""
+
+    name = "ridge_total"
+    kind = "total"
+
+    def predict(self, team1_ids, team2_ids, home_field=False):
+        _, _, totals = self.predict_regression(team1_ids, team2_ids, home_field)
+        return {"totals": np.round(totals, 3)}
+
+
+@register_model
+class RidgeSpreadModel(RegressionModel):
+    """Ridge regression of the margin on the differences between the teams' statistics."""
+
+    name = "ridge_spread"
+    kind = "spread"
+
+    def predict(self, team1_ids, team2_ids, home_field=False):
+        _, margins, _ = self.predict_regression(team1_ids, team2_ids, home_field)
+        return {"spreads": np.round(margins, 2)}
+
+
+# Fitted models, refitted whenever the data is reloaded
+_fitted = {}
+
+
+def get_model(name):
+    """
+    Get a registered model, fitted on the current team summary.
+
+    :param name: The name of the model.
+    :return: The fitted model.
+    """
+    model = _fitted.get(name)
+    if model is None or model.summary is not data.team_summary:
+        model = MODELS[name]().fit(data.team_summary)
+        _fitted[name] = model
+    return model
+
+
+def predict_matchups(team1_teams, team2_teams, home_field=False, models=None):
+    """
+    Predict a slate of games with several models, looking the teams up in the team summary only once.
+
+    :param team1_teams: The first team of each game (the home team if home_field is set).
+    :param team2_teams: The second team of each game.
+    :param home_field: Whether the first team is playing at home.
+    :param models: A dictionary that links each kind of prediction to the name of the model to use (defaults to
+    DEFAULT_MODELS; missing kinds use their default model).
+    :return: predictions (dict) - valid (whether both teams are in the dataset) and the predictions of every model
+    (winners, winner_points and loser_points for the winner model, totals for the total model, spreads for the spread
+    model). Games that are not valid have no winner and NaN predictions.
+    """
+    models = {**DEFAULT_MODELS, **(models or {})}
+    team1_teams = np.asarray(team1_teams, dtype=object).reshape(-1)
+    team2_teams = np.asarray(team2_teams, dtype=object).reshape(-1)
+
+    # Convert the team names to rows of the team summary (-1 if the team is not in the dataset)
+    with metrics.timed("features"):
+        ids = data.team_summary["team_ids"]
+        team1_ids = np.array([ids.get(team, -1) for team in team1_teams], dtype=np.intp)
+        team2_ids = np.array([ids.get(team, -1) for team in team2_teams], dtype=np.intp)
+        valid = (team1_ids >= 0) & (team2_ids >= 0)
+
+    predictions = {"valid": valid}
+    with metrics.timed("score"):
+        for kind, name in models.items():
+            model = get_model(name)
+            if model.kind != kind:
+                raise ValueError(f"{name} is a {model.kind} model, not a {kind} model")
+            for key, values in model.predict(
+                team1_ids[valid], team2_ids[valid], home_field
+            ).items():
+                predictions[key] = np.full(len(valid), np.nan)
+                predictions[key][valid] = values
+
+    if "team1_points" in predictions:
+        # Ties go to the second team, just like in predict_winner_all_stats
+        team1_points = predictions.pop("team1_points")
+        team2_points = predictions.pop("team2_points")
+        team1_wins = team1_points > team2_points
+        predictions["winners"] = np.where(
+            valid, np.where(team1_wins, team1_teams, team2_teams), None
+        )
+        predictions["winner_points"] = np.where(team1_wins, team1_points, team2_points)
+        predictions["loser_points"] = np.where(team1_wins, team2_points, team1_points)
+
+    return predictions
+
+
+def predict_matchup(team1, team2, home_field=False, models=None):
+    """
+    Predict a single game with several models (see predict_matchups).
+
+    :param team1: The first team (the home team if home_field is set).
+    :param team2: The second team.
+    :param home_field: Whether the first team is playing at home.
+    :param models: The model to use for each kind of prediction (see predict_matchups).
+    :return: prediction (dict) - the winner, winner_points, loser_points, total_score and spread of the game (each kind
+    only if it was predicted), or None if one of the teams is not in the dataset
+    """
+    predictions = predict_matchups([team1], [team2], home_field, models)
+    if not predictions["valid"][0]:
+        return None
+
+    prediction = {}
+    if "winners" in predictions:
+        prediction["winner"] = predictions["winners"][0]
+        prediction["winner_points"] = float(predictions["winner_points"][0])
+        prediction["loser_points"] = float(predictions["loser_points"][0])
+    if "totals" in predictions:
+        prediction["total_score"] = float(predictions["totals"][0])
+    if "spreads" in predictions:
+        prediction["spread"] = float(predictions["spreads"][0])
+    return prediction
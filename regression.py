@@ -0,0 +1,169 @@
+# Regression models fitted on historical games: logistic regression for the winner, ridge regression for the margin
+# and the total (registered in models.py)
+import threading
+
+import numpy as np
+
+from backtest import get_prior_summary, iter_season_games
+from data import get_data
+
+# The strength of the ridge penalty (on standardized features)
+RIDGE_ALPHA = 1.0
+
+# Newton steps of the logistic regression (it usually converges in less than 10)
+MAX_ITERATIONS = 25
+TOLERANCE = 1e-8
+
+
+def matchup_features(team_means, team1_ids, team2_ids, home_field):
+    """
+    Build the features of games between teams given by their rows in a team summary.
+
+    :param team_means: The (team x statistic) matrix of average statistics (see data.build_team_summary).
+    :param team1_ids: The row of the first team of each game.
+    :param team2_ids: The row of the second team of each game.
+    :param home_field: Whether the first team is playing at home (one value for all the games, or one per game).
+    :return: features (np.ndarray) - a (game x feature) matrix: the difference between the teams' statistics, whether
+    the first team is at home, the sum of the teams' statistics and a constant
+    """
+    means1 = team_means[team1_ids]
+    means2 = team_means[team2_ids]
+    n = len(means1)
+    return np.hstack(
+        [
+            means1 - means2,
+            np.broadcast_to(np.asarray(home_field, dtype=np.double), n)[:, None],
+            means1 + means2,
+            np.ones((n, 1)),
+        ]
+    )
+
+
+def fit_ridge(features, targets, alpha=RIDGE_ALPHA):
+    """
+    Fit a ridge regression in closed form.
+
+    :param features: The (game x feature) matrix.
+    :param targets: The target of each game.
+    :param alpha: The strength of the penalty.
+    :return: weights (np.ndarray) - one weight per feature
+    """
+    gram = features.T @ features + alpha * np.eye(features.shape[1])
+    return np.linalg.solve(gram, features.T @ targets)
+
+
+def fit_logistic(features, targets, alpha=RIDGE_ALPHA):
+    """
+    Fit a ridge-penalized logistic regression with Newton's method.
+
+    :param features: The (game x feature) matrix.
+    :param targets: Whether the first team won each game (0 or 1).
+    :param alpha: The strength of the penalty.
+    :return: weights (np.ndarray) - one weight per feature
+    """
+    weights = np.zeros(features.shape[1])
+    penalty = alpha * np.eye(features.shape[1])
+    for _ in range(MAX_ITERATIONS):
+        probabilities = 1 / (1 + np.exp(-(features @ weights)))
+        gradient = features.T @ (probabilities - targets) + alpha * weights
+        hessian = (features.T * (probabilities * (1 - probabilities))) @ features + penalty
+        step = np.linalg.solve(hessian, gradient)
+        weights -= step
+        if np.abs(step).max() < TOLERANCE:
+            break
+    return weights
+
+
+def fit_regression(seasons=None, alpha=RIDGE_ALPHA):
+    """
+    Fit the regression models on historical games. Each game's features come from the seasons before it (see
+    backtest.iter_season_games), so the models learn from what was known before each game was played.
+
+    cfb.csv only holds season totals, so the results the models learn from are the games of the API's archive (see
+    backtest.load_games): a season whose games are not archived yet is fetched from the API once.
+
+    :param seasons: The seasons to train on (defaults to backtest.get_seasons).
+    :param alpha: The strength of the ridge penalty.
+    :return: regression (dict) - scale (the standard deviation of each feature, which the features are divided by) and
+    weights (a (feature x 3) matrix whose columns give the log odds that the first team wins, the margin of the first
+    team and the total)
+    """
+    features = []
+    margins = []
+    totals = []
+    for season, games, summary, home_ids, away_ids in iter_season_games(seasons):
+        features.append(
+            matchup_features(summary["team_means"], home_ids, away_ids, True)
+        )
+        margins.append((games["home_points"] - games["away_points"]).to_numpy())
+        totals.append((games["home_points"] + games["away_points"]).to_numpy())
+    features = np.concatenate(features)
+    margins = np.concatenate(margins)
+    totals = np.concatenate(totals)
+
+    # Leave out the games of teams that have no value for a statistic
+    complete = np.isfinite(features).all(axis=1)
+    features = features[complete]
+    margins = margins[complete]
+    totals = totals[complete]
+
+    # Standardize the features so that the penalty treats every statistic the same (but leave the flags alone)
+    scale = features.std(axis=0)
+    n = (features.shape[1] - 2) // 2
+    scale[[n, -1]] = 1
+    scale[scale == 0] = 1
+    features = features / scale
+
+    # The winner and the margin only depend on the differences (so that swapping the teams flips the prediction), and
+    # the total only on the sums
+    differences = slice(0, n + 1)
+    sums = slice(n + 1, None)
+    weights = np.zeros((features.shape[1], 3))
+    weights[differences, 0] = fit_logistic(
+        features[:, differences], (margins > 0).astype(np.double), alpha
+    )
+    weights[differences, 1] = fit_ridge(features[:, differences], margins, alpha)
+    weights[sums, 2] = fit_ridge(features[:, sums], totals, alpha)
+
+    return {"scale": scale, "weights": weights}
+
+
+# The fitted models and the data they were fitted on
+_regression = {"data": None, "regression": None}
+_regression_lock = threading.Lock()
+
+
+def get_regression():
+    """
+    Get the regression models, fitting them on first use and again whenever the data changes (when it is reloaded or
+    new rows are added, see data.reload_data and data.update_teams).
+
+    :return: regression (dict) - see fit_regression
+    """
+    df = get_data()
+    with _regression_lock:
+        if _regression["data"] is not df:
+            # The summaries of the seasons the models learn from were built from the old data
+            get_prior_summary.cache_clear()
+            _regression["regression"] = fit_regression()
+            _regression["data"] = df
+        return _regression["regression"]
+
+
+def predict_regression(regression, team_means, team1_ids, team2_ids, home_field=False):
+    """
+    Predict a slate of games with the regression models (a single matrix multiply).
+
+    :param regression: The fitted models (see fit_regression).
+    :param team_means: The (team x statistic) matrix of average statistics the games are predicted from.
+    :param team1_ids: The row of the first team of each game.
+    :param team2_ids: The row of the second team of each game.
+    :param home_field: Whether the first team is playing at home.
+    :return: probabilities (np.ndarray) - the probability that the first team wins each game; margins (np.ndarray) - the
+    predicted margin of the first team; totals (np.ndarray) - the predicted total of each game
+    """
+    features = matchup_features(team_means, team1_ids, team2_ids, home_field)
+    log_odds, margins, totals = (
+        (features / regression["scale"]) @ regression["weights"]
+    ).T
+    return 1 / (1 + np.exp(-log_odds)), margins, totals
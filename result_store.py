@@ -0,0 +1,142 @@
+# Store of computed predictions, shared by the web app and anything that precomputes them
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+RESULTS_DIRECTORY = "CFBdata/.cache/results"
+
+
+class ResultStore:
+    """
+    Computed results (e.g. the predictions behind a page), keyed by view, season and week.
+
+    Results are kept in memory and written to disk, so a result computed by another process is picked up as soon as its
+    file changes.
+    """
+
+    def __init__(self, directory=RESULTS_DIRECTORY):
+        """
+        :param directory: The directory the results are written to.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # (view, season, week) -> (file mtime, entry)
+        self._entries = {}
+
+    def _path(self, view, season, week, extension=".json"):
+        return os.path.join(self.directory, f"{view}-{season}-{week}{extension}")
+
+    def get(self, view, season, week):
+        """
+        Get a stored result.
+
+        :param view: The name of the view the result belongs to.
+        :param season: The season of the result.
+        :param week: The week of the result.
+        :return: entry (dict) - result, etag (a hash of the result) and computed_at (a timestamp), or None if the result
+        was never stored
+        """
+        key = (view, season, week)
+        path = self._path(view, season, week)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+
+        try:
+            with open(path) as file:
+                entry = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        with self._lock:
+            self._entries[key] = (mtime, entry)
+        return entry
+
+    def put(self, view, season, week, result):
+        """
+        Store a result.
+
+        :param view: The name of the view the result belongs to.
+        :param season: The season of the result.
+        :param week: The week of the result.
+        :param result: The result (anything that can be converted to JSON).
+        :return: entry (dict) - the stored entry (see get)
+        """
+        serialized = json.dumps(result)
+        entry = {
+            "result": json.loads(serialized),
+            "etag": hashlib.sha256(serialized.encode()).hexdigest()[:32],
+            "computed_at": time.time(),
+        }
+
+        # Write to a temporary file first so that a reader never sees a half written result (each writer gets its own,
+        # since the scheduler and the web app can store the same result at the same time)
+        path = self._path(view, season, week)
+        with tempfile.NamedTemporaryFile(
+            "w", dir=self.directory, suffix=".tmp", delete=False
+        ) as file:
+            json.dump(entry, file)
+        try:
+            os.replace(file.name, path)
+        except OSError:
+            os.unlink(file.name)
+            raise
+
+        with self._lock:
+            self._entries[(view, season, week)] = (os.stat(path).st_mtime_ns, entry)
+        self.clear_request(view, season, week)
+        return entry
+
+    def request(self, view, season, week):
+        """
+        Ask for a result to be computed (by whatever computes the results, see scheduler.compute_requested). Asking
+        again before it is computed does nothing.
+
+        :param view: The name of the view.
+        :param season: The season.
+        :param week: The week.
+        :return: None
+        """
+        open(self._path(view, season, week, ".requested"), "a").close()
+
+    def get_requests(self):
+        """
+        Get the results that were asked for and are not computed yet, oldest request first.
+
+        :return: requests (list) - (view, season, week) tuples
+        """
+        requests = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".requested"):
+                continue
+            view, season, week = name[: -len(".requested")].rsplit("-", 2)
+            try:
+                requested_at = os.stat(os.path.join(self.directory, name)).st_mtime
+            except FileNotFoundError:
+                continue
+            requests.append((requested_at, view, int(season), int(week)))
+        return [request[1:] for request in sorted(requests)]
+
+    def clear_request(self, view, season, week):
+        """
+        Forget that a result was asked for.
+
+        :param view: The name of the view.
+        :param season: The season.
+        :param week: The week.
+        :return: None
+        """
+        try:
+            os.unlink(self._path(view, season, week, ".requested"))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,193 @@
+# Precompute the predictions of the current week, so that the web app never computes them while a user is waiting
+import hashlib
+import json
+import threading
+import time
+import traceback
+import warnings
+
+import metrics
+from cfb_api import get_client
+from main import (
+    SEASON,
+    get_current_week,
+    iter_anyWeek_predictions,
+    iter_anyWeek_SEC_overUnder,
+    predict_anyWeek_SEC_overUnder,
+    predict_this_weeks_games,
+)
+from result_store import ResultStore
+
+# How often (in seconds) the calendar, games and lines are checked for changes
+POLL_INTERVAL = 5 * 60
+
+# How often (in seconds) the results the web app asked for are checked (see ResultStore.request)
+REQUEST_INTERVAL = 2
+
+
+def compute_winner_predictions(week, season=SEASON):
+    """
+    Predict the winners of a week's games for the winner prediction page.
+
+    :param week: The week to predict.
+    :param season: The season to predict.
+    :return: A list of (matchup, (winner, winner_points, loser_points)) pairs.
+    """
+    winners, matchups = predict_this_weeks_games(week, season)
+    return [(matchup, winner) for matchup, winner in zip(matchups, winners)]
+
+
+def compute_predictions(week, season=SEASON):
+    """
+    Predict the winner, total and spread of every game of a week.
+
+    :param week: The week to predict.
+    :param season: The season to predict.
+    :return: A list of predictions (see main.iter_anyWeek_predictions).
+    """
+    return list(iter_anyWeek_predictions(week, season))
+
+
+def compute_overunder_predictions(week, season=SEASON):
+    """
+    Predict whether every SEC game of a week goes over or under its line.
+
+    :param week: The week to predict.
+    :param season: The season to predict.
+    :return: A list of predictions (see main.iter_anyWeek_SEC_overUnder).
+    """
+    return list(iter_anyWeek_SEC_overUnder(week, season))
+
+
+# The computation behind each precomputed view (each takes a week and a season)
+VIEWS = {
+    "predict-winners": compute_winner_predictions,
+    "overunder": predict_anyWeek_SEC_overUnder,
+    "predictions": compute_predictions,
+    "overunder-predictions": compute_overunder_predictions,
+}
+
+
+def get_slate_fingerprint(week, season=SEASON):
+    """
+    Fingerprint a week's games and over/under lines, so that we can tell when the slate or the lines change.
+
+    :param week: The week.
+    :param season: The season.
+    :return: fingerprint (str) - a hash of the week's games and lines
+    """
+    digest = hashlib.sha256()
+    for endpoint in (
+        f"games?year={season}&week={week}&division=fbs",
+        f"lines?year={season}&week={week}&conference=SEC",
+    ):
+        digest.update(json.dumps(get_client().get(endpoint), sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def precompute_week(store, week, season=SEASON):
+    """
+    Compute every view of a week and store the results.
+
+    :param store: The ResultStore to write to.
+    :param week: The week.
+    :param season: The season.
+    :return: None
+    """
+    for view, compute in VIEWS.items():
+        store.put(view, season, week, compute(week, season))
+
+
+def compute_requested(store):
+    """
+    Compute the views the web app asked for (views of weeks the scheduler does not keep precomputed, e.g. a past week
+    of /api/predictions).
+
+    :param store: The ResultStore to read the requests from and write the results to.
+    :return: None
+    """
+    for view, season, week in store.get_requests():
+        try:
+            if view in VIEWS:
+                store.put(view, season, week, VIEWS[view](week, season))
+        except Exception as exception:
+            # Drop the request (the web app asks again the next time the view is wanted)
+            metrics.increment(
+                "cfb_stage_errors_total",
+                stage="scheduler",
+                error=type(exception).__name__,
+            )
+            traceback.print_exc()
+        finally:
+            store.clear_request(view, season, week)
+
+
+def run_scheduler(
+    store=None,
+    poll_interval=POLL_INTERVAL,
+    stop_event=None,
+    request_interval=REQUEST_INTERVAL,
+):
+    """
+    Keep the current week's views precomputed: compute them as soon as the week rolls over and again whenever its games
+    or lines change. In between, compute the views the web app asks for.
+
+    :param store: The ResultStore to write to (defaults to the shared one on disk).
+    :param poll_interval: How often (in seconds) to check for changes.
+    :param stop_event: A threading.Event that stops the scheduler when it is set.
+    :param request_interval: How often (in seconds) to check for views the web app asked for.
+    :return: None
+    """
+    if store is None:
+        store = ResultStore()
+    if stop_event is None:
+        stop_event = threading.Event()
+
+    last_slate = None
+    next_poll = 0.0
+    while not stop_event.is_set():
+        if time.monotonic() >= next_poll:
+            try:
+                week = get_current_week()
+                slate = (week, get_slate_fingerprint(week))
+                if slate != last_slate:
+                    precompute_week(store, week)
+                    last_slate = slate
+            except Exception as exception:
+                # Keep the scheduler running; the next poll will try again
+                metrics.increment(
+                    "cfb_stage_errors_total",
+                    stage="scheduler",
+                    error=type(exception).__name__,
+                )
+                traceback.print_exc()
+            next_poll = time.monotonic() + poll_interval
+
+        compute_requested(store)
+        stop_event.wait(min(request_interval, max(0.0, next_poll - time.monotonic())))
+
+
+def start_scheduler(store=None, poll_interval=POLL_INTERVAL, request_interval=REQUEST_INTERVAL):
+    """
+    Run the scheduler in a background thread of this process.
+
+    :param store: The ResultStore to write to.
+    :param poll_interval: How often (in seconds) to check for changes.
+    :param request_interval: How often (in seconds) to check for views the web app asked for.
+    :return: stop_event (threading.Event) - set it to stop the scheduler
+    """
+    stop_event = threading.Event()
+    threading.Thread(
+        target=run_scheduler,
+        args=(store, poll_interval, stop_event, request_interval),
+        daemon=True,
+    ).start()
+    return stop_event
+
+
+if __name__ == "__main__":
+    # Treat numerical warnings as errors, like main.py does
+    warnings.simplefilter("error", RuntimeWarning)
+
+    # Run as a separate worker (start the web app with CFB_SCHEDULER=external)
+    run_scheduler()
@@ -0,0 +1,276 @@
+# Monte Carlo simulation of the rest of a season: win totals and conference title chances of every team
+import argparse
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+
+from backtest import load_games
+from config import SEASON
+from data import is_known_team
+from models import predict_matchups
+
+# How far the actual margin of a game typically lands from the predicted spread (in points)
+MARGIN_STDDEV = 14.0
+
+# The simulations are run in shards of this many seasons, each with its own seed, so that the results only depend on
+# the seed and not on the number of workers
+SHARD_SIZE = 2000
+
+# Conferences without a title to win
+NO_TITLE_CONFERENCES = ("FBS Independents",)
+
+
+def build_schedule(games):
+    """
+    Split a season's games into the results that are already known and the games that have to be simulated.
+
+    Completed games count as they ended. Games against a team that is not in the dataset (i.e. outside the FBS) that are
+    not played yet count as wins for the FBS team.
+
+    :param games: The season's games (see backtest.load_games).
+    :return: schedule (dict) - teams (list) and conferences (list) of every team in the dataset that plays this season;
+    fixed_wins and fixed_conference_wins (np.ndarray) - the wins of each team that are already decided; home_teams,
+    away_teams, home_ids, away_ids and conference_games (whether both teams are in the same conference) of every game
+    left to simulate
+    """
+    teams = {}
+    for side in ("home", "away"):
+        for team, conference in zip(games[f"{side}_team"], games[f"{side}_conference"]):
+            if is_known_team(team):
+                teams.setdefault(team, conference)
+    team_ids = {team: i for i, team in enumerate(teams)}
+
+    fixed_wins = np.zeros(len(teams), dtype=np.intp)
+    fixed_conference_wins = np.zeros(len(teams), dtype=np.intp)
+    remaining = []
+    for game in games.itertuples(index=False):
+        home_id = team_ids.get(game.home_team)
+        away_id = team_ids.get(game.away_team)
+        if home_id is None and away_id is None:
+            continue
+        conference_game = (
+            game.home_conference is not None
+            and game.home_conference == game.away_conference
+        )
+
+        completed = not (math.isnan(game.home_points) or math.isnan(game.away_points))
+        if completed:
+            winner = home_id if game.home_points > game.away_points else away_id
+        elif home_id is None or away_id is None:
+            winner = home_id if away_id is None else away_id
+        else:
+            remaining.append((game.home_team, game.away_team, home_id, away_id, conference_game))
+            continue
+
+        if winner is not None:
+            fixed_wins[winner] += 1
+            if conference_game:
+                fixed_conference_wins[winner] += 1
+
+    home_teams, away_teams, home_ids, away_ids, conference_games = (
+        [list(column) for column in zip(*remaining)] if remaining else ([], [], [], [], [])
+    )
+    return {
+        "teams": list(teams),
+        "conferences": list(teams.values()),
+        "fixed_wins": fixed_wins,
+        "fixed_conference_wins": fixed_conference_wins,
+        "home_teams": home_teams,
+        "away_teams": away_teams,
+        "home_ids": np.array(home_ids, dtype=np.intp),
+        "away_ids": np.array(away_ids, dtype=np.intp),
+        "conference_games": np.array(conference_games, dtype=bool),
+    }
+
+
+def get_game_distributions(schedule, models=None, margin_stddev=MARGIN_STDDEV):
+    """
+    Turn the predicted spread of every game left to simulate into a normal distribution of the home team's margin (only
+    the winner of a game matters to the standings, so the total is predicted but not simulated).
+
+    :param schedule: The schedule (see build_schedule).
+    :param models: The models to predict the games with (see models.predict_matchups).
+    :param margin_stddev: The standard deviation of the home team's margin.
+    :return: distributions (dict) - margin_mean, margin_stddev and total (the predicted total) (np.ndarray) of every game
+    """
+    predictions = predict_matchups(
+        schedule["home_teams"], schedule["away_teams"], home_field=True, models=models
+    )
+    n = len(schedule["home_teams"])
+    return {
+        "margin_mean": predictions["spreads"],
+        "margin_stddev": np.full(n, margin_stddev),
+        "total": predictions["totals"],
+    }
+
+
+def simulate_shard(schedule, distributions, simulations, seed):
+    """
+    Simulate the rest of the season a number of times, all at once.
+
+    :param schedule: The schedule (see build_schedule).
+    :param distributions: The distributions of the games (see get_game_distributions).
+    :param simulations: The number of seasons to simulate.
+    :param seed: The seed of the shard (a np.random.SeedSequence).
+    :return: win_counts (np.ndarray) - a (team x wins) matrix of how often each team finished with each number of
+    wins; title_counts (np.ndarray) - how often each team won its conference; home_wins (np.ndarray) - how often the home
+    team won each game
+    """
+    generator = np.random.default_rng(seed)
+    n_teams = len(schedule["teams"])
+    n_games = len(schedule["home_ids"])
+
+    # (simulation x game): whether the home team won each game of each simulated season
+    margins = generator.normal(
+        distributions["margin_mean"], distributions["margin_stddev"], (simulations, n_games)
+    )
+    home_won = margins > 0
+
+    # Add the simulated wins to the decided ones with an incidence matrix: (simulation x game) @ (game x team)
+    home_incidence = np.zeros((n_games, n_teams))
+    away_incidence = np.zeros((n_games, n_teams))
+    home_incidence[np.arange(n_games), schedule["home_ids"]] = 1
+    away_incidence[np.arange(n_games), schedule["away_ids"]] = 1
+    wins = home_won @ home_incidence + ~home_won @ away_incidence
+    wins = wins.astype(np.intp) + schedule["fixed_wins"]
+
+    conference = schedule["conference_games"]
+    conference_wins = (
+        home_won[:, conference] @ home_incidence[conference]
+        + ~home_won[:, conference] @ away_incidence[conference]
+    ) + schedule["fixed_conference_wins"]
+
+    # Count how often each team ended with each number of wins (one bincount for all the teams), up to the most wins
+    # any team can reach: its decided wins plus every one of its games left to simulate
+    games_left = np.bincount(schedule["home_ids"], minlength=n_teams) + np.bincount(
+        schedule["away_ids"], minlength=n_teams
+    )
+    max_wins = int((schedule["fixed_wins"] + games_left).max(initial=0))
+    offsets = np.arange(n_teams) * (max_wins + 1)
+    win_counts = np.bincount(
+        (wins + offsets).ravel(), minlength=n_teams * (max_wins + 1)
+    ).reshape(n_teams, max_wins + 1)
+
+    # The conference champion has the most conference wins (ties are broken at random)
+    standings = conference_wins + generator.random((simulations, n_teams)) * 0.5
+    title_counts = np.zeros(n_teams, dtype=np.intp)
+    conferences = np.array(schedule["conferences"], dtype=object)
+    for name in set(schedule["conferences"]):
+        if name is None or name in NO_TITLE_CONFERENCES:
+            continue
+        members = np.flatnonzero(conferences == name)
+        champions = members[standings[:, members].argmax(axis=1)]
+        title_counts += np.bincount(champions, minlength=n_teams)
+
+    return win_counts, title_counts, home_won.sum(axis=0)
+
+
+def simulate_season(
+    season=SEASON,
+    simulations=10000,
+    seed=None,
+    workers=1,
+    games=None,
+    models=None,
+    margin_stddev=MARGIN_STDDEV,
+):
+    """
+    Simulate the rest of a season many times and summarize how every team finishes.
+
+    :param season: The season to simulate.
+    :param simulations: The number of seasons to simulate.
+    :param seed: The seed of the random generator (the same seed always gives the same results).
+    :param workers: The number of processes to spread the shards over.
+    :param games: The season's games (see backtest.load_games; loaded if not given).
+    :param models: The models to predict the games with (see models.predict_matchups).
+    :param margin_stddev: The standard deviation of the home team's margin around the predicted spread.
+    :return: teams (pd.DataFrame) - for every team: its conference, the wins it already has, its expected wins, its
+    conference title probability and the probability of finishing with each number of wins; games (pd.DataFrame) -
+    every game left to simulate, with its predicted spread and total and the home team's win probability
+    """
+    if games is None:
+        games = load_games([season])
+    schedule = build_schedule(games)
+    distributions = get_game_distributions(schedule, models, margin_stddev)
+
+    # One seed per shard, so that the results do not depend on how the shards are spread over the workers
+    shards = [SHARD_SIZE] * (simulations // SHARD_SIZE)
+    if simulations % SHARD_SIZE:
+        shards.append(simulations % SHARD_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(shards))
+    arguments = (
+        [schedule] * len(shards),
+        [distributions] * len(shards),
+        shards,
+        seeds,
+    )
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(simulate_shard, *arguments))
+    else:
+        results = list(map(simulate_shard, *arguments))
+
+    win_counts = sum(result[0] for result in results)
+    title_counts = sum(result[1] for result in results)
+    home_wins = sum(result[2] for result in results)
+
+    win_distribution = win_counts / simulations
+    teams = pd.DataFrame(
+        {
+            "team": schedule["teams"],
+            "conference": schedule["conferences"],
+            "wins": schedule["fixed_wins"],
+            "expected_wins": win_distribution @ np.arange(win_distribution.shape[1]),
+            "title_probability": title_counts / simulations,
+        }
+    )
+    teams = pd.concat(
+        [
+            teams,
+            pd.DataFrame(
+                win_distribution, columns=[f"p_{wins}_wins" for wins in range(win_distribution.shape[1])]
+            ),
+        ],
+        axis=1,
+    ).sort_values("expected_wins", ascending=False, ignore_index=True)
+
+    games = pd.DataFrame(
+        {
+            "home_team": schedule["home_teams"],
+            "away_team": schedule["away_teams"],
+            "spread": distributions["margin_mean"],
+            "total": distributions["total"],
+            "home_win_probability": home_wins / simulations,
+        }
+    )
+    return teams, games
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Simulate the rest of a season and report every team's win distribution."
+    )
+    parser.add_argument("--season", type=int, default=SEASON)
+    parser.add_argument("--simulations", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    teams, games = simulate_season(
+        args.season, args.simulations, args.seed, args.workers
+    )
+    print(
+        tabulate(
+            teams[["team", "conference", "wins", "expected_wins", "title_probability"]],
+            headers="keys",
+            showindex=False,
+            floatfmt=".3f",
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# Normalize the team names used by the College Football Data API to the names used in cfb.csv
+import json
+import os
+import threading
+import time
+from types import MappingProxyType
+
+import metrics
+from cfb_api import get_client
+
+ALIASES_PATH = "CFBdata/team_aliases.json"
+
+# The version of the alias file this code understands (bump it with any change to the file's format)
+ALIASES_VERSION = 1
+
+# How long a name table is used before the FBS team list is checked again (in seconds)
+REFRESH_INTERVAL = 24 * 60 * 60
+
+# How long to keep using an old name table after a failed rebuild before trying again (in seconds)
+RETRY_INTERVAL = 5 * 60
+
+_name_table = None
+_refresh_at = 0.0
+_aliases_mtime = None
+# Guards the globals above (only ever held briefly, never during a request to the API)
+_lock = threading.Lock()
+# Held by the one thread that is rebuilding the name table
+_rebuild_lock = threading.Lock()
+
+
+def load_aliases(path=ALIASES_PATH):
+    """
+    Load the alias rules from the (versioned) alias file.
+
+    :param path: The path of the alias file.
+    :return: rules (dict) - version, replacements (pairs of text to replace in every name), aliases (a dictionary that
+    links names to their filtered names) and excluded (filtered names of teams that are not in cfb.csv)
+    """
+    with open(path) as file:
+        rules = json.load(file)
+    if rules.get("version") != ALIASES_VERSION:
+        raise ValueError(
+            f"Unsupported alias file version in {path}: {rules.get('version')} (expected {ALIASES_VERSION})"
+        )
+    return rules
+
+
+def filter_name(school, rules):
+    """
+    Convert a team name to the name used in cfb.csv with the alias rules alone (without the list of FBS schools).
+
+    :param school: The name of the team, as the API spells it.
+    :param rules: The alias rules (see load_aliases).
+    :return: shortened (str) - the name after the replacements; filtered (str) - the name used in cfb.csv
+    """
+    # If a team name contains "State", convert "State" to "St." (and any other replacements)
+    shortened = school
+    for old, new in rules["replacements"]:
+        shortened = shortened.replace(old, new)
+    return shortened, rules["aliases"].get(shortened, rules["aliases"].get(school, shortened))
+
+
+def build_name_table(schools, rules):
+    """
+    Build the name table from the names of the FBS schools.
+
+    :param schools: The names of the schools, as the API spells them.
+    :param rules: The alias rules (see load_aliases).
+    :return: team_names (frozenset) - the filtered names of all the teams in the FBS; team_names_dict (mappingproxy) - a
+    read-only dictionary that links every spelling of a team name (the API name, its shortened form and the filtered name
+    itself) to its filtered name
+    """
+    excluded = set(rules["excluded"])
+    aliases = {}
+    for school in schools:
+        shortened, filtered = filter_name(school, rules)
+        if filtered in excluded:
+            continue
+
+        aliases[school] = filtered
+        aliases[shortened] = filtered
+        aliases[filtered] = filtered
+
+    return frozenset(aliases.values()), MappingProxyType(aliases)
+
+
+def get_name_table():
+    """
+    Get the name table, building it on first use and rebuilding it when the alias file changes or the table is more than
+    REFRESH_INTERVAL seconds old.
+
+    Only one thread rebuilds the table at a time, and the other threads keep using the old table meanwhile. If the
+    rebuild fails (e.g. the API is down), the old table is kept and the rebuild is tried again after RETRY_INTERVAL
+    seconds; the error is only raised when there is no table yet.
+
+    :return: team_names (frozenset), team_names_dict (mappingproxy) - see build_name_table
+    """
+    global _name_table, _refresh_at, _aliases_mtime
+    mtime = os.stat(ALIASES_PATH).st_mtime_ns
+    with _lock:
+        table = _name_table
+        if table is not None and mtime == _aliases_mtime and time.time() < _refresh_at:
+            return table
+
+    # Without a table there is nothing to serve meanwhile, so wait for the thread that is building it
+    if not _rebuild_lock.acquire(blocking=table is None):
+        return table
+    try:
+        with _lock:
+            if _name_table is not None and _name_table is not table:
+                # Another thread rebuilt it while this one was waiting
+                return _name_table
+
+        try:
+            # Get the list of teams (in the FBS)
+            schools = [team["school"] for team in get_client().get("teams/fbs")]
+            new_table = build_name_table(schools, load_aliases())
+        except Exception as exception:
+            if table is None:
+                raise
+            metrics.increment(
+                "cfb_stage_errors_total",
+                stage="team_names",
+                error=type(exception).__name__,
+            )
+            # Also counts as having seen this alias file, so that a broken file is not reread on every call
+            with _lock:
+                _refresh_at = time.time() + RETRY_INTERVAL
+                _aliases_mtime = mtime
+            return table
+
+        with _lock:
+            _name_table = new_table
+            _refresh_at = time.time() + REFRESH_INTERVAL
+            _aliases_mtime = mtime
+        return new_table
+    finally:
+        _rebuild_lock.release()
+
+
+def refresh_name_table():
+    """
+    Make the next call to get_name_table rebuild the name table.
+
+    :return: None
+    """
+    global _name_table
+    with _lock:
+        _name_table = None
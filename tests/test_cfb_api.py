@@ -0,0 +1,128 @@
+# Tests for the shared API client, against a local http.server stand-in for the API
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from api_cache import ResponseCache
+from cfb_api import CFBClient, fetch_all
+
+TEAMS = [{"school": "Alabama", "conference": "SEC"}, {"school": "Georgia", "conference": "SEC"}]
+
+
+@pytest.fixture
+def api():
+    """
+    Start a stand-in API that answers teams/fbs, fails the first requests of "flaky" with a 503, always fails
+    "broken" with a 500 and rate limits the first request of "limited" with a 429 that asks to wait an hour. It keeps its connections alive and records every request and the connection it came on.
+    """
+    state = {"requests": [], "connections": set(), "failures": 2, "limited": 1}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            path = self.path.lstrip("/")
+            with lock:
+                state["requests"].append(path)
+                state["connections"].add(self.client_address)
+                fail = path == "broken" or (path == "flaky" and state["failures"] > 0)
+                if path == "flaky" and fail:
+                    state["failures"] -= 1
+                limited = path == "limited" and state["limited"] > 0
+                if limited:
+                    state["limited"] -= 1
+            if limited:
+                self._send(429, {"error": "rate limited"}, {"Retry-After": "3600"})
+            elif fail:
+                self._send(500 if path == "broken" else 503, {"error": "unavailable"})
+            elif path in ("teams/fbs", "flaky", "limited"):
+                self._send(200, TEAMS)
+            else:
+                self._send(404, {"error": "not found"})
+
+        def _send(self, status, body, headers=None):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state["base_url"] = f"http://127.0.0.1:{server.server_address[1]}/"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def test_retries_server_errors(api):
+    client = CFBClient(base_url=api["base_url"], api_key="test", max_retries=3, backoff=0)
+    assert client.get("flaky") == TEAMS
+    assert api["requests"] == ["flaky"] * 3
+    stats = client.stats()
+    assert stats["requests"] == 3
+    assert stats["retries"] == 2
+    assert stats["errors"] == 0
+
+
+def test_gives_up_after_max_retries(api):
+    client = CFBClient(base_url=api["base_url"], api_key="test", max_retries=2, backoff=0)
+    with pytest.raises(requests.HTTPError):
+        client.get("broken")
+    assert api["requests"] == ["broken"] * 3
+    assert client.stats()["errors"] == 1
+
+
+def test_caps_retry_after(api, monkeypatch):
+    delays = []
+    monkeypatch.setattr("cfb_api.time.sleep", delays.append)
+    client = CFBClient(base_url=api["base_url"], api_key="test", max_retries=3, max_backoff=5)
+    assert client.get("limited") == TEAMS
+    assert api["requests"] == ["limited"] * 2
+    assert delays == [5]
+
+
+def test_does_not_retry_client_errors(api):
+    client = CFBClient(base_url=api["base_url"], api_key="test", max_retries=3, backoff=0)
+    with pytest.raises(requests.HTTPError):
+        client.get("missing")
+    assert api["requests"] == ["missing"]
+
+
+def test_reuses_connections(api):
+    client = CFBClient(base_url=api["base_url"], api_key="test")
+    for _ in range(5):
+        client.get("teams/fbs")
+    assert len(api["requests"]) == 5
+    assert len(api["connections"]) == 1
+
+
+def test_answers_repeated_requests_from_the_cache(api, tmp_path):
+    cache = ResponseCache(str(tmp_path / "api.sqlite"))
+    client = CFBClient(base_url=api["base_url"], api_key="test", cache=cache)
+    assert client.get("teams/fbs") == TEAMS
+    assert client.get("teams/fbs") == TEAMS
+    assert api["requests"] == ["teams/fbs"]
+    assert client.stats()["cache_hits"] == 1
+
+    # A new client with the same cache (e.g. after a restart) does not ask the API again either
+    client = CFBClient(base_url=api["base_url"], api_key="test", cache=cache)
+    assert client.get("teams/fbs") == TEAMS
+    assert api["requests"] == ["teams/fbs"]
+
+
+def test_fetch_all_requests_each_endpoint_once(api):
+    client = CFBClient(base_url=api["base_url"], api_key="test", backoff=0)
+    responses = fetch_all(["teams/fbs", "flaky", "teams/fbs"], client=client)
+    assert responses == {"teams/fbs": TEAMS, "flaky": TEAMS}
+    assert api["requests"].count("teams/fbs") == 1
@@ -0,0 +1,280 @@
+# Tune the conference multipliers and home field factors against historical results (see backtest.py)
+import argparse
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from tabulate import tabulate
+
+from backtest import iter_season_games
+from data import score_games
+from config import (
+    CONFERENCE_MULTIPLIERS,
+    Away_Field_Disadvantage,
+    Home_Field_Advantage,
+)
+
+# The values tried for each home field factor
+HOME_FIELD_ADVANTAGES = [1.0, 1.025, 1.05, 1.075, 1.1]
+AWAY_FIELD_DISADVANTAGES = [0.9, 0.925, 0.95, 0.975, 1.0]
+
+# A grid search raises every conference multiplier to these powers (> 1 spreads the conferences apart, < 1 pulls them
+# together); a random search moves every multiplier by up to MULTIPLIER_RANGE instead
+MULTIPLIER_STRENGTHS = [0.5, 0.75, 1.0, 1.25, 1.5]
+MULTIPLIER_RANGE = 0.15
+
+# The arrays every worker scores against, attached from shared memory by init_worker
+_shared = {}
+
+
+def build_sweep_inputs(seasons=None):
+    """
+    Stack the summaries of every backtested season into one set of arrays, so that every candidate can be scored
+    against all of the seasons in a single vectorized pass.
+
+    :param seasons: The seasons to tune against (defaults to backtest.get_seasons).
+    :return: arrays (dict) - team_means and win_correlations (one row per team and season), home_ids and away_ids (the
+    rows of the teams of each game) and home_won (whether the home team won each game); rows (list) - the (season, team)
+    of each row; conferences (dict) - a dictionary that links each (season, team) to its conference
+    """
+    means, correlations, home_ids, away_ids, home_won = [], [], [], [], []
+    rows = []
+    conferences = {}
+    for season, games, summary, season_home_ids, season_away_ids in iter_season_games(
+        seasons
+    ):
+        offset = len(rows)
+        for team in summary["team_ids"]:
+            rows.append((season, team))
+            conferences[(season, team)] = summary["conferences"].get(team)
+        means.append(summary["team_means"])
+        correlations.append(summary["win_correlations"])
+        home_ids.append(season_home_ids + offset)
+        away_ids.append(season_away_ids + offset)
+        home_won.append((games["home_points"] > games["away_points"]).to_numpy())
+
+    arrays = {
+        "team_means": np.concatenate(means),
+        "win_correlations": np.concatenate(correlations),
+        "home_ids": np.concatenate(home_ids),
+        "away_ids": np.concatenate(away_ids),
+        "home_won": np.concatenate(home_won),
+    }
+    return arrays, rows, conferences
+
+
+def share_arrays(arrays):
+    """
+    Copy arrays into shared memory, so that worker processes can read them without having them pickled.
+
+    :param arrays: A dictionary of arrays.
+    :return: blocks (list) - the shared memory blocks (close and unlink them when done); specs (dict) - what
+    attach_arrays needs to find each array
+    """
+    blocks = []
+    specs = {}
+    for name, array in arrays.items():
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+        blocks.append(block)
+        specs[name] = (block.name, array.shape, array.dtype.str)
+    return blocks, specs
+
+
+def attach_arrays(specs):
+    """
+    Attach to arrays shared by share_arrays.
+
+    :param specs: The specs returned by share_arrays.
+    :return: blocks (list) - the attached blocks (they have to stay open while the arrays are used); arrays (dict) -
+    read-only views of the shared arrays
+    """
+    blocks = []
+    arrays = {}
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        array = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+        array.flags.writeable = False
+        blocks.append(block)
+        arrays[name] = array
+    return blocks, arrays
+
+
+def init_worker(specs, rows, conferences):
+    """
+    Attach a worker process to the shared arrays.
+
+    :param specs: The specs returned by share_arrays.
+    :param rows: The (season, team) of each row (see build_sweep_inputs).
+    :param conferences: The conference of each (season, team).
+    :return: None
+    """
+    blocks, arrays = attach_arrays(specs)
+    _shared["blocks"] = blocks
+    _shared["arrays"] = arrays
+    # Laid out like data.build_summary, so that data.score_games can score against it
+    _shared["summary"] = {
+        "team_means": arrays["team_means"],
+        "win_correlations": arrays["win_correlations"],
+        "team_ids": rows,
+        "conferences": conferences,
+    }
+
+
+def evaluate(candidate):
+    """
+    Score every game with a candidate configuration (in a worker, see init_worker).
+
+    :param candidate: conference_multipliers (dict), home_field_advantage (float), away_field_disadvantage (float)
+    :return: hit_rate (float) - the fraction of games whose winner was predicted correctly
+    """
+    conference_multipliers, home_field_advantage, away_field_disadvantage = candidate
+    arrays = _shared["arrays"]
+    home_points, away_points = score_games(
+        arrays["home_ids"],
+        arrays["away_ids"],
+        True,
+        conference_multipliers,
+        home_field_advantage,
+        away_field_disadvantage,
+        _shared["summary"],
+    )
+    # Ties go to the away team, just like in predict_winner_all_stats
+    return float(np.mean((home_points > away_points) == arrays["home_won"]))
+
+
+def grid_candidates(conference_multipliers=None):
+    """
+    Build every combination of the home field factors and the multiplier strengths.
+
+    :param conference_multipliers: The multipliers to start from (defaults to CONFERENCE_MULTIPLIERS).
+    :return: A list of candidates (see evaluate).
+    """
+    if conference_multipliers is None:
+        conference_multipliers = CONFERENCE_MULTIPLIERS
+
+    candidates = []
+    for strength, home, away in itertools.product(
+        MULTIPLIER_STRENGTHS, HOME_FIELD_ADVANTAGES, AWAY_FIELD_DISADVANTAGES
+    ):
+        multipliers = {
+            conference: round(multiplier**strength, 4)
+            for conference, multiplier in conference_multipliers.items()
+        }
+        candidates.append((multipliers, home, away))
+    return candidates
+
+
+def random_candidates(trials, seed=None, conference_multipliers=None):
+    """
+    Draw random configurations around the current one.
+
+    :param trials: The number of candidates to draw.
+    :param seed: The seed of the random generator (for repeatable searches).
+    :param conference_multipliers: The multipliers to start from (defaults to CONFERENCE_MULTIPLIERS).
+    :return: A list of candidates (see evaluate); the first one is the starting configuration itself.
+    """
+    if conference_multipliers is None:
+        conference_multipliers = CONFERENCE_MULTIPLIERS
+
+    generator = random.Random(seed)
+    candidates = [
+        (
+            dict(conference_multipliers),
+            Home_Field_Advantage,
+            Away_Field_Disadvantage,
+        )
+    ]
+    for _ in range(trials - 1):
+        multipliers = {
+            conference: round(
+                multiplier
+                + generator.uniform(-MULTIPLIER_RANGE, MULTIPLIER_RANGE),
+                4,
+            )
+            for conference, multiplier in conference_multipliers.items()
+        }
+        candidates.append(
+            (
+                multipliers,
+                generator.uniform(min(HOME_FIELD_ADVANTAGES), max(HOME_FIELD_ADVANTAGES)),
+                generator.uniform(
+                    min(AWAY_FIELD_DISADVANTAGES), max(AWAY_FIELD_DISADVANTAGES)
+                ),
+            )
+        )
+    return candidates
+
+
+def sweep(candidates, seasons=None, workers=None):
+    """
+    Evaluate candidate configurations in parallel against every backtested season.
+
+    :param candidates: The candidates to evaluate (see grid_candidates and random_candidates).
+    :param seasons: The seasons to tune against (defaults to backtest.get_seasons).
+    :param workers: The number of worker processes (defaults to the number of CPUs).
+    :return: A list of (hit_rate, candidate) pairs, best first.
+    """
+    arrays, rows, conferences = build_sweep_inputs(seasons)
+    blocks, specs = share_arrays(arrays)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(specs, rows, conferences),
+        ) as executor:
+            chunksize = max(1, len(candidates) // ((workers or os.cpu_count() or 1) * 4))
+            hit_rates = list(executor.map(evaluate, candidates, chunksize=chunksize))
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    return sorted(zip(hit_rates, candidates), key=lambda result: -result[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Tune the conference multipliers and home field factors against historical results."
+    )
+    parser.add_argument("--search", choices=("grid", "random"), default="grid")
+    parser.add_argument("--trials", type=int, default=500, help="candidates to draw in a random search")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seasons", type=int, nargs="*", default=None)
+    parser.add_argument("--top", type=int, default=5, help="configurations to report")
+    args = parser.parse_args()
+
+    if args.search == "grid":
+        candidates = grid_candidates()
+    else:
+        candidates = random_candidates(args.trials, args.seed)
+
+    results = sweep(candidates, args.seasons, args.workers)
+
+    print(
+        tabulate(
+            [
+                (rank + 1, hit_rate, home, away)
+                for rank, (hit_rate, (_, home, away)) in enumerate(results[: args.top])
+            ],
+            headers=["Rank", "Hit rate", "Home field advantage", "Away field disadvantage"],
+            floatfmt=".4f",
+        )
+    )
+
+    hit_rate, (multipliers, home, away) = results[0]
+    print(f"\nBest configuration ({hit_rate:.4f} hit rate over {len(candidates)} candidates):")
+    print(f"Home_Field_Advantage = {home:.4f}")
+    print(f"Away_Field_Disadvantage = {away:.4f}")
+    print("CONFERENCE_MULTIPLIERS = {")
+    for conference, multiplier in multipliers.items():
+        print(f'    "{conference}": {multiplier},')
+    print("}")
+
+
+if __name__ == "__main__":
+    main()